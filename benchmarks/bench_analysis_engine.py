@@ -0,0 +1,79 @@
+"""
+Receipt- and item-level aggregates of a synthetic item table (default 2M
+rows): the previous separate groupby calls (spending per receipt, per day,
+items per day, item stats) versus the single factorize + bincount pass of
+analysis_engine, with item_name as string and as categorical column.
+
+    python -m benchmarks.bench_analysis_engine [--rows N]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.analysis.analysis_engine import aggregate, receipt_tables, item_tables
+from scripts.analysis.load_data import add_timestamp
+from scripts.analysis.overall_analysis import analyze_overall_purchases
+from scripts.analysis.receipt_analysis import spending_per_receipt, calculate_daily_spending, calculate_daily_items
+
+
+def item_table(rows: int, items_per_receipt: int = 20, names: int = 5000) -> pd.DataFrame:
+    """ A table in the layout of load_receipts_data, ~3 years of receipts """
+    rng = np.random.default_rng(1)
+    receipt = np.arange(rows) // items_per_receipt
+    days = pd.date_range("2022-01-01", periods=1100).strftime("%d.%m.%y").to_numpy()
+    receipt_day = rng.integers(0, len(days), receipt[-1] + 1)
+    receipt_time = np.array([f"{h:02d}:{m:02d}" for h in range(8, 21) for m in range(60)])[
+        rng.integers(0, 13 * 60, receipt[-1] + 1)]
+    total_price = rng.integers(19, 2999, rows) / 100
+    quantity = rng.integers(1, 4, rows).astype(float)
+    return add_timestamp(pd.DataFrame({
+        "file": np.char.add(np.char.add("receipt_", receipt.astype(str)), ".pdf")[:rows].astype(object),
+        "date": days[receipt_day[receipt]].astype(object),
+        "time": receipt_time[receipt].astype(object),
+        "item_name": np.char.add("Item ", rng.integers(0, names, rows).astype(str)).astype(object),
+        "quantity": quantity,
+        "unit_price": np.round(total_price / quantity, 2),
+        "total_price": total_price,
+        "bon_sum": 0.0,
+    }))
+
+
+def legacy_analysis(df):
+    return (calculate_daily_spending(df), calculate_daily_items(df), spending_per_receipt(df),
+            analyze_overall_purchases(df))
+
+
+def engine_analysis(df):
+    aggregates = aggregate(df)
+    return receipt_tables(aggregates), item_tables(aggregates)
+
+
+def best_time(analysis, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        analysis(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=2_000_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    df = item_table(args.rows)
+    print(f"{len(df):,} rows, {df['file'].nunique():,} receipts, {df['item_name'].nunique():,} item names")
+
+    for label, table in [("string item_name", df),
+                         ("categorical item_name", df.assign(item_name=df["item_name"].astype("category")))]:
+        legacy = best_time(legacy_analysis, table, args.repeat)
+        engine = best_time(engine_analysis, table, args.repeat)
+        print(f"{label:<22} previous {legacy:6.2f} s   engine {engine:6.2f} s   {legacy / engine:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
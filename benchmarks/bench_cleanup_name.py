@@ -0,0 +1,60 @@
+"""
+cleanup_name over the item names of a synthetic archive (default 1M item
+lines drawn from 3,000 distinct raw names, Zipf-like frequencies): the previous
+chained str.replace version, the translation table alone, and the memoized
+function, with its cache hit rate.
+
+    python -m benchmarks.bench_cleanup_name [--lines N] [--names N]
+"""
+import argparse
+import random
+import time
+
+from scripts.parsers.text_cleaner import cleanup_name, name_cache_stats
+
+
+def legacy_cleanup_name(raw_name: str) -> str:
+    name = raw_name.lower()
+    name = name.replace("ö", "oe").replace("ü", "ue").replace("ä", "ae").replace("ß", "ss")
+    name = name.title()
+    name = " ".join(name.split())
+    return name
+
+
+def archive_names(lines: int, names: int) -> list:
+    """ Raw names as they appear on the receipts: old all-caps and new mixed-case layouts, umlauts, spacing """
+    rng = random.Random(1)
+    words = ["GURKEN", "Möhren", "SÜßKARTOFFEL", "Hafer", "Aufst.", "Mett", "Käse", "Brötchen", "Äpfel", "Bio",
+             "Vollkorn", "Tomaten", "Müsli", "Weißbrot", "Joghurt", "Milch", "Halbf.", "Margari.", "Zucchini"]
+    vocabulary = [("  " if rng.random() < 0.2 else "") + " ".join(rng.sample(words, rng.randint(1, 3))) +
+                  f" {number}" for number in range(names)]
+    weights = [1 / (rank + 1) for rank in range(names)]
+    return rng.choices(vocabulary, weights=weights, k=lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lines", type=int, default=1_000_000)
+    arg_parser.add_argument("--names", type=int, default=3000)
+    args = arg_parser.parse_args()
+
+    raw_names = archive_names(args.lines, args.names)
+    print(f"{len(raw_names):,} item lines, {len(set(raw_names)):,} distinct raw names")
+
+    cleanup_name.cache_clear()
+    for label, cleanup in [("previous", legacy_cleanup_name),
+                           ("translate table", cleanup_name.__wrapped__),
+                           ("memoized", cleanup_name)]:
+        start = time.perf_counter()
+        cleaned = [cleanup(raw_name) for raw_name in raw_names]
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {elapsed:6.2f} s   {len(raw_names) / elapsed / 1e6:5.2f} M names/s")
+        assert cleaned == [legacy_cleanup_name(raw_name) for raw_name in raw_names]
+
+    stats = name_cache_stats()
+    print(f"cache: {stats['hits']:,} hits, {stats['misses']:,} misses "
+          f"({stats['hits'] / (stats['hits'] + stats['misses']):.1%}), {stats['size']:,}/{stats['max_size']:,} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+JSON -> CSV conversion of a synthetic archive (default 1M items): time and
+peak Python memory of the previous DictWriter conversion (json.load + one
+dict per row) versus the chunked columnar writer, on .json and .jsonl input.
+
+    python -m benchmarks.bench_convert [--items N]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from scripts.utils.file_handler import iter_receipts
+from scripts.utils.receipt_table import write_items_csv
+from benchmarks.legacy import legacy_write_csv
+
+NAMES = ["Gurken", "Banane", "Moehren", "Oatly Hafer Aufst.", "Ruegen.Mueh.Mett", "Zucchini", "Tomaten"]
+
+
+def write_archive(folder: str, items: int, items_per_receipt: int = 25):
+    """ Writes the same synthetic receipts as parsed_receipts.json and .jsonl """
+    rng = random.Random(1)
+    receipts = []
+    for number in range(items // items_per_receipt):
+        bon_items = [{"name": rng.choice(NAMES), "quantity": rng.randint(1, 3),
+                      "unit_price": rng.randint(19, 999) / 100, "total_price": rng.randint(19, 2999) / 100}
+                     for _ in range(items_per_receipt)]
+        receipts.append({"date": f"{number % 28 + 1:02d}.01.24", "time": "12:00", "items": bon_items,
+                         "sum": round(sum(item["total_price"] for item in bon_items), 2),
+                         "file": f"receipt_{number:07d}.pdf"})
+
+    json_file = os.path.join(folder, "parsed_receipts.json")
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(receipts, f)
+    jsonl_file = os.path.join(folder, "parsed_receipts.jsonl")
+    with open(jsonl_file, "w", encoding="utf-8") as f:
+        for receipt in receipts:
+            f.write(json.dumps(receipt) + "\n")
+    return json_file, jsonl_file
+
+
+def legacy_convert(json_file, csv_file):
+    with open(json_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    legacy_write_csv(data, csv_file)
+
+
+def current_convert(json_file, csv_file):
+    write_items_csv(iter_receipts(json_file), csv_file)
+
+
+def measure(convert, json_file, csv_file):
+    start = time.perf_counter()
+    convert(json_file, csv_file)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    convert(json_file, csv_file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--items", type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        json_file, jsonl_file = write_archive(folder, args.items)
+        print(f"{args.items:,} items")
+
+        results = {}
+        for label, convert, source in [("previous, .json", legacy_convert, json_file),
+                                       ("current,  .json", current_convert, json_file),
+                                       ("current,  .jsonl", current_convert, jsonl_file)]:
+            csv_file = os.path.join(folder, f"{len(results)}.csv")
+            elapsed, peak = measure(convert, source, csv_file)
+            results[label] = csv_file
+            print(f"{label:<18} {elapsed:7.2f} s   peak {peak / 2 ** 20:8.1f} MiB")
+
+        outputs = set()
+        for csv_file in results.values():
+            with open(csv_file, "rb") as f:
+                outputs.add(f.read())
+        print("identical CSV output:", len(outputs) == 1)
+
+
+if __name__ == "__main__":
+    main()
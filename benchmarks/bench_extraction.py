@@ -0,0 +1,61 @@
+"""
+Compares the per-PDF latency of the text extraction backends.
+
+    python -m benchmarks.bench_extraction [pdf_folder] [--limit N] [--repeat N]
+
+Without a folder (or if it contains no PDFs) a synthetic receipt is used.
+"""
+import argparse
+import io
+import os
+import statistics
+import time
+
+from scripts.parsers.receipt_parser import EXTRACTION_BACKENDS, extract_lines, parse_lines
+from benchmarks.fixtures import make_receipt_pdf, SAMPLE_RECEIPT_LINES
+
+
+def load_pdfs(folder, limit):
+    if folder and os.path.isdir(folder):
+        names = sorted(name for name in os.listdir(folder) if name.lower().endswith(".pdf"))[:limit]
+        pdfs = []
+        for name in names:
+            with open(os.path.join(folder, name), "rb") as f:
+                pdfs.append((name, f.read()))
+        if pdfs:
+            return pdfs
+    return [("synthetic.pdf", make_receipt_pdf(SAMPLE_RECEIPT_LINES * 3))]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("folder", nargs="?", default="receipts/pdfs")
+    arg_parser.add_argument("--limit", type=int, default=200, help="maximum number of PDFs to load")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="timed runs per PDF and backend")
+    args = arg_parser.parse_args()
+
+    pdfs = load_pdfs(args.folder, args.limit)
+    print(f"{len(pdfs)} PDFs, {args.repeat} runs each")
+
+    reference = {name: parse_lines(extract_lines(io.BytesIO(data), "pdfplumber"), name) for name, data in pdfs}
+
+    baseline = None
+    for backend in EXTRACTION_BACKENDS:
+        timings = []
+        mismatches = 0
+        for name, data in pdfs:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                lines = extract_lines(io.BytesIO(data), backend)
+                timings.append(time.perf_counter() - start)
+            if parse_lines(lines, name) != reference[name]:
+                mismatches += 1
+
+        median_ms = statistics.median(timings) * 1000
+        baseline = baseline or median_ms
+        print(f"{backend:<12} median {median_ms:8.2f} ms/PDF  "
+              f"speed-up x{baseline / median_ms:5.1f}  parse_lines mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
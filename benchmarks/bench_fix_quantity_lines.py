@@ -0,0 +1,52 @@
+"""
+fix_quantity_lines on long receipts (1,000+ item lines) compared with the
+previous list.pop based implementation.
+
+    python -m benchmarks.bench_fix_quantity_lines [--sizes 1000 10000 50000]
+"""
+import argparse
+import copy
+import time
+
+from scripts.parsers.fix_quantity_lines import fix_quantity_lines
+from scripts.parsers.models import Item
+from benchmarks.legacy import legacy_fix_quantity_lines, fix_dicts, legacy_fix_dicts
+
+
+def long_receipt(size: int) -> list:
+    """ Every third line is a "2 x" quantity line that merges with the next item """
+    items = []
+    while len(items) < size:
+        items.append({"name": "2 x", "quantity": 1, "unit_price": 0.59, "total_price": 0.59})
+        items.append({"name": "Pizza", "quantity": 1, "unit_price": 1.18, "total_price": 1.18})
+        items.append({"name": "Banana", "quantity": 1, "unit_price": 1.99, "total_price": 1.99})
+    return items[:size]
+
+
+def best_time(fix, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        work = copy.deepcopy(items)
+        start = time.perf_counter()
+        fix(work)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    for size in args.sizes:
+        items = long_receipt(size)
+        assert fix_dicts(items) == legacy_fix_dicts(items)
+        legacy = best_time(legacy_fix_quantity_lines, items, args.repeat)
+        current = best_time(fix_quantity_lines, [Item.from_dict(item) for item in items], args.repeat)
+        print(f"{size:7d} items  previous {legacy * 1000:9.2f} ms  current {current * 1000:8.2f} ms"
+              f"  (x{legacy / current:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Alias clustering of a large synthetic item vocabulary (default 20,000 distinct
+names, a tenth of them with truncated or re-spelled variants): time of
+build_aliases and the number of compared pairs versus all n² pairs, and the
+recall of the blocking versus comparing every pair of a smaller vocabulary.
+
+    python -m benchmarks.bench_item_aliases [--names N] [--exhaustive N]
+"""
+import argparse
+import random
+import time
+
+from scripts.parsers.item_aliases import build_aliases, candidate_pairs, is_same_item, _match_key
+
+
+def vocabulary(size: int) -> dict:
+    """ name -> purchases; every tenth name also appears truncated or with a different separator """
+    rng = random.Random(1)
+    syllables = [consonant + vowel + end for consonant in "bdfghklmnprstwz" for vowel in "aeiou"
+                 for end in ["", "n", "r", "l", "ch", "st"]]
+    words = list({"".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).title() for _ in range(4000)})
+    names = {}
+    while len(names) < size:
+        parts = [rng.choice(words) for _ in range(rng.randint(2, 3))]
+        name = " ".join(parts)
+        names[name] = rng.randint(1, 50)
+        if len(names) % 10 == 0:
+            variant = name[:-3] + "." if rng.random() < 0.5 else ".".join(parts)
+            names.setdefault(variant, rng.randint(1, 5))
+    return names
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--names", type=int, default=20_000)
+    arg_parser.add_argument("--exhaustive", type=int, default=1000,
+                            help="vocabulary size of the all-pairs recall check (0 = skip)")
+    args = arg_parser.parse_args()
+
+    names = vocabulary(args.names)
+    keys = [_match_key(name) for name in sorted(names)]
+    all_pairs = len(keys) * (len(keys) - 1) // 2
+
+    start = time.perf_counter()
+    pairs = sum(1 for _ in candidate_pairs(keys))
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aliases = build_aliases(names)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(names):,} names, {all_pairs:,} possible pairs")
+    print(f"candidate pairs   {pairs:,} ({pairs / all_pairs:.4%}), blocking {blocking:.2f} s")
+    print(f"build_aliases     {elapsed:.2f} s, {len(aliases.aliases):,} aliases, "
+          f"{len(names) - len(aliases.aliases):,} canonical names")
+
+    if args.exhaustive:
+        keys = [_match_key(name) for name in sorted(vocabulary(args.exhaustive))]
+        start = time.perf_counter()
+        expected = {(i, j) for i in range(len(keys)) for j in range(i) if is_same_item(keys[i], keys[j])}
+        elapsed = time.perf_counter() - start
+        found = {(i, j) for i, j in candidate_pairs(keys) if is_same_item(keys[i], keys[j])}
+        print(f"all pairs of {len(keys):,} names: {elapsed:.2f} s, {len(expected)} matches, "
+              f"blocking recall {len(found & expected) / max(len(expected), 1):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Item lookups for plotting: the rows of every item with at least --min-count
+purchases, found with the previous per-item lowercase comparison of the whole
+item_name column versus one ItemIndex built for all lookups.
+
+    python -m benchmarks.bench_item_index [--rows N] [--min-count 18]
+"""
+import argparse
+import time
+
+from benchmarks.bench_analysis_engine import item_table
+from scripts.analysis.item_index import ItemIndex
+
+
+def legacy_lookups(df, items):
+    return [df[df["item_name"].str.lower() == item_name.lower()] for item_name in items]
+
+
+def index_lookups(df, items):
+    index = ItemIndex(df)
+    return [index.rows(item_name, ignore_case=True) for item_name in items]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--min-count", type=int, default=18)
+    args = arg_parser.parse_args()
+
+    df = item_table(args.rows)
+    counts = df["item_name"].value_counts()
+    items = list(counts[counts >= args.min_count].index)
+    print(f"{len(df):,} rows, {len(items):,} items with >= {args.min_count} purchases")
+
+    for label, lookups in [("previous", legacy_lookups), ("item index", index_lookups)]:
+        start = time.perf_counter()
+        lookups(df, items)
+        print(f"{label:<11} {time.perf_counter() - start:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
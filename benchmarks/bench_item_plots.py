@@ -0,0 +1,50 @@
+"""
+Per-item price charts: the previous plot_item_price_over_time loop (a new
+figure, date parsing and tight_layout per item) versus the batch renderer,
+in-process and on a process pool. Charts are written to a temporary folder.
+
+    python -m benchmarks.bench_item_plots [--items 50] [--workers 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_analysis_engine import item_table
+
+# item_visualization imports its siblings by module name, like run_visualization does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts", "analysis"))
+from item_visualization import plot_item_price_over_time, plot_items_price_over_time  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--items", type=int, default=50)
+    arg_parser.add_argument("--workers", type=int, default=0, help="pool size of the batch run (0 = all cores)")
+    args = arg_parser.parse_args()
+
+    df = item_table(args.rows)
+    items = list(df["item_name"].value_counts().index[:args.items])
+    print(f"{len(items)} charts, {os.cpu_count()} CPU cores")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)  # the previous function always writes to output/autogenerated/visualizations
+        try:
+            runs = [("previous", lambda: [plot_item_price_over_time(df, item_name) for item_name in items]),
+                    ("batch, 1 process", lambda: plot_items_price_over_time(df, items, workers=1)),
+                    (f"batch, workers={args.workers}", lambda: plot_items_price_over_time(df, items,
+                                                                                          workers=args.workers))]
+            for label, run in runs:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                print(f"{label:<18} {elapsed:7.2f} s   {elapsed / len(items) * 1000:6.0f} ms/chart")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
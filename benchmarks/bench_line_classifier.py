@@ -0,0 +1,166 @@
+"""
+Lines per second of receipt_parser.parse_lines on a large synthetic line corpus,
+compared with the previous implementation (patterns compiled inside the
+per-line helpers, kilo lines matched twice).
+
+    python -m benchmarks.bench_line_classifier [--receipts N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+from scripts.parsers.exclude_rules import default_exclude_rules
+from scripts.parsers.receipt_parser import parse_lines
+from scripts.parsers.text_cleaner import cleanup_name
+from benchmarks.legacy import legacy_fix_quantity_lines
+
+NAMES = ["GURKEN", "Banane", "MÖHREN", "Oatly Hafer Aufst.", "Ruegen.Mueh.Mett", "G&G Halbf.Margari.",
+         "Harry Vital U.Fit", "Zucchini", "Tomaten", "Pizza Margherita", "Pfand", "Coupon 10%"]
+
+
+def synthetic_receipt(rng: random.Random) -> list:
+    lines = ["EDEKA Markt Musterstadt", "Musterstr. 1", f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.24 "
+             f"{rng.randint(7, 21):02d}:{rng.randint(0, 59):02d}", "EUR"]
+    for _ in range(rng.randint(5, 40)):
+        name = rng.choice(NAMES)
+        price = rng.randint(19, 999)
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(f"{name} {price // 100},{price % 100:02d} B")
+        elif kind < 0.75:
+            qty = rng.randint(2, 6)
+            total = qty * price
+            lines.append(f"{name} {price // 100},{price % 100:02d} € x {qty} {total // 100},{total % 100:02d} B")
+        elif kind < 0.9:
+            grams = rng.randint(100, 2000)
+            total = round(grams * price / 1000)
+            lines.append(f"{name} {total // 100},{total % 100:02d} B")
+            lines.append(f"{grams // 1000},{grams % 1000:03d} kg x {price // 100},{price % 100:02d} /kg")
+        else:
+            qty = rng.randint(2, 6)
+            total = qty * price
+            lines.append(f"{qty} x {price // 100},{price % 100:02d}")
+            lines.append(f"{name} {total // 100},{total % 100:02d} B")
+    lines += [f"Posten: {len(lines) - 4}", "SUMME € 12,34", "Geg. Mastercard € 12,34", "Vielen Dank für Ihren Einkauf"]
+    return lines
+
+
+# --- previous implementation, kept for comparison --------------------------
+
+def legacy_is_kilo_line(line):
+    pattern = re.compile(r"^[\d,]+\s*kg\s*x\s*[\d,]+\s*/kg", re.IGNORECASE)
+    return bool(pattern.search(line))
+
+
+def legacy_parse_kilo_line(line, items):
+    if not items:
+        return
+    pattern = re.compile(r"^([\d,]+)\s*kg\s*x\s*([\d,]+)\s*/kg", re.IGNORECASE)
+    match = pattern.search(line)
+    if match:
+        weight = float(match.group(1).replace(",", "."))
+        kg_price = float(match.group(2).replace(",", "."))
+        last_item = items[-1]
+        last_item["quantity"] = weight
+        last_item["unit_price"] = kg_price
+        last_item["total_price"] = round(weight * kg_price, 2)
+
+
+def legacy_parse_item_line(line):
+    line = re.sub(r"\s+", " ", line.strip())
+    m_total = re.compile(r"([\d,]+)\s*(?:[A-Z]+|\*?[A-Z]+)?$").search(line)
+    if not m_total:
+        return {}
+    total_val = float(m_total.group(1).replace(",", "."))
+    line_clean = line[:m_total.start()].strip()
+    match_qty = re.compile(r"(.*?)([\d,]+)\s*(?:EUR|€)?\s*x\s*(\d+)(.*)", re.IGNORECASE).search(line_clean)
+    item = {"name": cleanup_name(line_clean), "quantity": 1, "unit_price": total_val, "total_price": total_val}
+    if match_qty:
+        pre_text, price_str, qty_str, post_text = match_qty.groups()
+        try:
+            unit_price_val = float(price_str.replace(",", "."))
+            quantity_val = int(qty_str)
+        except ValueError:
+            pass
+        else:
+            item["quantity"] = quantity_val
+            item["unit_price"] = unit_price_val
+            item["name"] = cleanup_name(pre_text + " " + post_text)
+            computed = round(unit_price_val * quantity_val, 2)
+            if quantity_val == 0:
+                item["quantity"] = 1
+                item["unit_price"] = total_val
+            elif abs(computed - round(total_val, 2)) > 0.01:
+                item["unit_price"] = round(total_val / quantity_val, 2)
+    else:
+        item["name"] = cleanup_name(item["name"])
+    return item
+
+
+def legacy_parse_lines(lines, pdf_path):
+    result = {"date": None, "time": None, "items": [], "sum": None, "file": os.path.basename(pdf_path)}
+    collecting_items = False
+    date_time_pattern = re.compile(r"(\d{2}\.\d{2}\.\d{2})\s+(\d{2}:\d{2})")
+    for line in lines:
+        dt_match = date_time_pattern.search(line)
+        if dt_match:
+            result["date"], result["time"] = dt_match.groups()
+        if line.startswith("EUR"):
+            collecting_items = True
+            continue
+        if "Posten" in line:
+            collecting_items = False
+            continue
+        if collecting_items:
+            if legacy_is_kilo_line(line):
+                legacy_parse_kilo_line(line, result["items"])
+            else:
+                item = legacy_parse_item_line(line)
+                if item:
+                    result["items"].append(item)
+    legacy_fix_quantity_lines(result["items"])
+    rules = default_exclude_rules()
+    result["items"] = [item for item in result["items"] if rules.match(item["name"]) is None]
+    result["sum"] = round(sum(item["total_price"] for item in result["items"]), 2)
+    return result
+
+
+# ---------------------------------------------------------------------------
+
+def lines_per_second(parse, corpus, repeat):
+    total_lines = sum(len(lines) for lines in corpus)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for lines in corpus:
+            parse(lines, "synthetic.pdf")
+        best = min(best, time.perf_counter() - start)
+    return total_lines / best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--receipts", type=int, default=5000, help="number of synthetic receipts")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="timed runs, the best one is reported")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [synthetic_receipt(rng) for _ in range(args.receipts)]
+    print(f"{args.receipts} receipts, {sum(len(lines) for lines in corpus)} lines")
+
+    # Only weighed items costing exactly half a cent more differ: integer cents round
+    # 7.275 up to 7.28, the float implementation gave 7.27
+    differing = sum(parse_lines(lines, "synthetic.pdf").to_dict() != legacy_parse_lines(lines, "synthetic.pdf")
+                    for lines in corpus)
+    print(f"{differing} receipts differ from the previous implementation (half-cent rounding)")
+
+    legacy = lines_per_second(legacy_parse_lines, corpus, args.repeat)
+    current = lines_per_second(parse_lines, corpus, args.repeat)
+    print(f"previous  {legacy:12,.0f} lines/s")
+    print(f"current   {current:12,.0f} lines/s  (x{current / legacy:.2f})")
+
+
+if __name__ == "__main__":
+    main()
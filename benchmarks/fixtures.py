@@ -0,0 +1,50 @@
+"""
+Synthetic receipt PDFs for the benchmarks and the tests.
+"""
+
+SAMPLE_RECEIPT_LINES = [
+    "EDEKA Markt",
+    "10.02.24 14:35",
+    "EUR",
+    "Banana 1,99 € x 2 3,98 B",
+    "MÖHREN 0,99 B",
+    "Tomaten 0,00 B",
+    "0,480 kg x 2,99 /kg 1,44 B",
+    "2 x 1,19",
+    "Pizza 2,38 B",
+    "Pfand 0,25 B",
+    "Posten: 5",
+    "SUMME € 8,79",
+]
+
+
+def make_receipt_pdf(lines) -> bytes:
+    """ Builds a minimal single-page PDF that renders one text line per entry """
+    content = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+    for line in lines:
+        text = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        content.append(f"({text}) Tj T*")
+    content.append("ET")
+    stream = "\n".join(content).encode("cp1252")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
@@ -0,0 +1,59 @@
+"""
+Previous implementations the benchmarks (and the equivalence tests) compare against.
+"""
+import copy
+import csv
+import re
+
+from scripts.parsers.fix_quantity_lines import fix_quantity_lines
+from scripts.parsers.models import Item
+from scripts.utils.receipt_table import COLUMNS
+
+
+def legacy_fix_quantity_lines(items: list) -> list:
+    """ The previous in-place implementation (list.pop per merge) on item dicts """
+    i = 0
+    while i < len(items):
+        match_q = re.match(r"^(\d+)\s*x$", items[i]["name"], re.IGNORECASE)
+        if match_q:
+            qty_val = int(match_q.group(1))
+            if i + 1 < len(items):
+                next_item = items[i + 1]
+                expected_total = round(qty_val * items[i]["unit_price"], 2)
+                actual_next_total = round(next_item["total_price"], 2)
+                if abs(expected_total - actual_next_total) < 0.001:
+                    next_item["quantity"] = qty_val
+                    next_item["unit_price"] = items[i]["unit_price"]
+                    items.pop(i)
+                    continue
+        i += 1
+    return items
+
+
+def fix_dicts(items: list) -> list:
+    """ Converts item dicts (the legacy implementation's input) to Items and runs fix_quantity_lines on them """
+    return fix_quantity_lines([Item.from_dict(item) for item in items])
+
+
+def legacy_fix_dicts(items: list) -> list:
+    """ The legacy result as Items; from_dict rounds its float artefacts (1.7699999) to cents """
+    return [Item.from_dict(item) for item in legacy_fix_quantity_lines(copy.deepcopy(items))]
+
+
+def legacy_write_csv(receipts, csv_file):
+    """ The previous DictWriter based JSON -> CSV conversion """
+    with open(csv_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for bon in receipts:
+            for item in bon.get("items", []):
+                writer.writerow({
+                    "file": bon.get("file", ""),
+                    "date": bon.get("date", ""),
+                    "time": bon.get("time", ""),
+                    "item_name": item.get("name", ""),
+                    "quantity": item.get("quantity", 1),
+                    "unit_price": item.get("unit_price", 0.0),
+                    "total_price": item.get("total_price", 0.0),
+                    "bon_sum": bon.get("sum", 0.0)
+                })
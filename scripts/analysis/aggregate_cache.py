@@ -0,0 +1,126 @@
+import os
+import numpy as np
+import pandas as pd
+
+from analysis_engine import aggregate, RECEIPT_COLUMNS, RECEIPT_ITEM_COLUMNS, ITEM_COLUMNS
+
+CACHE_FOLDER = os.path.join("output", "autogenerated", "analysis", "aggregates")
+
+# receipts.csv also stores a fingerprint of every receipt's rows, to find re-parsed receipts
+CACHED_RECEIPT_COLUMNS = RECEIPT_COLUMNS + ["fingerprint"]
+
+
+def _concat(frames, columns):
+    """ Concatenates the non-empty frames and restores the integer amount columns """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(frames, ignore_index=True).reindex(columns=columns)
+    return result.astype({"spend_cents": "int64", "quantity_milli": "int64"})
+
+
+def _read_table(cache_folder, name, columns):
+    path = os.path.join(cache_folder, name)
+    if not os.path.isfile(path):
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(path, dtype={"file": str, "date": str, "time": str, "item_name": str, "fingerprint": str})
+
+
+def _write_table(df, cache_folder, name):
+    df.to_csv(os.path.join(cache_folder, name), index=False)
+
+
+def receipt_fingerprints(df) -> dict:
+    """
+    A hash of the item rows (date, time, name, amounts, sum) of every receipt,
+    file -> 16 hex digits. Any change of a re-parsed receipt changes it,
+    also when the total stays the same (e.g. renamed items).
+    """
+    rows = pd.DataFrame({
+        "date": df["date"], "time": df["time"], "item_name": df["item_name"],
+        "spend": np.rint(df["total_price"].to_numpy(dtype=np.float64) * 100).astype(np.int64),
+        "quantity": np.rint(df["quantity"].to_numpy(dtype=np.float64) * 1000).astype(np.int64),
+        "bon_sum": np.rint(df["bon_sum"].to_numpy(dtype=np.float64) * 100).astype(np.int64),
+    })
+    hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+    file_codes, files = pd.factorize(df["file"])
+    # the (wrapping) sum of the row hashes does not depend on the row order
+    sums = np.zeros(len(files), dtype=np.uint64)
+    named = file_codes >= 0
+    np.add.at(sums, file_codes[named], hashes[named])
+    return {file: f"{fingerprint:016x}" for file, fingerprint in zip(files, sums.tolist())}
+
+
+def update_aggregates(df, cache_folder=CACHE_FOLDER, rebuild=False) -> dict:
+    """
+    Brings the materialized aggregate tables up to date with df and returns
+    {"receipts": one row per receipt, "items": one row per item name}.
+
+    Receipts are keyed by file: only the rows of files that are new, or whose
+    rows changed (re-parsed, see receipt_fingerprints), are grouped; aggregates of files that are no
+    longer in df are removed. Item totals are updated by adding/subtracting
+    the per-receipt contributions instead of regrouping the whole history.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    if rebuild:
+        receipts = pd.DataFrame(columns=CACHED_RECEIPT_COLUMNS)
+        items = pd.DataFrame(columns=ITEM_COLUMNS)
+    else:
+        receipts = _read_table(cache_folder, "receipts.csv", CACHED_RECEIPT_COLUMNS)
+        items = _read_table(cache_folder, "items.csv", ITEM_COLUMNS)
+
+    # One vectorized hashing pass: the fingerprint of every current receipt
+    # (a cache written without fingerprints counts as changed)
+    fingerprints = receipt_fingerprints(df)
+    cached = dict(zip(receipts["file"], receipts["fingerprint"])) if "fingerprint" in receipts else {}
+    unchanged = {file for file, fingerprint in fingerprints.items() if cached.get(file) == fingerprint}
+
+    stale = set(receipts["file"]) - unchanged
+    if not stale and len(unchanged) == len(fingerprints):
+        return {"receipts": receipts, "items": items}
+
+    receipt_items = _read_table(cache_folder, "receipt_items.csv", RECEIPT_ITEM_COLUMNS) \
+        if not rebuild else pd.DataFrame(columns=RECEIPT_ITEM_COLUMNS)
+    return _merge(receipts, items, receipt_items, df[~df["file"].isin(unchanged)], stale, cache_folder)
+
+
+def add_to_aggregates(df, cache_folder=CACHE_FOLDER) -> dict:
+    """
+    Adds the receipts in df to the materialized aggregate tables and returns them
+    like update_aggregates. df only holds the rows of new or re-parsed receipts
+    (complete receipts), e.g. the ones just parsed by watch_receipts.py; the
+    aggregates of every other receipt are kept as they are.
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    receipts = _read_table(cache_folder, "receipts.csv", CACHED_RECEIPT_COLUMNS)
+    items = _read_table(cache_folder, "items.csv", ITEM_COLUMNS)
+    receipt_items = _read_table(cache_folder, "receipt_items.csv", RECEIPT_ITEM_COLUMNS)
+    stale = set(receipts["file"]) & set(df["file"])
+    return _merge(receipts, items, receipt_items, df, stale, cache_folder)
+
+
+def _merge(receipts, items, receipt_items, df, stale, cache_folder) -> dict:
+    """
+    Replaces the aggregates of the stale files by those of the receipts in df
+    and writes the tables. Item totals are updated by adding/subtracting the
+    per-receipt contributions instead of regrouping the whole history.
+    """
+    new_rows = aggregate(df, with_receipt_items=True)
+    new_receipts, new_receipt_items = new_rows["receipts"], new_rows["receipt_items"]
+    new_receipts["fingerprint"] = new_receipts["file"].map(receipt_fingerprints(df))
+
+    removed = receipt_items[receipt_items["file"].isin(stale)]
+    removed = removed.assign(spend_cents=-removed["spend_cents"], quantity_milli=-removed["quantity_milli"])
+
+    items = _concat([items, removed, new_receipt_items], ITEM_COLUMNS)
+    items = items.astype({"item_name": str}).groupby("item_name", sort=True).sum().reset_index()
+    items = items[(items["spend_cents"] != 0) | (items["quantity_milli"] != 0)].reset_index(drop=True)
+
+    receipts = _concat([receipts[~receipts["file"].isin(stale)], new_receipts], CACHED_RECEIPT_COLUMNS)
+    receipt_items = _concat([receipt_items[~receipt_items["file"].isin(stale)], new_receipt_items],
+                            RECEIPT_ITEM_COLUMNS)
+
+    _write_table(receipts, cache_folder, "receipts.csv")
+    _write_table(receipt_items, cache_folder, "receipt_items.csv")
+    _write_table(items, cache_folder, "items.csv")
+    return {"receipts": receipts, "items": items}
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# Amounts are summed as integers (cents, 1/1000 quantity units): exact, and
+# the same numbers whether aggregated at once or receipt by receipt.
+RECEIPT_COLUMNS = ["file", "date", "time", "bon_sum", "spend_cents", "quantity_milli"]
+RECEIPT_ITEM_COLUMNS = ["file", "item_name", "spend_cents", "quantity_milli"]
+ITEM_COLUMNS = ["item_name", "spend_cents", "quantity_milli"]
+
+
+def _first_positions(codes):
+    """ Row position of the first occurrence of each code (pd.factorize numbers codes in that order) """
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.int64)
+    is_new = np.empty(len(codes), dtype=bool)
+    is_new[0] = True
+    is_new[1:] = codes[1:] > np.maximum.accumulate(codes)[:-1]
+    return np.flatnonzero(is_new)
+
+
+def _sum_by(codes, values, size):
+    """ Exact integer sums of values per code """
+    return np.bincount(codes, weights=values, minlength=size).round().astype(np.int64)
+
+
+def aggregate(df, with_receipt_items=False) -> dict:
+    """
+    Computes all receipt and item aggregates in one pass over the item rows:
+    'file' and 'item_name' are factorized once into integer codes, then every
+    total is a bincount over those codes instead of a separate groupby.
+
+    Returns {"receipts": one row per receipt, "items": one row per item name}
+    and, with with_receipt_items, "receipt_items": one row per (receipt, item).
+    """
+    spend = np.rint(df["total_price"].to_numpy(dtype=np.float64) * 100)
+    quantity = np.rint(df["quantity"].to_numpy(dtype=np.float64) * 1000)
+
+    file_codes, files = pd.factorize(df["file"])
+    item_codes, item_names = pd.factorize(df["item_name"], sort=True)
+    item_names = np.asarray(item_names, dtype=object)
+
+    # only the first row of every receipt is materialized, not the whole column
+    first = df.iloc[_first_positions(file_codes)]
+    receipts = pd.DataFrame({
+        "file": first["file"].to_numpy(dtype=object),
+        "date": first["date"].to_numpy(),
+        "time": first["time"].to_numpy(),
+        "bon_sum": first["bon_sum"].to_numpy(),
+        "spend_cents": _sum_by(file_codes, spend, len(files)),
+        "quantity_milli": _sum_by(file_codes, quantity, len(files)),
+    })
+
+    # rows without an item name (code -1) are left out of the item totals, as groupby does
+    named = item_codes >= 0
+    item_codes, item_spend, item_quantity = item_codes[named], spend[named], quantity[named]
+    items = pd.DataFrame({
+        "item_name": item_names,
+        "spend_cents": _sum_by(item_codes, item_spend, len(item_names)),
+        "quantity_milli": _sum_by(item_codes, item_quantity, len(item_names)),
+    })
+
+    result = {"receipts": receipts, "items": items}
+
+    if with_receipt_items:
+        # one integer key per (receipt, item) pair instead of hashing both strings again
+        stride = max(len(item_names), 1)
+        pair_codes, pairs = pd.factorize(file_codes[named].astype(np.int64) * stride + item_codes)
+        result["receipt_items"] = pd.DataFrame({
+            "file": np.asarray(files, dtype=object)[pairs // stride],
+            "item_name": item_names[pairs % stride],
+            "spend_cents": _sum_by(pair_codes, item_spend, len(pairs)),
+            "quantity_milli": _sum_by(pair_codes, item_quantity, len(pairs)),
+        })
+
+    return result
+
+
+def receipt_tables(aggregates: dict):
+    """ Daily spending, daily items and spending per receipt, in the format of receipt_analysis """
+    receipts = aggregates["receipts"]
+
+    # sorted codes of the (small) receipt table; missing date/time (code -1) is skipped like groupby does
+    date_codes, dates = pd.factorize(receipts["date"], sort=True)
+    time_codes, _ = pd.factorize(receipts["time"], sort=True)
+    file_codes, _ = pd.factorize(receipts["file"], sort=True)
+    valid = (date_codes >= 0) & (time_codes >= 0)
+    order = np.lexsort((file_codes, time_codes, date_codes))
+    order = order[valid[order]]
+
+    spend_per_bon = pd.DataFrame({
+        "date": receipts["date"].to_numpy()[order],
+        "time": receipts["time"].to_numpy()[order],
+        "file": receipts["file"].to_numpy()[order],
+        "spend_this_bon": receipts["spend_cents"].to_numpy()[order] / 100,
+    })
+
+    dated = date_codes >= 0
+    date_codes = date_codes[dated]
+    daily_spend = pd.DataFrame({
+        "date": np.asarray(dates),
+        "spent_per_day": _sum_by(date_codes, receipts["spend_cents"].to_numpy()[dated], len(dates)) / 100,
+    })
+    daily_items = pd.DataFrame({
+        "date": np.asarray(dates),
+        "total_items": _sum_by(date_codes, receipts["quantity_milli"].to_numpy()[dated], len(dates)) / 1000,
+    })
+    return daily_spend, daily_items, spend_per_bon
+
+
+def item_tables(aggregates: dict):
+    """ Item stats and the top 10 most bought / highest spend items, in the format of overall_analysis """
+    items = aggregates["items"]
+    item_stats = pd.DataFrame({
+        "item_name": items["item_name"].to_numpy(),
+        "total_quantity": items["quantity_milli"].to_numpy() / 1000,
+        "total_spend": items["spend_cents"].to_numpy() / 100,
+    })
+
+    most_bought = item_stats.sort_values(by="total_quantity", ascending=False).head(10)
+    highest_spend = item_stats.sort_values(by="total_spend", ascending=False).head(10)
+    item_stats["avg_unit_price"] = item_stats["total_spend"] / item_stats["total_quantity"]
+    return item_stats, most_bought, highest_spend
@@ -1,3 +1,7 @@
-def single_item_over_time(df, item_name):
-    item_data = df[df["item_name"] == item_name]
+from item_index import item_rows
+
+
+def single_item_over_time(df, item_name, index=None):
+    # pass a prebuilt ItemIndex when looking up several items of the same df
+    item_data = item_rows(df, item_name, index=index)
     return item_data
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+class ItemIndex:
+    """
+    Maps every item_name of a DataFrame to its row positions. Built once with a
+    single factorize + stable sort, so looking up an item costs O(its rows)
+    instead of a full scan (or a full lowercase copy) of the item_name column.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        codes, names = pd.factorize(df["item_name"])
+        self.names = list(names)
+
+        # row positions grouped by item code, in row order within every item;
+        # rows without a name (code -1) sort first and are dropped
+        order = np.argsort(codes, kind="stable")
+        self._positions = order[np.count_nonzero(codes < 0):]
+        self._counts = np.bincount(codes[codes >= 0], minlength=len(self.names))
+        self._starts = np.concatenate(([0], np.cumsum(self._counts)[:-1])).astype(np.int64)
+
+        # case-normalized once, over the unique names only
+        self._codes = {name: code for code, name in enumerate(self.names)}
+        self._lower_codes = {}
+        for code, name in enumerate(self.names):
+            self._lower_codes.setdefault(name.lower(), []).append(code)
+
+    def _lookup(self, item_name, ignore_case):
+        if ignore_case:
+            return self._lower_codes.get(item_name.lower(), [])
+        code = self._codes.get(item_name)
+        return [] if code is None else [code]
+
+    def positions(self, item_name, ignore_case=False) -> np.ndarray:
+        """ Row positions of item_name in ascending order """
+        slices = [self._positions[self._starts[code]:self._starts[code] + self._counts[code]]
+                  for code in self._lookup(item_name, ignore_case)]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        if len(slices) == 1:
+            return slices[0]
+        return np.sort(np.concatenate(slices))
+
+    def rows(self, item_name, ignore_case=False):
+        """ The rows of item_name, same as df[df["item_name"] == item_name] """
+        return self.df.iloc[self.positions(item_name, ignore_case)]
+
+    def counts(self):
+        """ Number of rows per item name, most frequent first (like value_counts) """
+        return pd.Series(self._counts, index=pd.Index(self.names, name="item_name"),
+                         name="count").sort_values(ascending=False, kind="stable")
+
+
+def item_rows(df, item_name, ignore_case=False, index=None):
+    """
+    The rows of one item: looked up in index (an ItemIndex of df) when given,
+    otherwise with a direct scan. Building an index only pays off for many lookups.
+    """
+    if index is not None:
+        return index.rows(item_name, ignore_case)
+    if ignore_case:
+        return df[df["item_name"].str.lower() == item_name.lower()]
+    return df[df["item_name"] == item_name]
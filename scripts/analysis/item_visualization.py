@@ -1,6 +1,9 @@
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-import pandas as pd
+import numpy as np
 import matplotlib
 
 matplotlib.use("Agg")  # Use a non-interactive backend
@@ -8,43 +11,60 @@ import matplotlib.pyplot as plt
 # plt.style.use("seaborn-v0_8")
 import matplotlib.dates as mdates
 
+from item_index import ItemIndex, item_rows
+from load_data import add_timestamp
+from rollups import item_prices
 
-def plot_item_price_over_time(df, item_name):
+VISUALIZATION_FOLDER = os.path.join("output", "autogenerated", "visualizations")
+# path separators and characters Windows does not allow in file names
+UNSAFE_FILE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def price_plot_file_name(item_name):
+    """ '<item_name>_price_over_time.png', with characters that are not allowed in a file name replaced by '_' """
+    return f"{UNSAFE_FILE_NAME_CHARS.sub('_', item_name)}_price_over_time.png"
+
+
+def _with_timestamp(df):
+    """ df itself when it has the 'timestamp' column of load_receipts_data, otherwise a copy with it added """
+    return df if "timestamp" in df else add_timestamp(df.copy())
+
+
+def plot_item_price_over_time(df, item_name, index=None, rollups=None):
     """
     Plots the unit_price of a given item_name over time,
     using the 'date' column as x-axis.
+    Pass a prebuilt ItemIndex of df when plotting several items,
+    and the rollup tables (rollups.cached_rollups) to add the monthly average.
     """
 
-    # 1) Filter for item_name, e.g. 'Gurken'
-    df_item = df[df["item_name"].str.lower() == item_name.lower()]
+    # 1) Filter for item_name (case-insensitive), e.g. 'Gurken'
+    df_item = _with_timestamp(item_rows(df, item_name, ignore_case=True, index=index)).copy()
 
-    # 2) Convert 'date' to an actual datetime object.
-    #    If your date format is dd.mm.yy, we use "%d.%m.%y".
-    #    If it's dd.mm.yyyy, use "%d.%m.%Y".
-    #    Adjust errors='coerce' if needed.
-    df_item["parsed_date"] = pd.to_datetime(df_item["date"], format="%d.%m.%y", errors="coerce")
+    # 2) Dates are parsed once: load_receipts_data adds the 'timestamp' column (date + time),
+    #    other frames get it here
 
-    # 3) Sort by date so the plot lines don't jump around
-    df_item = df_item.sort_values(by="parsed_date")
+    # 3) Sort by timestamp so the plot lines don't jump around
+    df_item = df_item.sort_values(by="timestamp")
 
     # 4) Plot unit_price over time
     plt.figure(figsize=(16, 9))
 
     # single points
-    # plt.scatter(df_item["parsed_date"], df_item["unit_price"])
+    # plt.scatter(df_item["timestamp"], df_item["unit_price"])
 
     # line plot
-    # plt.plot(df_item["parsed_date"], df_item["unit_price"], marker='o', linestyle='-')
+    # plt.plot(df_item["timestamp"], df_item["unit_price"], marker='o', linestyle='-')
 
     # rolling average
     df_item["rolling_avg"] = df_item["unit_price"].rolling(window=1).mean()
-    plt.plot(df_item["parsed_date"], df_item["rolling_avg"])
+    plt.plot(df_item["timestamp"], df_item["rolling_avg"])
 
-    # monthly average
-    # df_item["month"] = df_item["parsed_date"].dt.to_period("M")
-    # monthly = df_item.groupby("month")["unit_price"].mean().reset_index()
-    # monthly["month_start"] = monthly["month"].dt.to_timestamp()
-    # plt.plot(monthly["month_start"], monthly["unit_price"], marker='o')
+    # monthly average, read from the precomputed rollup tables
+    if rollups is not None:
+        monthly = item_prices(rollups, item_name, "monthly")
+        plt.plot(monthly["period_start"], monthly["avg_unit_price"], marker='o', label="monthly average")
+        plt.legend()
 
     plt.title(f"{item_name} Price Over Time")
     plt.xlabel("Date")
@@ -66,41 +86,39 @@ def plot_item_price_over_time(df, item_name):
 
     # save the plot
     plt.tight_layout()
-    plt.savefig(f"output/autogenerated/visualizations/{item_name}_price_over_time.png")
+    plt.savefig(os.path.join(output_folder, price_plot_file_name(item_name)))
     plt.close()
 
 
-def plot_multi_items_price_over_time(df, items_list, output_name="combined_plot.png"):
+def plot_multi_items_price_over_time(df, items_list, output_name="combined_plot.png", index=None):
     """
     Plots unit_price (or rolling averages) for multiple items on the same figure.
     Each item gets its own line.
     """
     plt.figure(figsize=(16, 9))
 
+    # one index for all items instead of a lowercase copy of the column per item
+    if index is None:
+        index = ItemIndex(df)
+
     for item_name in items_list:
         # Filter rows for this item
-        df_item = df[df["item_name"].str.lower() == item_name.lower()].copy()
+        df_item = _with_timestamp(index.rows(item_name, ignore_case=True)).copy()
 
         if df_item.empty:
             # If no rows found for item_name, skip
             print(f"No data found for item: {item_name}")
             continue
 
-        # Convert date
-        df_item["parsed_date"] = pd.to_datetime(
-            df_item["date"],
-            format="%d.%m.%y",
-            errors="coerce"
-        ).sort_values()
+        # Sort by the (already parsed) timestamp
+        df_item = df_item.sort_values(by="timestamp")
 
-        # Sort by date
-        df_item = df_item.sort_values(by="parsed_date")
-
-        # Rolling average (optional)
-        df_item["rolling_avg"] = df_item["unit_price"].rolling(window=7).mean()
+        # Rolling average over 7 days (a time window, not the last 7 purchases)
+        df_item = df_item.dropna(subset=["timestamp"])
+        df_item["rolling_avg"] = df_item.rolling("7D", on="timestamp")["unit_price"].mean()
 
         # Plot
-        plt.plot(df_item["parsed_date"], df_item["rolling_avg"], marker='o', linestyle='-', label=item_name)
+        plt.plot(df_item["timestamp"], df_item["rolling_avg"], marker='o', linestyle='-', label=item_name)
 
     # Format x-axis
     ax = plt.gca()
@@ -125,3 +143,99 @@ def plot_multi_items_price_over_time(df, items_list, output_name="combined_plot.
     plt.savefig(save_path)
     plt.close()
     print(f"Combined plot saved to {save_path}")
+
+
+def _price_series(df, items, index, rollups=None):
+    """
+    Yields (item_name, dates, unit_prices, monthly) per item, sorted by date.
+    The timestamp column is converted to plot coordinates once for all items.
+    monthly is (month starts, average unit prices) from the rollup tables, or None.
+    """
+    dates = mdates.date2num(_with_timestamp(df)["timestamp"].to_numpy())
+    unit_prices = df["unit_price"].to_numpy(dtype=float)
+    rollup_index = ItemIndex(rollups["items_monthly"]) if rollups is not None else None
+    for item_name in items:
+        positions = index.positions(item_name, ignore_case=True)
+        # stable, so rows of the same day keep their order; unparseable dates (NaN) go last
+        positions = positions[np.argsort(dates[positions], kind="stable")]
+        monthly = None
+        if rollups is not None:
+            prices = item_prices(rollups, item_name, "monthly", rollup_index)
+            monthly = mdates.date2num(prices["period_start"].to_numpy()), prices["avg_unit_price"].to_numpy()
+        yield item_name, dates[positions], unit_prices[positions], monthly
+
+
+# One figure per process, reused for every chart it renders
+_price_plot = None
+
+
+def _price_plot_template():
+    global _price_plot
+    if _price_plot is None:
+        fig, ax = plt.subplots(figsize=(16, 9))
+        line, = ax.plot([], [], label="unit price")
+        monthly_line, = ax.plot([], [], marker='o', label="monthly average")
+        legend = ax.legend(loc="upper left")
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Unit Price (EUR)")
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
+        ax.tick_params(axis="x", labelrotation=45)
+        # fixed margins instead of a tight_layout pass (an extra full draw) per chart
+        fig.subplots_adjust(left=0.06, right=0.98, bottom=0.12, top=0.95)
+        _price_plot = fig, ax, line, monthly_line, legend
+    return _price_plot
+
+
+def _render_price_plots(series, output_folder):
+    """ Renders one chart per entry of _price_series by swapping the data of the template """
+    fig, ax, line, monthly_line, legend = _price_plot_template()
+    paths = []
+    for item_name, dates, unit_prices, monthly in series:
+        line.set_data(dates, unit_prices)
+        monthly_line.set_data(*(monthly if monthly is not None else ([], [])))
+        legend.set_visible(monthly is not None)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(f"{item_name} Price Over Time")
+        path = os.path.join(output_folder, price_plot_file_name(item_name))
+        # zlib level 1: several times faster to encode, slightly larger files
+        fig.savefig(path, pil_kwargs={"compress_level": 1})
+        paths.append(path)
+    return paths
+
+
+def plot_items_price_over_time(df, items=None, min_count=1, workers=1, index=None, rollups=None,
+                               output_folder=VISUALIZATION_FOLDER):
+    """
+    Batch version of plot_item_price_over_time: one chart per item, written to
+    output_folder as '<item_name>_price_over_time.png' (see price_plot_file_name). Returns the written paths.
+    With the rollup tables (rollups.cached_rollups), the monthly average is drawn as well.
+
+    items defaults to every item with at least min_count purchases.
+    workers=1 renders in-process, workers>1 spreads the charts across a
+    process pool and workers=0 uses one process per CPU core.
+    """
+    if index is None:
+        index = ItemIndex(df)
+    if items is None:
+        counts = index.counts()
+        items = counts[counts >= min_count].index
+    # lookups are case-insensitive, so 'Gurken' and 'GURKEN' are one chart
+    unique_items = {}
+    for item_name in items:
+        unique_items.setdefault(item_name.lower(), item_name)
+
+    series = list(_price_series(df, unique_items.values(), index, rollups))
+    os.makedirs(output_folder, exist_ok=True)
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(series) <= 1:
+        return _render_price_plots(series, output_folder)
+
+    # Round-robin chunks: a few per worker, each rendered on the worker's figure template
+    chunks = [series[start::workers * 4] for start in range(min(workers * 4, len(series)))]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rendered = list(executor.map(partial(_render_price_plots, output_folder=output_folder), chunks))
+    return [path for paths in rendered for path in paths]
@@ -1,13 +1,146 @@
 import os
+import string
+import sqlite3
+from contextlib import closing
+
 import pandas as pd
 
+TIMESTAMP_FORMAT = "%d.%m.%y %H:%M"
+# written by read_receipt.py (utils/receipt_store.py)
+STORE_FILE = os.path.join("output", "autogenerated", "parsed_receipts.sqlite")
+# written by convert_receipt.py (the Parquet file also by load_receipts_data(cache_parquet=True))
+CSV_FILE = os.path.join("output", "autogenerated", "parsed_receipts.csv")
+PARQUET_FILE = os.path.join("output", "autogenerated", "parsed_receipts.parquet")
+# ignore_case folds A-Z only, like SQLite's NOCASE, so the store and the table filter agree
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def add_timestamp(df):
+    """
+    Adds the typed 'timestamp' column (date + time, parsed once) that the analysis
+    and plots use instead of converting the "dd.mm.yy" strings again.
+    A missing time counts as midnight, an unparseable date gives NaT.
+    """
+    df["timestamp"] = pd.to_datetime(df["date"] + " " + df["time"].fillna("00:00"),
+                                     format=TIMESTAMP_FORMAT, errors="coerce")
+    return df
+
+
+def load_receipts_data(start=None, end=None, item_name=None, ignore_case=False, cache_parquet=False):
+    """
+    Loads one row per item, with a 'timestamp' column. Prefers
+    parsed_receipts.parquet (typed columns, written by 'convert_receipt.py --parquet'
+    or by the previous load) as long as it is not older than parsed_receipts.csv,
+    otherwise reads the CSV. With cache_parquet, the typed table read from the CSV
+    is written as parsed_receipts.parquet for the next load (run_analysis.py and
+    run_visualization.py do that).
+
+    start/end (days, inclusive, e.g. "2024-02-01") and item_name only load the
+    matching rows; ignore_case compares item names with A-Z folded to a-z.
+    Filtered loads query the SQLite store (parsed_receipts.sqlite, kept up to date
+    by read_receipt.py) when it exists, so only the matching receipts are read
+    through its indexes. Unfiltered loads only use the store when there is no
+    CSV/Parquet file or when it is older than the store.
+    """
+    filtered = start is not None or end is not None or item_name is not None
+    if os.path.isfile(STORE_FILE) and (filtered or not _table_is_current(STORE_FILE)):
+        return query_receipts_data(STORE_FILE, start, end, item_name, ignore_case)
+
+    df = _load_table(cache_parquet)
+    if not filtered:
+        return df
+    return filter_receipts_data(df, start, end, item_name, ignore_case)
+
+
+def _table_is_current(db_file):
+    """ Whether the CSV or Parquet file exists and is not older than the SQLite store """
+    mtimes = [os.path.getmtime(path) for path in (CSV_FILE, PARQUET_FILE) if os.path.isfile(path)]
+    return bool(mtimes) and max(mtimes) >= os.path.getmtime(db_file)
+
+
+def data_mtime():
+    """
+    Modification time of the newest file load_receipts_data reads from (CSV, Parquet
+    or SQLite store), 0 without any. Results derived from a load and saved before it are outdated.
+    """
+    return max((os.path.getmtime(path) for path in (CSV_FILE, PARQUET_FILE, STORE_FILE) if os.path.isfile(path)),
+               default=0)
+
+
+def _load_table(cache_parquet=False):
+    csv_file, parquet_file = CSV_FILE, PARQUET_FILE
+
+    if os.path.isfile(parquet_file) and (
+            not os.path.isfile(csv_file) or os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file)):
+        try:
+            df = pd.read_parquet(parquet_file)
+            return df if "timestamp" in df else add_timestamp(df)
+        except ImportError:
+            print("pyarrow is not installed, reading the CSV instead of the Parquet file")
+
+    # date and time stay "dd.mm.yy" / "hh:mm" strings, same types as receipts_to_frame
+    df = pd.read_csv(csv_file, dtype={"file": "string", "date": "string", "time": "string",
+                                      "item_name": "category"})
+    add_timestamp(df)
+
+    if cache_parquet:
+        try:
+            df.to_parquet(parquet_file, index=False, compression="zstd")
+        except ImportError:
+            pass  # no pyarrow: the dates are parsed again on the next load
+
+    return df
+
+
+def query_receipts_data(db_file, start=None, end=None, item_name=None, ignore_case=False):
+    """
+    Loads the item rows matching the filters from the SQLite store, same columns
+    and types as load_receipts_data. The date range uses the index on the receipt
+    day, item_name the (case-insensitive) index on the item name.
+    """
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("r.day >= ?")
+        params.append(pd.Timestamp(start).date().isoformat())
+    if end is not None:
+        conditions.append("r.day <= ?")
+        params.append(pd.Timestamp(end).date().isoformat())
+    if item_name is not None:
+        conditions.append("i.name = ? COLLATE NOCASE")
+        params.append(item_name)
+        if not ignore_case:
+            conditions.append("i.name = ?")
+            params.append(item_name)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    query = ("SELECT i.file, r.date, r.time, i.name AS item_name, i.quantity, i.unit_price, i.total_price, "
+             "r.sum AS bon_sum FROM items AS i JOIN receipts AS r ON r.file = i.file "
+             f"{where} ORDER BY i.file, i.position")
+    with closing(sqlite3.connect(db_file)) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
 
-def load_receipts_data():
-    csv_file = os.path.join("output", "autogenerated", "parsed_receipts.csv")
-    df = pd.read_csv(csv_file)
+    # item names via str, so an empty result has the same category type as a loaded table
+    df = df.astype({"file": "string", "date": "string", "time": "string", "item_name": str,
+                    "quantity": "float64", "unit_price": "float64", "total_price": "float64",
+                    "bon_sum": "float64"}).astype({"item_name": "category"})
+    return add_timestamp(df)
 
-    # Convert date and time to strings
-    df["date"] = df["date"].astype(str)
-    df["time"] = df["time"].astype(str)
 
+def filter_receipts_data(df, start=None, end=None, item_name=None, ignore_case=False):
+    """ The rows of a loaded item table matching the filters of load_receipts_data """
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["timestamp"] >= pd.Timestamp(start).normalize()
+    if end is not None:
+        mask &= df["timestamp"] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    if item_name is not None:
+        names = df["item_name"].astype(str)
+        if ignore_case:
+            mask &= names.str.translate(ASCII_LOWER) == item_name.translate(ASCII_LOWER)
+        else:
+            mask &= names == item_name
+    df = df[mask].reset_index(drop=True)
+    if isinstance(df["item_name"].dtype, pd.CategoricalDtype):
+        # only the names of the selected rows, like a table read with the filters
+        df["item_name"] = df["item_name"].cat.remove_unused_categories()
     return df
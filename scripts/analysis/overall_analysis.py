@@ -1,5 +1,6 @@
 def analyze_overall_purchases(df):
-    item_stats = df.groupby("item_name").agg(
+    # observed=True: item_name is categorical when loaded from Parquet
+    item_stats = df.groupby("item_name", observed=True).agg(
         total_quantity=("quantity", "sum"),
         total_spend=("total_price", "sum")
     ).reset_index()
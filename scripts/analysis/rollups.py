@@ -0,0 +1,109 @@
+import os
+import pandas as pd
+
+from item_index import item_rows
+
+ROLLUP_FOLDER = os.path.join("output", "autogenerated", "analysis", "rollups")
+
+# Calendar buckets of the 'timestamp' column; weeks run Monday to Sunday
+# and every bucket is labelled with its first day.
+PERIODS = {
+    "daily": {"freq": "D"},
+    "weekly": {"freq": "W-MON", "label": "left", "closed": "left"},
+    "monthly": {"freq": "MS"},
+}
+
+
+def spend_rollup(df, period="monthly"):
+    """
+    Spend, number of items and number of receipts per period, resampled over
+    the whole dataset at once. Periods without purchases are included with 0,
+    so averages are per calendar day/week/month, not per shopping day.
+    """
+    # a time Grouper resamples: it yields every bucket between the first and last purchase
+    rollup = df.groupby(pd.Grouper(key="timestamp", **PERIODS[period])).agg(
+        spend=("total_price", "sum"),
+        quantity=("quantity", "sum"),
+        receipts=("file", "nunique")
+    )
+    rollup["spend"] = rollup["spend"].round(2)
+    return rollup.rename_axis("period_start").reset_index()
+
+
+def item_rollup(df, period="monthly"):
+    """
+    Per period and item: spend, quantity, number of purchases and average unit price,
+    in one grouping over all items. Only periods in which the item was bought are listed.
+    """
+    rollup = df.groupby([pd.Grouper(key="timestamp", **PERIODS[period]), "item_name"], observed=True).agg(
+        spend=("total_price", "sum"),
+        quantity=("quantity", "sum"),
+        purchases=("unit_price", "size"),
+        avg_unit_price=("unit_price", "mean")
+    )
+    rollup["spend"] = rollup["spend"].round(2)
+    return rollup.rename_axis(["period_start", "item_name"]).reset_index()
+
+
+def compute_rollups(df, periods=tuple(PERIODS)) -> dict:
+    """ All rollup tables by name, e.g. "spend_monthly" and "items_weekly" """
+    rollups = {}
+    for period in periods:
+        rollups[f"spend_{period}"] = spend_rollup(df, period)
+        rollups[f"items_{period}"] = item_rollup(df, period)
+    return rollups
+
+
+def item_prices(rollups: dict, item_name, period="monthly", index=None):
+    """
+    Average unit price and purchases per period of one item (case-insensitive), read
+    from the precomputed item rollup. Pass an ItemIndex of that table for many lookups.
+    """
+    table = rollups[f"items_{period}"]
+    rows = item_rows(table, item_name, ignore_case=True, index=index)
+
+    # spellings that differ only in case are merged, weighted by their purchases
+    merged = pd.DataFrame({
+        "period_start": rows["period_start"],
+        "price_sum": rows["avg_unit_price"] * rows["purchases"],
+        "purchases": rows["purchases"],
+    }).groupby("period_start", sort=True).sum()
+    return pd.DataFrame({
+        "period_start": merged.index,
+        "avg_unit_price": merged["price_sum"] / merged["purchases"],
+        "purchases": merged["purchases"],
+    }).reset_index(drop=True)
+
+
+def save_rollups(rollups: dict, folder=ROLLUP_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    for name, table in rollups.items():
+        table.to_csv(os.path.join(folder, f"{name}.csv"), index=False)
+
+
+def load_rollups(folder=ROLLUP_FOLDER) -> dict:
+    """ Reads back the tables written by save_rollups """
+    rollups = {}
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.endswith(".csv"):
+            # only empty fields are missing, so items named e.g. "NA" keep their name
+            rollups[file_name[:-len(".csv")]] = pd.read_csv(os.path.join(folder, file_name),
+                                                            parse_dates=["period_start"],
+                                                            dtype={"item_name": str},
+                                                            keep_default_na=False, na_values=[""])
+    return rollups
+
+
+def cached_rollups(df, data_mtime, folder=ROLLUP_FOLDER) -> dict:
+    """
+    The rollup tables saved in folder (by run_analysis.time_level or a previous call),
+    as long as all of them exist and none is older than the data they were computed
+    from (data_mtime, see load_data.data_mtime). Otherwise they are computed from df and saved.
+    """
+    paths = [os.path.join(folder, f"{kind}_{period}.csv") for period in PERIODS for kind in ("spend", "items")]
+    if all(os.path.isfile(path) and os.path.getmtime(path) >= data_mtime for path in paths):
+        return load_rollups(folder)
+
+    rollups = compute_rollups(df)
+    save_rollups(rollups, folder)
+    return rollups
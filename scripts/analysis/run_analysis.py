@@ -1,13 +1,15 @@
-from load_data import load_receipts_data
+from load_data import load_receipts_data, data_mtime
 from basic_statistics import display_basic_statistics
-from receipt_analysis import spending_per_receipt, calculate_daily_spending, calculate_daily_items
-from overall_analysis import analyze_overall_purchases
 from output_results import save_to_csv
 from item_analysis import single_item_over_time
+from item_index import ItemIndex
+from aggregate_cache import update_aggregates
+from analysis_engine import aggregate, receipt_tables, item_tables
+from rollups import cached_rollups
 
 
 def main():
-    df = load_receipts_data()  # returns a pandas DataFrame
+    df = load_receipts_data(cache_parquet=True)  # returns a pandas DataFrame
 
     # display_basic_statistics(df)
 
@@ -15,15 +17,17 @@ def main():
 
     # top_level(df)
 
+    # time_level(df)
+
     item_level(df)
 
 
-def receipt_level(df):
+def receipt_level(df, use_cache=True):
 
     # Daily Spending & Items
-    daily_spend = calculate_daily_spending(df)
-    daily_items = calculate_daily_items(df)
-    spend_per_bon = spending_per_receipt(df)
+    # materialized aggregates (only new receipts are grouped) or one pass over all rows
+    aggregates = update_aggregates(df) if use_cache else aggregate(df)
+    daily_spend, daily_items, spend_per_bon = receipt_tables(aggregates)
 
     print("=== Spending per Day ===")
     print(daily_spend.head(), "\n")
@@ -51,10 +55,11 @@ def receipt_level(df):
     return daily_items, daily_spend, spend_per_bon
 
 
-def top_level(df):
+def top_level(df, use_cache=True):
 
     # Overall Analysis
-    item_stats, most_bought, most_expensive = analyze_overall_purchases(df)
+    aggregates = update_aggregates(df) if use_cache else aggregate(df)
+    item_stats, most_bought, most_expensive = item_tables(aggregates)
 
     print("=== Top 10 Most Purchased Items ===")
     print(most_bought, "\n")
@@ -68,14 +73,36 @@ def top_level(df):
     return item_stats, most_bought, most_expensive
 
 
+def time_level(df):
+
+    # Daily / Weekly / Monthly Rollups, saved (read by reports and plots) and only recomputed for newer data
+    rollups = cached_rollups(df, data_mtime())
+
+    print("=== Spending per Month ===")
+    print(rollups["spend_monthly"].tail(12), "\n")
+
+    # averages include the days/weeks/months without purchases
+    print("=== Average Spending per Calendar Day ===")
+    print(rollups["spend_daily"]["spend"].mean(), "\n")
+
+    print("=== Average Spending per Calendar Week ===")
+    print(rollups["spend_weekly"]["spend"].mean(), "\n")
+
+    print("=== Average Spending per Calendar Month ===")
+    print(rollups["spend_monthly"]["spend"].mean(), "\n")
+
+    return rollups
+
+
 def item_level(df):
 
     # Item Analysis
-    gurken = single_item_over_time(df, "Gurken")
-    veg_mett = single_item_over_time(df, "Ruegen.Mueh.Mett")
-    oatly_aufstrich = single_item_over_time(df, "Oatly Hafer Aufst.")
-    zuccini = single_item_over_time(df, "Zucchini")
-    margarine = single_item_over_time(df, "G&G Halbf.Margari.")
+    index = ItemIndex(df)  # built once, shared by all lookups
+    gurken = single_item_over_time(df, "Gurken", index)
+    veg_mett = single_item_over_time(df, "Ruegen.Mueh.Mett", index)
+    oatly_aufstrich = single_item_over_time(df, "Oatly Hafer Aufst.", index)
+    zuccini = single_item_over_time(df, "Zucchini", index)
+    margarine = single_item_over_time(df, "G&G Halbf.Margari.", index)
 
 
     # prints
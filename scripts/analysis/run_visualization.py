@@ -1,14 +1,38 @@
-from load_data import load_receipts_data
-from item_visualization import plot_item_price_over_time, plot_multi_items_price_over_time
+import argparse
 
+from load_data import load_receipts_data, data_mtime
+from item_visualization import plot_items_price_over_time, plot_multi_items_price_over_time
+from item_index import ItemIndex
+from rollups import cached_rollups
 
-def main():
-    df = load_receipts_data()  # your existing function
 
-    item_level(df)
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Plot receipt data.")
+    arg_parser.add_argument("--all-items", action="store_true",
+                            help="render a price chart for every item with at least --min-count purchases")
+    arg_parser.add_argument("--min-count", type=int, default=18,
+                            help="minimum number of purchases of an item (default: %(default)s)")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="number of parallel rendering processes (0 = one per CPU core)")
+    args = arg_parser.parse_args(argv)
 
+    df = load_receipts_data(cache_parquet=True)  # your existing function
+    index = ItemIndex(df)  # shared by all item lookups
+    # monthly averages read by the plots, from the saved rollup tables unless the data is newer
+    rollups = cached_rollups(df, data_mtime())
 
-def item_level(df):
+    item_level(df, min_count=args.min_count, index=index, rollups=rollups)
+
+    if args.all_items:
+        paths = plot_items_price_over_time(df, min_count=args.min_count, workers=args.workers, index=index,
+                                           rollups=rollups)
+        print(f"{len(paths)} item charts saved")
+
+
+def item_level(df, min_count=18, index=None, rollups=None):
+
+    if index is None:
+        index = ItemIndex(df)
 
     items = [
         "Gurken",
@@ -18,19 +42,18 @@ def item_level(df):
         "Harry Vital U.Fit"
     ]
 
-    # plot_multi_items_price_over_time(df, items, output_name="multi_items_price.png")
+    # plot_multi_items_price_over_time(df, items, output_name="multi_items_price.png", index=index)
 
-    all_items = df["item_name"].unique()
-    # plot_multi_items_price_over_time(df, all_items, output_name="unique_items_price.png")
+    all_items = index.names
+    # plot_multi_items_price_over_time(df, all_items, output_name="unique_items_price.png", index=index)
 
     # all items with more than x entries
-    top_items = df["item_name"].value_counts()
-    top_items = top_items[top_items >= 18].index
-    plot_multi_items_price_over_time(df, top_items, output_name="all_items_price_18.png")
+    top_items = index.counts()
+    top_items = top_items[top_items >= min_count].index
+    plot_multi_items_price_over_time(df, top_items, output_name=f"all_items_price_{min_count}.png", index=index)
 
-    plot_item_price_over_time(df, "Gurken")
-    plot_item_price_over_time(df, "Ruegen.Mueh.Mett")
-    plot_item_price_over_time(df, "Oatly Hafer Aufst.")
+    plot_items_price_over_time(df, ["Gurken", "Ruegen.Mueh.Mett", "Oatly Hafer Aufst."], index=index,
+                               rollups=rollups)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+import argparse
+from collections import Counter
+
+from parsers.item_aliases import ItemAliases, build_aliases, load_item_aliases, save_item_aliases, DEFAULT_ALIASES_FILE
+from utils.file_handler import find_parsed_receipts, iter_receipts
+
+
+def main(argv=None):
+    """
+    Clusters near-duplicate item names of the parsed receipts and adds them to
+    parsers/item_aliases.txt, which read_receipt applies while parsing.
+    Run read_receipt.py afterwards to re-parse the receipts with the new aliases.
+    """
+    arg_parser = argparse.ArgumentParser(description="Build the item alias table from the parsed receipts.")
+    arg_parser.add_argument("--dry-run", action="store_true", help="only print the clusters, don't write the table")
+    args = arg_parser.parse_args(argv)
+
+    name_counts = Counter(item["name"] for receipt in iter_receipts(find_parsed_receipts())
+                          for item in receipt["items"])
+
+    # Names in the output are already canonical; new aliases are added on top of the existing ones
+    existing = load_item_aliases()
+    found = build_aliases(name_counts)
+    aliases = ItemAliases({**existing.aliases, **found.aliases})
+
+    clusters = {}
+    for alias, canonical in found.aliases.items():
+        clusters.setdefault(canonical, []).append(alias)
+    for canonical in sorted(clusters):
+        print(f"{canonical}  <=  {', '.join(sorted(clusters[canonical]))}")
+
+    canonical_names = {found.canonical(name) for name in name_counts}
+    print(f"\n{len(name_counts)} item names -> {len(canonical_names)} after {len(found.aliases)} new aliases")
+
+    if not args.dry_run:
+        save_item_aliases(aliases)
+        print(f"Saved {len(aliases.aliases)} aliases to {DEFAULT_ALIASES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,40 @@
 import os
-import json
-import csv
+import argparse
+
+from utils.file_handler import find_parsed_receipts, iter_receipts
+from utils.receipt_table import receipts_to_frame, save_parquet, write_items_csv
 
 
 def convert_json_to_csv(json_file, csv_file):
     """
-    Converts receipt data from a JSON file into a CSV file,
-    creating one row per item.
+    Converts receipt data from a JSON (or JSON Lines) file into a CSV file,
+    creating one row per item. JSON Lines input is streamed in chunks.
     """
-
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    # CSV column names (adjust if necessary)
-    fieldnames = [
-        "file",
-        "date",
-        "time",
-        "item_name",
-        "quantity",
-        "unit_price",
-        "total_price",
-        "bon_sum"
-    ]
-
-    with open(csv_file, "w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for bon in data:
-            file_name = bon.get("file", "")
-            bon_date = bon.get("date", "")
-            bon_time = bon.get("time", "")
-            bon_sum = bon.get("sum", 0.0)
-            items = bon.get("items", [])
-
-            for item in items:
-                row = {
-                    "file": file_name,
-                    "date": bon_date,
-                    "time": bon_time,
-                    "item_name": item.get("name", ""),
-                    "quantity": item.get("quantity", 1),
-                    "unit_price": item.get("unit_price", 0.0),
-                    "total_price": item.get("total_price", 0.0),
-                    "bon_sum": bon_sum
-                }
-                writer.writerow(row)
+    write_items_csv(iter_receipts(json_file), csv_file)
 
     print(f"Conversion to CSV completed. File: {csv_file}")
 
 
-def main():
+def convert_json_to_parquet(json_file, parquet_file):
+    """
+    Converts receipt data from a JSON (or JSON Lines) file into a typed,
+    compressed Parquet file, one row per item (see utils.receipt_table).
+    """
+    df = receipts_to_frame(iter_receipts(json_file))
+    save_parquet(df, parquet_file)
+
+    print(f"Conversion to Parquet completed. File: {parquet_file}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Convert the parsed receipts into one row per item.")
+    arg_parser.add_argument("--parquet", action="store_true",
+                            help="also write parsed_receipts.parquet (typed columns, needs pyarrow)")
+    args = arg_parser.parse_args(argv)
+
     # We assume the JSON is in the 'output' folder
-    input_json = os.path.join("output", "autogenerated", "parsed_receipts.json")
+    # (parsed_receipts.jsonl or .json, whichever was written last)
+    input_json = find_parsed_receipts()
 
     # Create output folders if they do not exist
     output_folder = os.path.join("output", "autogenerated")
@@ -63,6 +44,9 @@ def main():
 
     convert_json_to_csv(input_json, output_csv)
 
+    if args.parquet:
+        convert_json_to_parquet(input_json, os.path.join(output_folder, "parsed_receipts.parquet"))
+
 
 if __name__ == "__main__":
     main()
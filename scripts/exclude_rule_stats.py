@@ -0,0 +1,42 @@
+import os
+import argparse
+
+from parsers.exclude_rules import default_exclude_rules
+from parsers.receipt_parser import parse_lines, DEFAULT_BACKEND, EXTRACTION_BACKENDS
+from parsers.text_cache import load_lines
+
+
+def main(argv=None):
+    """
+    Re-parses every receipt in the text cache (filled by read_receipt.py)
+    and prints how many items each unwanted item rule removed.
+    Rules with 0 hits never fire and can probably be deleted.
+    """
+    arg_parser = argparse.ArgumentParser(description="Count how often each unwanted item rule fires.")
+    arg_parser.add_argument("--backend", choices=sorted(EXTRACTION_BACKENDS), default=DEFAULT_BACKEND,
+                            help="use the text cached for this extraction engine, the one read_receipt.py "
+                                 "was run with (default: %(default)s)")
+    args = arg_parser.parse_args(argv)
+
+    text_cache_dir = os.path.join("output", "autogenerated", "text_cache")
+    if not os.path.isdir(text_cache_dir):
+        print(f"No text cache in {text_cache_dir} yet, run read_receipt.py first.")
+        return
+    suffix = f"-{args.backend}.json.gz"
+
+    receipts = 0
+    for filename in sorted(os.listdir(text_cache_dir)):
+        if filename.endswith(suffix):
+            lines = load_lines(text_cache_dir, filename[:-len(".json.gz")])
+            if lines is not None:
+                parse_lines(lines, filename)
+                receipts += 1
+
+    print(f"=== Unwanted item rules over {receipts} receipts ===")
+    for rule, hits in default_exclude_rules().report():
+        marker = "  (dead)" if hits == 0 else ""
+        print(f"{hits:8d}  {rule}{marker}")
+
+
+if __name__ == "__main__":
+    main()
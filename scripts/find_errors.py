@@ -1,14 +1,26 @@
-import json
+import os
 
-# Load the JSON data from the file
-with open('output/autogenerated/parsed_receipts.json', 'r') as file:
-    data = json.load(file)
+from utils.file_handler import find_parsed_receipts, iter_receipts
+from utils.receipt_store import STORE_FILE, open_store
 
 # Define the target names to search for
 target_names = ["1 X", "2 X", "3 X", "4 X", "5 X"]
 
-# Iterate through the receipts and search for the target names
-for receipt in data:
-    for item in receipt['items']:
-        if item['name'] in target_names:
-            print(f"Found '{item['name']}' in file: {receipt['file']}")
\ No newline at end of file
+if os.path.isfile(STORE_FILE):
+    # Look the names up through the item name index of the SQLite store. The index is
+    # case-insensitive, so the lookup is COLLATE NOCASE on purpose (a plain IN would scan
+    # every item); other spellings of the names are skipped here
+    store = open_store(STORE_FILE)
+    placeholders = ", ".join("?" * len(target_names))
+    rows = store.execute(f"SELECT name, file FROM items WHERE name COLLATE NOCASE IN ({placeholders}) "
+                         "ORDER BY file, position", target_names)
+    for name, file in rows:
+        if name in target_names:
+            print(f"Found '{name}' in file: {file}")
+    store.close()
+else:
+    # Iterate through the receipts (one at a time) and search for the target names
+    for receipt in iter_receipts(find_parsed_receipts()):
+        for item in receipt['items']:
+            if item['name'] in target_names:
+                print(f"Found '{item['name']}' in file: {receipt['file']}")
@@ -0,0 +1,29 @@
+def parse_fixed(text: str, decimals: int) -> int:
+    """
+    Parses a German decimal number ("1,95", "0,480", "2") into an integer
+    with the given number of implied decimals, e.g. parse_fixed("1,95", 2) == 195.
+    Extra decimals are rounded half up. Raises ValueError for invalid input.
+    """
+    whole, _, fraction = text.partition(",")
+    if not (whole or fraction) or "," in fraction:
+        raise ValueError(f"Invalid amount: {text!r}")
+
+    value = int(whole or "0") * 10 ** decimals + int(fraction[:decimals].ljust(decimals, "0"))
+    if fraction[decimals:decimals + 1] >= "5":
+        value += 1
+    return value
+
+
+def parse_cents(text: str) -> int:
+    """ "1,95" => 195 """
+    return parse_fixed(text, 2)
+
+
+def parse_grams(text: str) -> int:
+    """ Weight in kg, "0,480" => 480 """
+    return parse_fixed(text, 3)
+
+
+def divide_half_up(numerator: int, denominator: int) -> int:
+    """ Integer division of non-negative amounts, rounded half up """
+    return (2 * numerator + denominator) // (2 * denominator)
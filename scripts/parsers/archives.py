@@ -0,0 +1,74 @@
+import os
+import email
+import email.policy
+import mailbox
+import tarfile
+import zipfile
+
+# Receipt bundles read_receipt parses in place, next to the single PDFs
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+EML_SUFFIXES = (".eml",)
+MBOX_SUFFIXES = (".mbox",)
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES + EML_SUFFIXES + MBOX_SUFFIXES
+
+
+def is_receipt_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def list_receipt_archives(input_folder: str) -> list:
+    """ Returns the paths of all zip/tar archives and .eml/mbox exports in input_folder, sorted by filename """
+    filenames = sorted(name for name in os.listdir(input_folder) if is_receipt_archive(name))
+    return [os.path.join(input_folder, name) for name in filenames]
+
+
+def iter_archive_pdfs(archive_path: str):
+    """
+    Yields (filename, data) for every PDF in an archive, read straight from
+    the archive into memory: files of zip/tar archives, PDF attachments of
+    .eml files and mbox exports. filename is the PDF's name without folders.
+    """
+    name = archive_path.lower()
+    if name.endswith(ZIP_SUFFIXES):
+        yield from _zip_pdfs(archive_path)
+    elif name.endswith(TAR_SUFFIXES):
+        yield from _tar_pdfs(archive_path)
+    elif name.endswith(EML_SUFFIXES):
+        with open(archive_path, "rb") as f:
+            yield from message_pdfs(email.message_from_binary_file(f, policy=email.policy.default))
+    elif name.endswith(MBOX_SUFFIXES):
+        mbox = mailbox.mbox(archive_path, create=False)
+        try:
+            for message in mbox:
+                yield from message_pdfs(message)
+        finally:
+            mbox.close()
+    else:
+        raise ValueError(f"Unknown archive type: {archive_path}")
+
+
+def _zip_pdfs(archive_path: str):
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                yield os.path.basename(info.filename), archive.read(info)
+
+
+def _tar_pdfs(archive_path: str):
+    # "r:*" detects the compression; members are read in archive order, without seeking back
+    with tarfile.open(archive_path, "r:*") as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(".pdf"):
+                yield os.path.basename(member.name), archive.extractfile(member).read()
+
+
+def message_pdfs(message):
+    """ Yields (filename, data) of the PDF attachments of an email message """
+    for part in message.walk():
+        # Check for attachment via content disposition
+        content_disposition = str(part.get("Content-Disposition") or "")
+        if "attachment" in content_disposition:
+            filename = part.get_filename()
+            if filename and filename.lower().endswith(".pdf"):
+                yield os.path.basename(filename), part.get_payload(decode=True)
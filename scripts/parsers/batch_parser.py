@@ -0,0 +1,245 @@
+import io
+import os
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from .receipt_parser import parse_receipt, parse_lines, extract_lines, DEFAULT_BACKEND
+from .models import Receipt
+from .text_cache import pdf_digest, load_lines, store_lines
+
+# Seconds parse_receipt_queue waits for the next PDF before it checks the receipts being parsed
+QUEUE_POLL_INTERVAL = 0.1
+
+
+def list_receipt_pdfs(input_folder: str) -> list:
+    """ Returns the paths of all PDFs in input_folder, sorted by filename """
+    filenames = sorted(name for name in os.listdir(input_folder) if name.lower().endswith(".pdf"))
+    return [os.path.join(input_folder, name) for name in filenames]
+
+
+def parse_receipt_cached(pdf_path: str, text_cache_dir: str, refresh_cache: bool = False,
+                         backend: str = DEFAULT_BACKEND) -> Receipt:
+    """
+    Parses a receipt, taking the extracted text lines from the text cache
+    when available. Only cache misses (or refresh_cache=True) run the
+    expensive PDF text extraction.
+    """
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    return parse_receipt_data(data, pdf_path, text_cache_dir, refresh_cache, backend)
+
+
+def parse_receipt_data(data: bytes, pdf_path: str, text_cache_dir: str = None, refresh_cache: bool = False,
+                       backend: str = DEFAULT_BACKEND) -> Receipt:
+    """
+    Parses a receipt from the PDF's content in memory, e.g. a downloaded attachment.
+    pdf_path only names the receipt. Uses the text cache like parse_receipt_cached.
+    """
+    if not text_cache_dir:
+        return parse_receipt(data, backend, name=pdf_path)
+
+    # Backends may differ in whitespace details, so each gets its own entries
+    cache_key = f"{pdf_digest(data)}-{backend}"
+
+    lines = None if refresh_cache else load_lines(text_cache_dir, cache_key)
+    if lines is None:
+        lines = extract_lines(io.BytesIO(data), backend)
+        store_lines(text_cache_dir, cache_key, lines)
+
+    return parse_lines(lines, pdf_path)
+
+
+def parse_receipt_safe(pdf_path: str, text_cache_dir: str = None, refresh_cache: bool = False,
+                       backend: str = DEFAULT_BACKEND, data: bytes = None) -> tuple:
+    """
+    Parses a single receipt and never raises.
+    Returns (pdf_path, parsed, error) where exactly one of parsed/error is set,
+    so a corrupt PDF only fails its own entry instead of the whole run.
+    With data given, the PDF is parsed from memory instead of being read from pdf_path.
+    """
+    try:
+        if data is not None:
+            parsed = parse_receipt_data(data, pdf_path, text_cache_dir, refresh_cache, backend)
+        elif text_cache_dir:
+            parsed = parse_receipt_cached(pdf_path, text_cache_dir, refresh_cache, backend)
+        else:
+            parsed = parse_receipt(pdf_path, backend)
+        return pdf_path, parsed, None
+    except Exception as exc:  # pdfplumber/pdfminer raise many unrelated types
+        return pdf_path, None, f"{type(exc).__name__}: {exc}"
+
+
+def _parse_isolated(parse_one, pdf_path: str, data: bytes = None) -> tuple:
+    """
+    Runs parse_one in a process of its own, so a crash of that process
+    (e.g. inside PDFium) fails only this PDF instead of raising BrokenProcessPool.
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(parse_one, pdf_path, data=data).result()
+        except BrokenProcessPool:
+            return pdf_path, None, "BrokenProcessPool: the parser process died"
+
+
+def _submit(executor, pending: deque, parse_one, pdf_path: str, data: bytes):
+    """ Adds (pdf_path, data, future) to pending, without a future when the pool is already broken """
+    try:
+        future = executor.submit(parse_one, pdf_path, data=data)
+    except BrokenProcessPool:
+        pending.append((pdf_path, data, None))
+        raise
+    pending.append((pdf_path, data, future))
+
+
+def _oldest_result(pending: deque) -> tuple:
+    """ Removes and returns the result of the oldest pending PDF, which stays pending if the pool broke """
+    result = pending[0][2].result()
+    pending.popleft()
+    return result
+
+
+def _retry_pending(pending: deque, parse_one):
+    """
+    After a worker process died, yields the results of the pending PDFs in order: the ones
+    that had finished, the others parsed again one per process (see _parse_isolated).
+    """
+    while pending:
+        pdf_path, data, future = pending.popleft()
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            yield future.result()
+        else:
+            yield _parse_isolated(parse_one, pdf_path, data)
+
+
+def parse_receipts(pdf_paths: list, workers: int = 1, text_cache_dir: str = None, refresh_cache: bool = False,
+                   backend: str = DEFAULT_BACKEND):
+    """
+    Parses all receipts and yields (pdf_path, parsed, error) tuples
+    in the same order as pdf_paths.
+
+    workers=1 parses in-process, workers>1 spreads the files across a
+    process pool and workers=0 uses one process per CPU core.
+    With text_cache_dir set, extracted text is read from / written to the text cache.
+    backend selects the text extraction engine (see receipt_parser.EXTRACTION_BACKENDS).
+    If a worker process dies, the files without a result are parsed one per process,
+    so only the file that crashes it fails.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    parse_one = partial(parse_receipt_safe, text_cache_dir=text_cache_dir, refresh_cache=refresh_cache,
+                        backend=backend)
+
+    if workers <= 1 or len(pdf_paths) <= 1:
+        for pdf_path in pdf_paths:
+            yield parse_one(pdf_path)
+        return
+
+    # Hand out files in small batches to keep the inter-process overhead low
+    # while still balancing receipts of different length across the workers.
+    chunksize = max(1, len(pdf_paths) // (workers * 4))
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            # executor.map returns results in submission order
+            for result in executor.map(parse_one, pdf_paths, chunksize=chunksize):
+                yield result
+                done += 1
+        except BrokenProcessPool:
+            pass  # which file killed the worker is unknown, the rest are isolated below
+
+    for pdf_path in pdf_paths[done:]:
+        yield _parse_isolated(parse_one, pdf_path)
+
+
+def parse_receipts_data(pdfs, workers: int = 1, text_cache_dir: str = None, refresh_cache: bool = False,
+                        backend: str = DEFAULT_BACKEND):
+    """
+    parse_receipts for PDFs that are already in memory, e.g. read from an archive:
+    parses (pdf_path, data) pairs and yields (pdf_path, parsed, error) tuples in
+    the same order. pdfs is consumed lazily; with workers>1 at most two PDFs
+    per worker are held in memory at a time. If a worker process dies, the PDFs
+    it may have held are parsed one per process and a new pool takes the rest.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    parse_one = partial(parse_receipt_safe, text_cache_dir=text_cache_dir, refresh_cache=refresh_cache,
+                        backend=backend)
+
+    if workers <= 1:
+        for pdf_path, data in pdfs:
+            yield parse_one(pdf_path, data=data)
+        return
+
+    pdfs = iter(pdfs)
+    # (pdf_path, data, future) in input order
+    pending = deque()
+    while True:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                for pdf_path, data in pdfs:
+                    _submit(executor, pending, parse_one, pdf_path, data)
+                    if len(pending) >= workers * 2:
+                        yield _oldest_result(pending)
+                while pending:
+                    yield _oldest_result(pending)
+                return
+            except BrokenProcessPool:
+                pass
+        yield from _retry_pending(pending, parse_one)
+
+
+def parse_receipt_queue(pdfs: queue.Queue, workers: int = 1, text_cache_dir: str = None,
+                        backend: str = DEFAULT_BACKEND):
+    """
+    Parses receipts while they arrive: takes (pdf_path, data) pairs from pdfs until
+    it gets None and yields (pdf_path, parsed, error) tuples in the same order.
+    The PDFs are parsed from memory, see parse_receipt_data.
+
+    workers=1 parses in-process, workers>1 parses in a process pool with at most
+    two receipts per worker in flight, workers=0 uses one process per CPU core.
+    Give pdfs a maxsize to make a fast producer wait for the parser.
+    If a worker process dies, the receipts in flight are parsed one per process
+    and a new pool takes the following ones.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    parse_one = partial(parse_receipt_safe, text_cache_dir=text_cache_dir, backend=backend)
+
+    if workers <= 1:
+        for pdf_path, data in iter(pdfs.get, None):
+            yield parse_one(pdf_path, data=data)
+        return
+
+    max_pending = workers * 2
+    # (pdf_path, data, future) in arrival order
+    pending = deque()
+    finished = False
+    while not finished or pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                while not finished or pending:
+                    if not finished and len(pending) < max_pending:
+                        try:
+                            # only wait briefly while receipts are being parsed,
+                            # their results should not wait for new PDFs
+                            pdf = pdfs.get(timeout=QUEUE_POLL_INTERVAL if pending else None)
+                        except queue.Empty:
+                            pdf = ()
+                        if pdf is None:
+                            finished = True
+                        elif pdf:
+                            pdf_path, data = pdf
+                            _submit(executor, pending, parse_one, pdf_path, data)
+
+                    # results in arrival order; block on the oldest one only when no further PDF may be started
+                    while pending and (pending[0][2].done() or finished or len(pending) >= max_pending):
+                        yield _oldest_result(pending)
+            except BrokenProcessPool:
+                pass
+        yield from _retry_pending(pending, parse_one)
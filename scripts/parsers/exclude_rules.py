@@ -0,0 +1,54 @@
+import os
+import re
+import hashlib
+from collections import Counter
+from functools import lru_cache
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(__file__), "unwanted_items.txt")
+
+
+class ExcludeRules:
+    """
+    Keyword rules for unwanted items, compiled into a single regex so every
+    item name is scanned once, regardless of the number of rules.
+    hits counts how often each rule removed an item.
+    """
+
+    def __init__(self, keywords):
+        # Names are matched lowercased, so the rules have to be lowercase too
+        self.rules = list(dict.fromkeys(keyword.strip().lower() for keyword in keywords if keyword.strip()))
+        self.fingerprint = hashlib.sha256("\n".join(self.rules).encode("utf-8")).hexdigest()[:12]
+        self.hits = Counter()
+
+        # Longest first: at the same position the most specific rule wins,
+        # so the counters show which of two overlapping rules does the work.
+        alternatives = sorted(self.rules, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, alternatives))) if alternatives else None
+
+    def match(self, name: str):
+        """ Returns the rule matching the item name (and counts the hit), or None """
+        if self._pattern is None:
+            return None
+        found = self._pattern.search(name.lower())
+        if found is None:
+            return None
+        rule = found.group(0)
+        self.hits[rule] += 1
+        return rule
+
+    def report(self) -> list:
+        """ Returns (rule, hits) for all rules, most used first; dead rules have 0 hits """
+        return sorted(((rule, self.hits[rule]) for rule in self.rules), key=lambda entry: -entry[1])
+
+
+def load_exclude_rules(rules_file: str = DEFAULT_RULES_FILE) -> ExcludeRules:
+    """ Reads one keyword per line, ignoring blank lines and '#' comments """
+    with open(rules_file, "r", encoding="utf-8") as f:
+        keywords = [line for line in f if line.strip() and not line.lstrip().startswith("#")]
+    return ExcludeRules(keywords)
+
+
+@lru_cache(maxsize=None)
+def default_exclude_rules() -> ExcludeRules:
+    """ The rules from unwanted_items.txt, loaded once per process """
+    return load_exclude_rules()
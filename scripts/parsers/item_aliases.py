@@ -0,0 +1,179 @@
+import os
+import re
+import math
+import hashlib
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+DEFAULT_ALIASES_FILE = os.path.join(os.path.dirname(__file__), "item_aliases.txt")
+
+# Clustering thresholds, see build_aliases
+MIN_SIMILARITY = 0.9
+MIN_PREFIX_LENGTH = 8
+MIN_PREFIX_RATIO = 0.6
+# Blocking: candidates share this fraction of the trigrams of the shorter name.
+# A truncated name shares all of them, a typo only changes up to three.
+MIN_SHARED_TRIGRAMS = 0.7
+# Trigrams shared by more names than this (e.g. "bio") are too common to block on;
+# only skipped when even the rarest trigrams of a name are that common
+MAX_BLOCK_SIZE = 200
+
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+class ItemAliases:
+    """
+    Maps alternative spellings of an item name (truncated, reformatted by
+    another receipt layout, ...) to one canonical name with a dict lookup.
+    """
+
+    def __init__(self, aliases: dict):
+        # Never map a name to itself, and resolve chains (a -> b -> c) up front
+        self.aliases = {}
+        for alias in aliases:
+            canonical = aliases[alias]
+            seen = {alias}
+            while canonical in aliases and canonical not in seen:
+                seen.add(canonical)
+                canonical = aliases[canonical]
+            if canonical != alias:
+                self.aliases[alias] = canonical
+        content = "\n".join(f"{alias}\t{canonical}" for alias, canonical in sorted(self.aliases.items()))
+        self.fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+
+    def canonical(self, name: str) -> str:
+        """ The canonical name for name (name itself if it has no alias) """
+        return self.aliases.get(name, name)
+
+
+def load_item_aliases(aliases_file: str = DEFAULT_ALIASES_FILE) -> ItemAliases:
+    """
+    Reads 'alias<TAB>canonical' lines, ignoring blank lines and '#' comments; a missing file means no aliases.
+    Raises ValueError naming the file and line of a malformed line.
+    """
+    aliases = {}
+    if os.path.isfile(aliases_file):
+        with open(aliases_file, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip() and not line.lstrip().startswith("#"):
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) != 2 or not all(fields):
+                        raise ValueError(f"{aliases_file}, line {line_number}: expected 'alias<TAB>canonical', "
+                                         f"got {line.rstrip()!r}")
+                    alias, canonical = fields
+                    aliases[alias] = canonical
+    return ItemAliases(aliases)
+
+
+def save_item_aliases(aliases: ItemAliases, aliases_file: str = DEFAULT_ALIASES_FILE):
+    """ Writes the alias table, grouped by canonical name """
+    with open(aliases_file, "w", encoding="utf-8") as f:
+        f.write("# Alternative item names and the name they are replaced with while parsing\n")
+        f.write("# (alias<TAB>canonical). Generated by build_item_aliases.py, can be edited by hand.\n")
+        f.write("# Editing this file changes the parser output: read_receipt re-parses all receipts\n")
+        for alias, canonical in sorted(aliases.aliases.items(), key=lambda entry: (entry[1], entry[0])):
+            f.write(f"{alias}\t{canonical}\n")
+
+
+@lru_cache(maxsize=None)
+def default_item_aliases() -> ItemAliases:
+    """ The aliases from item_aliases.txt, loaded once per process """
+    return load_item_aliases()
+
+
+def _match_key(name: str) -> str:
+    """ Lowercase letters and digits only: "Oatly Hafer Aufst." -> "oatlyhaferaufst" """
+    return "".join(char for char in name.lower() if char.isalnum())
+
+
+def _trigrams(key: str) -> set:
+    if len(key) < 3:
+        return {key}
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def is_same_item(key_a: str, key_b: str) -> bool:
+    """
+    Whether two match keys name the same item: a truncated prefix of each other
+    or nearly identical. Different numbers (sizes, fat content) never match.
+    """
+    if DIGITS_PATTERN.findall(key_a) != DIGITS_PATTERN.findall(key_b):
+        return False
+    short, long = sorted((key_a, key_b), key=len)
+    if len(short) >= MIN_PREFIX_LENGTH and long.startswith(short) and len(short) >= MIN_PREFIX_RATIO * len(long):
+        return True
+    return SequenceMatcher(None, key_a, key_b).ratio() >= MIN_SIMILARITY
+
+
+def candidate_pairs(keys: list):
+    """
+    Yields index pairs (i, j), i > j, of keys sharing at least MIN_SHARED_TRIGRAMS
+    of the trigrams of the shorter one. Blocking on trigrams keeps this far below
+    the n² pairs of comparing every name with every other.
+    """
+    trigram_sets = [_trigrams(key) for key in keys]
+    postings = defaultdict(list)
+    for i, trigrams in enumerate(trigram_sets):
+        for trigram in trigrams:
+            postings[trigram].append(i)
+
+    for i, trigrams in enumerate(trigram_sets):
+        # Prefix filtering: a longer name sharing at least `needed` of these trigrams
+        # shares at least two of any len - needed + 2 of them, so only the rarest
+        # are probed and names found in fewer than two probes are dropped unchecked.
+        needed = math.ceil(MIN_SHARED_TRIGRAMS * len(trigrams))
+        probes = min(len(trigrams), len(trigrams) - needed + 2)
+        hits = Counter()
+        skipped = 0
+        for trigram in sorted(trigrams, key=lambda trigram: len(postings[trigram]))[:probes]:
+            block = postings[trigram]
+            if len(block) <= MAX_BLOCK_SIZE:
+                hits.update(block)
+            else:
+                skipped += 1
+
+        # every pair is checked once, from its shorter name
+        min_hits = max(1, min(2, probes) - skipped)
+        for j, count in hits.items():
+            other = trigram_sets[j]
+            if count >= min_hits and (len(trigrams), i) < (len(other), j) and len(trigrams & other) >= needed:
+                yield max(i, j), min(i, j)
+
+
+def build_aliases(name_counts: dict) -> ItemAliases:
+    """
+    Clusters near-duplicate item names (name -> number of purchases) and maps
+    every name of a cluster to its most bought name (ties: the longest).
+    Clusters grow through chains of matches (A~B, B~C), so a name only becomes
+    an alias when it matches the canonical name itself.
+    """
+    names = sorted(name_counts)
+    keys = [_match_key(name) for name in names]
+
+    # union-find over the names
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(keys):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j and is_same_item(keys[i], keys[j]):
+            parent[root_i] = root_j
+
+    clusters = defaultdict(list)
+    for i, name in enumerate(names):
+        clusters[find(i)].append(name)
+
+    aliases = {}
+    for cluster in clusters.values():
+        if len(cluster) > 1:
+            canonical = max(cluster, key=lambda name: (name_counts[name], len(name), name))
+            canonical_key = _match_key(canonical)
+            aliases.update({name: canonical for name in cluster
+                            if name != canonical and is_same_item(_match_key(name), canonical_key)})
+    return ItemAliases(aliases)
@@ -1,67 +1,56 @@
 import re
+from .amounts import parse_cents, divide_half_up
+from .models import Item
 from .text_cleaner import cleanup_name
 
+# Final price at the end of the line, e.g. "1,95 B" => "1,95"
+TOTAL_PRICE_PATTERN = re.compile(r"([\d,]+)\s*(?:[A-Z]+|\*?[A-Z]+)?$")
 
-def parse_item_line(line: str) -> dict:
+# "x" quantity patterns, e.g. "GURKEN 0,49 € x 4"
+PRICE_QTY_PATTERN = re.compile(r"(.*?)([\d,]+)\s*(?:EUR|€)?\s*x\s*(\d+)(.*)", re.IGNORECASE)
+
+
+def parse_item_line(line: str):
     """
-    Parses a line into {name, quantity, unit_price, total_price},
+    Parses a line into an Item(name, quantity, unit/total price in cents),
     handling old vs. new receipt styles (ö -> oe, uppercase->mixed).
+    Returns None if the line has no price.
     """
 
     # Normalize excessive spaces
-    line = re.sub(r"\s+", " ", line.strip())  # Replace multiple spaces with a single space
+    line = " ".join(line.split())  # Replace multiple spaces with a single space
 
-    # 1) Extract the final price (e.g., "1,95 B" => "1,95")
-    total_price_pattern = re.compile(r"([\d,]+)\s*(?:[A-Z]+|\*?[A-Z]+)?$")
-    m_total = total_price_pattern.search(line)
+    # 1) Extract the final price (e.g., "1,95 B" => 195 cents)
+    m_total = TOTAL_PRICE_PATTERN.search(line)
     if not m_total:
-        return {}
+        return None
 
-    total_str = m_total.group(1)
-    total_val = float(total_str.replace(",", "."))  # Convert to float
+    total_cents = parse_cents(m_total.group(1))
     line_clean = line[:m_total.start()].strip()  # Remove the price part
 
     # 2) Detect "x" quantity patterns (e.g., "GURKEN 0,49 € x 4")
-    pattern_price_qty = re.compile(
-        r"(.*?)([\d,]+)\s*(?:EUR|€)?\s*x\s*(\d+)(.*)",
-        re.IGNORECASE
-    )
-    match_qty = pattern_price_qty.search(line_clean)
-
-    # Default item structure
-    item = {
-        "name": cleanup_name(line_clean),
-        "quantity": 1,  # Default quantity is 1 if no "x" pattern is found
-        "unit_price": total_val,
-        "total_price": total_val
-    }
+    # cheap pre-check, most lines have no "x" at all
+    match_qty = PRICE_QTY_PATTERN.search(line_clean) if "x" in line_clean or "X" in line_clean else None
 
     if match_qty:
         pre_text, price_str, qty_str, post_text = match_qty.groups()
         try:
-            unit_price_val = float(price_str.replace(",", "."))
+            unit_cents = parse_cents(price_str)
             quantity_val = int(qty_str)
         except ValueError:
             pass
         else:
-            item["quantity"] = quantity_val
-            item["unit_price"] = unit_price_val
-            # Rebuild name from everything outside the pattern
-            item["name"] = cleanup_name(pre_text + " " + post_text)
-            item["total_price"] = total_val
-
-            # If there's a mismatch, recalculate unit price
-            computed = round(unit_price_val * quantity_val, 2)
             if quantity_val == 0:
                 # If quantity is zero, assume it's an error and reset it to 1
-                item["quantity"] = 1
-                item["unit_price"] = total_val
-            else:
-                if abs(computed - round(total_val, 2)) > 0.01:
-                    # Adjust unit price if necessary
-                    item["unit_price"] = round(total_val / quantity_val, 2)
-    else:
-        # No "x" pattern found => quantity=1, unit_price = total_price
-        item["name"] = cleanup_name(item["name"])
+                quantity_val = 1
+                unit_cents = total_cents
+            elif abs(unit_cents * quantity_val - total_cents) > 1:
+                # If there's a mismatch (more than a cent, like the former "> 0.01" on
+                # rounded floats, without its float noise), recalculate unit price
+                unit_cents = divide_half_up(total_cents, quantity_val)
+
+            # Rebuild name from everything outside the pattern
+            return Item(cleanup_name(pre_text + " " + post_text), quantity_val, unit_cents, total_cents)
 
-    return item
+    # No "x" pattern found => quantity=1, unit_price = total_price
+    return Item(cleanup_name(line_clean), 1, total_cents, total_cents)
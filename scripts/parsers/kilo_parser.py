@@ -1,4 +1,8 @@
 import re
+from .amounts import parse_cents, parse_grams, divide_half_up
+
+# e.g. "0,480 kg x 2,99 /kg" => weight "0,480", price per kg "2,99"
+KILO_PATTERN = re.compile(r"([\d,]+)\s*kg\s*x\s*([\d,]+)\s*/kg", re.IGNORECASE)
 
 
 def is_kilo_line(line: str) -> bool:
@@ -6,24 +10,28 @@ def is_kilo_line(line: str) -> bool:
     Checks if line contains weight-based pricing
     e.g. "0,480 kg x 2,99 /kg"
     """
-    pattern = re.compile(r"^[\d,]+\s*kg\s*x\s*[\d,]+\s*/kg", re.IGNORECASE)
-    return bool(pattern.search(line))
+    return KILO_PATTERN.match(line) is not None
 
 
 def parse_kilo_line(line: str, items: list):
     """ Parses weight-based items """
+    match = KILO_PATTERN.match(line)
+    if match:
+        apply_kilo_match(match, items)
+
+
+def apply_kilo_match(match, items: list):
+    """
+    Applies an already matched KILO_PATTERN to the previous Item,
+    so callers that classified the line don't have to match it twice.
+    """
     if not items:
         return
 
-    pattern = re.compile(r"^([\d,]+)\s*kg\s*x\s*([\d,]+)\s*/kg", re.IGNORECASE)
-    match = pattern.search(line)
+    weight_grams = parse_grams(match.group(1))
+    kg_price_cents = parse_cents(match.group(2))
 
-    if match:
-        weight = float(match.group(1).replace(",", "."))
-        kg_price = float(match.group(2).replace(",", "."))
-        total = round(weight * kg_price, 2)
-
-        last_item = items[-1]
-        last_item["quantity"] = weight
-        last_item["unit_price"] = kg_price
-        last_item["total_price"] = total
+    last_item = items[-1]
+    last_item.weight_grams = weight_grams
+    last_item.unit_price_cents = kg_price_cents
+    last_item.total_price_cents = divide_half_up(weight_grams * kg_price_cents, 1000)
@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class Item:
+    """
+    One receipt line. Prices are integer cents; weighed items have their
+    weight in grams and a unit price per kg. Floats (EUR, kg) only appear
+    in to_dict, the JSON boundary.
+    """
+    name: str
+    quantity: int = 1
+    unit_price_cents: int = 0
+    total_price_cents: int = 0
+    weight_grams: int | None = None
+
+    def to_dict(self) -> dict:
+        """ Converts to the JSON schema of parsed_receipts.json """
+        return {
+            "name": self.name,
+            "quantity": self.quantity if self.weight_grams is None else self.weight_grams / 1000,
+            "unit_price": self.unit_price_cents / 100,
+            "total_price": self.total_price_cents / 100
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Item":
+        quantity = data.get("quantity", 1)
+        weight_grams = round(quantity * 1000) if isinstance(quantity, float) else None
+        return cls(
+            name=data["name"],
+            quantity=1 if weight_grams is not None else quantity,
+            unit_price_cents=round(data.get("unit_price", 0.0) * 100),
+            total_price_cents=round(data.get("total_price", 0.0) * 100),
+            weight_grams=weight_grams
+        )
+
+
+@dataclass(slots=True)
+class Receipt:
+    """ A parsed receipt; file is the PDF's file name """
+    file: str
+    date: str | None = None
+    time: str | None = None
+    items: list = field(default_factory=list)
+    sum_cents: int | None = None
+
+    def to_dict(self) -> dict:
+        """ Converts to the JSON schema of parsed_receipts.json (same key order as before) """
+        return {
+            "date": self.date,
+            "time": self.time,
+            "items": [item.to_dict() for item in self.items],
+            "sum": None if self.sum_cents is None else self.sum_cents / 100,
+            "file": self.file
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Receipt":
+        total = data.get("sum")
+        return cls(
+            file=data["file"],
+            date=data.get("date"),
+            time=data.get("time"),
+            items=[Item.from_dict(item) for item in data.get("items", [])],
+            sum_cents=None if total is None else round(total * 100)
+        )
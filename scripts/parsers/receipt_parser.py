@@ -1,65 +1,146 @@
 import pdfplumber
+import pypdfium2 as pdfium
+import io
 import os
 import re
+from pdfminer.high_level import extract_text as pdfminer_extract_text
 
 from .fix_quantity_lines import fix_quantity_lines
 from .item_parser import parse_item_line
-from .kilo_parser import is_kilo_line, parse_kilo_line
+from .kilo_parser import KILO_PATTERN, apply_kilo_match
+from .exclude_rules import ExcludeRules, default_exclude_rules
+from .item_aliases import ItemAliases, default_item_aliases
+from .models import Receipt
 
+# Bump whenever a change to the parsing rules (item/kilo/quantity parsing,
+# unwanted item filter, ...) changes the output for existing receipts.
+# Receipts parsed with an older version are re-parsed by read_receipt.
+# Changes to unwanted_items.txt and item_aliases.txt are tracked separately, see parser_version().
+PARSER_VERSION = "4"
+
+# Text extraction engine used when none is given, see EXTRACTION_BACKENDS
+DEFAULT_BACKEND = "pdfplumber"
+
+# e.g. "10.02.24 14:35"
+DATE_TIME_PATTERN = re.compile(r"(\d{2}\.\d{2}\.\d{2})\s+(\d{2}:\d{2})")
+
+
+def parser_version() -> str:
+    """ PARSER_VERSION combined with the fingerprints of the unwanted item rules and the item aliases """
+    version = f"{PARSER_VERSION}-{default_exclude_rules().fingerprint}"
+    aliases = default_item_aliases()
+    if aliases.aliases:
+        version += f"-{aliases.fingerprint}"
+    return version
+
+
+def parse_receipt(pdf_file, backend: str = DEFAULT_BACKEND, name: str = None) -> Receipt:
+    """
+    Extracts structured data from a PDF receipt.
+    pdf_file is a path, the PDF's content as bytes or a binary file-like object.
+    name is the receipt's file name; defaults to the path, or the file object's name.
+    """
+    if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+        pdf_file = io.BytesIO(pdf_file)
+    if name is None:
+        name = pdf_file if isinstance(pdf_file, (str, os.PathLike)) else getattr(pdf_file, "name", "")
+    return parse_lines(extract_lines(pdf_file, backend), os.fspath(name))
+
+
+def extract_lines(pdf_file, backend: str = DEFAULT_BACKEND) -> list:
+    """
+    Extracts the non-empty text lines of all pages of a PDF.
+    pdf_file is a path or a binary file-like object,
+    backend is one of EXTRACTION_BACKENDS.
+    """
+    try:
+        extract_text = EXTRACTION_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown extraction backend: {backend}") from None
 
-def parse_receipt(pdf_path: str) -> dict:
-    """ Extracts structured data from a PDF receipt """
     all_lines = []
-    with pdfplumber.open(pdf_path) as pdf:
+    for text in extract_text(pdf_file):
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                all_lines.append(line)
+
+    return all_lines
+
+
+def _pdfplumber_pages(pdf_file):
+    """ Full pdfplumber layout analysis (char/word clustering) per page """
+    with pdfplumber.open(pdf_file) as pdf:
         for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                for line in text.split("\n"):
-                    all_lines.append(line.strip())
+            yield page.extract_text() or ""
+
+
+def _pdfminer_pages(pdf_file):
+    """ pdfminer's text converter, without pdfplumber's object model on top """
+    yield pdfminer_extract_text(pdf_file)
+
 
-    return parse_lines(all_lines, pdf_path)
+def _pypdfium2_pages(pdf_file):
+    """ PDFium text pages; the receipts are single-column, so no layout analysis is needed """
+    pdf = pdfium.PdfDocument(pdf_file)
+    try:
+        for page in pdf:
+            text_page = page.get_textpage()
+            yield text_page.get_text_range()
+            text_page.close()
+            page.close()
+    finally:
+        pdf.close()
 
 
-def remove_unwanted_items(items: list) -> list:
+EXTRACTION_BACKENDS = {
+    "pdfplumber": _pdfplumber_pages,
+    "pdfminer": _pdfminer_pages,
+    "pypdfium2": _pypdfium2_pages,
+}
+
+
+def remove_unwanted_items(items: list, rules: ExcludeRules = None) -> list:
     """
-    Removes any item whose 'name' field contains certain unwanted keywords
+    Removes any item whose name contains certain unwanted keywords
     (e.g. 'coupon', 'nummer', 'summe'). Returns a new filtered list.
+    The keywords come from unwanted_items.txt unless other rules are given.
     """
-    # Define the keywords to exclude (make them all lowercase).
-    exclude_keywords = ["coupon", "nummer:", "summe", "pfand", "Leergut", "positionsrabatt 50% -",
-                        "positionsrabatt 30% -", "23% jahresstartrab. art. -", "23% jahresstartrab. -",
-                        "leergut entl.allg. -", "leergut einweg allg. -"]
+    if rules is None:
+        rules = default_exclude_rules()
+
+    # Skip every item matched by a rule (don't add to filtered list)
+    return [item for item in items if rules.match(item.name) is None]
 
-    filtered = []
-    for item in items:
-        name_lower = item["name"].lower()
-        # Check if *any* exclude keyword is in the item name
-        if any(keyword in name_lower for keyword in exclude_keywords):
-            # Skip this item (don't add to filtered list)
-            continue
-        filtered.append(item)
 
-    return filtered
+def apply_item_aliases(items: list, aliases: ItemAliases = None) -> list:
+    """
+    Replaces alternative item names with their canonical name (one dict lookup per item).
+    The aliases come from item_aliases.txt unless others are given.
+    """
+    if aliases is None:
+        aliases = default_item_aliases()
+    for item in items:
+        item.name = aliases.canonical(item.name)
+    return items
 
 
-def parse_lines(lines: list, pdf_path: str) -> dict:
+def parse_lines(lines: list, pdf_path: str) -> Receipt:
     """ Extracts date/time, items, and sum from receipt lines """
-    result = {
-        "date": None,
-        "time": None,
-        "items": [],
-        "sum": None,
-        "file": os.path.basename(pdf_path)
-    }
+    result = Receipt(file=os.path.basename(pdf_path))
 
+    items = result.items
     collecting_items = False
-    date_time_pattern = re.compile(r"(\d{2}\.\d{2}\.\d{2})\s+(\d{2}:\d{2})")
 
+    # Single dispatch per line: date/time, header ("EUR"), footer ("Posten"),
+    # then kilo or regular item lines while collecting. Every check is a
+    # precompiled pattern or a plain substring test guarding the regex.
     for line in lines:
-        # 1) Look for date/time
-        dt_match = date_time_pattern.search(line)
-        if dt_match:
-            result["date"], result["time"] = dt_match.groups()
+        # 1) Look for date/time (every such line contains the "hh:mm" colon)
+        if ":" in line:
+            dt_match = DATE_TIME_PATTERN.search(line)
+            if dt_match:
+                result.date, result.time = dt_match.groups()
 
         # 2) If line starts with "EUR", start item collection
         if line.startswith("EUR"):
@@ -73,24 +154,27 @@ def parse_lines(lines: list, pdf_path: str) -> dict:
 
         # 4) If we are collecting items, parse them
         if collecting_items:
-            if is_kilo_line(line):
-                parse_kilo_line(line, result["items"])
+            kilo_match = KILO_PATTERN.match(line)
+            if kilo_match:
+                apply_kilo_match(kilo_match, items)
             else:
                 item = parse_item_line(line)
-                if item:
-                    result["items"].append(item)
+                if item is not None:
+                    items.append(item)
 
     # 5) merge any lines like "2 x" with the next item
     # because schema change is too difficult to detect, this is easier
-    fix_quantity_lines(result["items"])
+    items = fix_quantity_lines(items)
 
     # 6) Remove unwanted items (e.g. coupons, totals, etc.)
-    result["items"] = remove_unwanted_items(result["items"])
+    result.items = remove_unwanted_items(items)
+
+    # 7) Use one canonical name for items that appear under several names
+    apply_item_aliases(result.items)
 
-    # 7) Compute sum of total_price from all items
+    # 8) Compute sum of total_price from all items (exact, in cents)
     # because of 3 schemas it is easier to compute instead of read sum
     # its also cleaned without unwanted items
-    total_sum = sum(item["total_price"] for item in result["items"])
-    result["sum"] = round(total_sum, 2)
+    result.sum_cents = sum(item.total_price_cents for item in result.items)
 
     return result
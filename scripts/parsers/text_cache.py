@@ -0,0 +1,39 @@
+import os
+import gzip
+import json
+import hashlib
+
+
+def pdf_digest(data: bytes) -> str:
+    """ Returns the SHA-256 hex digest of the raw bytes of a PDF, used to build cache keys """
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_file(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.json.gz")
+
+
+def load_lines(cache_dir: str, key: str):
+    """ Returns the cached text lines of a PDF, or None on a cache miss """
+    path = cache_file(cache_dir, key)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Truncated or otherwise broken entry: treat it as a miss
+        return None
+
+
+def store_lines(cache_dir: str, key: str, lines: list):
+    """
+    Stores the extracted text lines of a PDF. The entry is written to a
+    temporary file first, so parallel workers never see half-written entries.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_file(cache_dir, key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(lines, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
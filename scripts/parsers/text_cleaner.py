@@ -1,12 +1,31 @@
+from functools import lru_cache
+
+# 'ö'->'oe', 'ü'->'ue', 'ä'->'ae', 'ß'->'ss' in a single pass over the (lowercased) name
+UMLAUT_TABLE = str.maketrans({"ö": "oe", "ü": "ue", "ä": "ae", "ß": "ss"})
+
+# Distinct raw names kept in the cache. Years of receipts repeat a few thousand
+# names, so almost every call is a hit; the bound keeps odd inputs from piling up.
+NAME_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def cleanup_name(raw_name: str) -> str:
     """ Standardizes item names by applying text normalization
     1) Convert to a consistent case (e.g. lower).
     2) Replace 'ö'->'oe', 'ü'->'ue', 'ä'->'ae'.
     3) Convert to Title-case or keep lower.
     4) Remove extra spaces
+    Results are memoized, see name_cache_stats().
     """
     name = raw_name.lower()
-    name = name.replace("ö", "oe").replace("ü", "ue").replace("ä", "ae").replace("ß", "ss")
+    if not name.isascii():  # translate is slow in CPython, most names need no replacement
+        name = name.translate(UMLAUT_TABLE)
     name = name.title()
     name = " ".join(name.split())
     return name
+
+
+def name_cache_stats() -> dict:
+    """ Hits, misses and size of the cleanup_name cache (of this process) """
+    info = cleanup_name.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
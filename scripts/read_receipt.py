@@ -1,21 +1,288 @@
 import os
-from parsers.receipt_parser import parse_receipt
-from utils.file_handler import save_json
+import queue
+import hashlib
+import argparse
+import itertools
+import threading
 
+from parsers.archives import list_receipt_archives, iter_archive_pdfs, is_receipt_archive
+from parsers.batch_parser import list_receipt_pdfs, parse_receipts, parse_receipts_data, parse_receipt_queue
+from parsers.receipt_parser import parser_version, DEFAULT_BACKEND, EXTRACTION_BACKENDS
+from utils.file_handler import save_json, load_json, iter_receipts, append_jsonl, rewrite_jsonl
+from utils.manifest import load_manifest, save_manifest, make_entry, is_entry_current, file_sha256
+from utils.mail_loader import download_attachments, gmail_connection, gmail_credentials, save_pdf
+from utils.receipt_store import open_store, upsert_receipts, sync_store
+
+OUTPUT_FILES = {
+    "json": "parsed_receipts.json",
+    "jsonl": "parsed_receipts.jsonl",
+}
+
+# Each output format gets its own manifest, it describes what is in that file
+MANIFEST_FILES = {
+    "json": "parsed_receipts.manifest.json",
+    "jsonl": "parsed_receipts.jsonl.manifest.json",
+}
+
+# Save the manifest every N receipts in JSON Lines mode,
+# so a crash only means re-parsing the last few receipts
+MANIFEST_SAVE_INTERVAL = 100
+
+# --from-mail: downloaded PDFs waiting for the parser; the download pauses while it is full
+MAIL_QUEUE_SIZE = 20
+MAIL_STATE_FILE = os.path.join("output", "autogenerated", "mail_state.json")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Parse receipt PDFs into JSON.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="number of parallel parser processes (0 = one per CPU core)")
+    arg_parser.add_argument("--full", action="store_true",
+                            help="ignore the manifest and text cache, re-extract and re-parse every PDF")
+    arg_parser.add_argument("--reparse-from-cache", action="store_true",
+                            help="re-run the line parsing for every PDF on the cached text "
+                                 "(only PDFs missing from the text cache are extracted again)")
+    arg_parser.add_argument("--backend", choices=sorted(EXTRACTION_BACKENDS), default=DEFAULT_BACKEND,
+                            help="PDF text extraction engine (default: %(default)s)")
+    arg_parser.add_argument("--format", choices=sorted(OUTPUT_FILES), default="json",
+                            help="json: one array, written at the end; jsonl: one receipt per line, "
+                                 "appended as soon as it is parsed (default: %(default)s)")
+    arg_parser.add_argument("--from-mail", action="store_true",
+                            help="also download new receipts from the Gmail mailbox and parse them from memory "
+                                 "as they arrive (implies --format jsonl)")
+    args = arg_parser.parse_args(argv)
+    if args.from_mail:
+        # receipts are appended while the mails arrive
+        args.format = "jsonl"
 
-def main():
     input_folder = "receipts/pdfs/"
-    output_file = "parsed_receipts.json"
-    all_data = []
+    output_file = OUTPUT_FILES[args.format]
+    output_path = os.path.join("output", "autogenerated", output_file)
+    manifest_path = os.path.join("output", "autogenerated", MANIFEST_FILES[args.format])
+    text_cache_dir = os.path.join("output", "autogenerated", "text_cache")
+
+    # Results of the previous run, reused for PDFs that did not change
+    reuse_results = not (args.full or args.reparse_from_cache)
+    manifest = load_manifest(manifest_path) if reuse_results else {}
+
+    if args.format == "jsonl":
+        # Only the names are kept in memory, the receipts stay in the file
+        previous = set()
+        if os.path.isfile(output_path):
+            previous = {bon["file"] for bon in iter_receipts(output_path)}
+    else:
+        previous = {bon["file"]: bon for bon in (load_json(output_file) or [])}
+
+    current_version = parser_version()
+    pdf_paths = list_receipt_pdfs(input_folder)
+    # A PDF in the folder owns its name: a receipt of that name recorded from an archive is replaced
+    folder_names = {os.path.basename(pdf_path) for pdf_path in pdf_paths}
+    new_manifest = {}
+    to_parse = []
+    for pdf_path in pdf_paths:
+        name = os.path.basename(pdf_path)
+        entry = manifest.get(name)
+        if (name in previous and not is_receipt_archive(entry.get("path", "") if entry else "")
+                and is_entry_current(entry, pdf_path, current_version, args.backend)):
+            new_manifest[name] = entry
+        else:
+            to_parse.append(pdf_path)
+
+    # Archives (zip/tar, .eml/mbox exports) are read in place. Their receipts share the
+    # archive's manifest entry data, so an unchanged archive is skipped as a whole. An archive
+    # is read again when one of its receipts failed or lost its name to a PDF in the folder.
+    archives_to_read = []
+    for archive_path in list_receipt_archives(input_folder):
+        names = [name for name, entry in manifest.items()
+                 if entry.get("path") == archive_path and name not in folder_names]
+        if names and all(name in previous
+                         and is_entry_current(manifest[name], archive_path, current_version, args.backend)
+                         and manifest[name].get("members") == len(names)
+                         for name in names):
+            new_manifest.update((name, manifest[name]) for name in names)
+        else:
+            archives_to_read.append(archive_path)
+
+    print(f"{len(new_manifest)} PDFs unchanged, {len(to_parse)} to parse, {len(archives_to_read)} archives to read.")
+
+    # Manifest entries of receipts that don't come from a PDF file of their own (file name -> entry)
+    entries = {}
+    taken = set(new_manifest) | {os.path.basename(pdf_path) for pdf_path in to_parse}
+    archive_pdfs = read_archive_pdfs(archives_to_read, taken, entries, current_version, args.backend)
+    parsed_results = itertools.chain(
+        parse_receipts(to_parse, workers=args.workers, text_cache_dir=text_cache_dir,
+                       refresh_cache=args.full, backend=args.backend),
+        parse_receipts_data(archive_pdfs, workers=args.workers, text_cache_dir=text_cache_dir,
+                            refresh_cache=args.full, backend=args.backend))
+    mail_errors = []
+    if args.from_mail:
+        # the download starts right away and overlaps with parsing the PDFs of the folder
+        mail_results = parse_mail_receipts(input_folder, entries, mail_errors, current_version,
+                                           workers=args.workers, text_cache_dir=text_cache_dir,
+                                           backend=args.backend)
+        parsed_results = itertools.chain(parsed_results, mail_results)
+
+    # The SQLite store (parsed_receipts.sqlite) gets every receipt as it is parsed
+    store = open_store()
+    parsed_results = store_results(parsed_results, store)
+
+    if args.format == "jsonl":
+        parsed, failed = write_jsonl_output(parsed_results, output_path, new_manifest, manifest_path,
+                                            current_version, entries, args.backend)
+        total = len(new_manifest)
+    else:
+        all_data, parsed, failed = collect_json_output(parsed_results, previous, new_manifest, current_version,
+                                                       entries, args.backend)
+        save_json(all_data, output_file)
+        total = len(all_data)
+
+    save_manifest(new_manifest, manifest_path)
+
+    # Same receipts as the output file: drop removed PDFs, fill in what the store misses (e.g. a new store)
+    store.commit()
+    sync_store(store, new_manifest, iter_receipts(output_path))
+    store.close()
+    for error in mail_errors:
+        print(f"Mail download failed: {type(error).__name__}: {error}")
+    print(f"Parsing complete. {total} PDFs in output, {parsed} parsed, {failed} failed.")
+
+
+def store_results(parsed_results, store):
+    """ Passes the parse results through, upserting every parsed receipt into the SQLite store (by file) """
+    for pdf_path, receipt, error in parsed_results:
+        if receipt is not None:
+            upsert_receipts(store, [receipt.to_dict()])
+        yield pdf_path, receipt, error
+
+
+def read_archive_pdfs(archive_paths: list, taken: set, entries: dict, current_version: str,
+                      backend: str = DEFAULT_BACKEND):
+    """
+    Yields (pdf_path, data) for the PDFs of the archives, read into memory without
+    unpacking the archive. pdf_path is '<archive path>/<file name>'. Names already
+    in taken (other receipts) are skipped. Adds the manifest entries to entries.
+    Once an archive is read completely, its entries get the number of receipts
+    it supplies ("members"); fewer receipts in the manifest (one failed to parse)
+    mean the archive is read again next time.
+    """
+    for archive_path in archive_paths:
+        archive_entries = []
+        try:
+            archive_sha256 = file_sha256(archive_path)
+            for name, data in iter_archive_pdfs(archive_path):
+                if name in taken:
+                    print(f"Skipping {name} in {archive_path}: a receipt with that name exists already")
+                    continue
+                taken.add(name)
+                entries[name] = make_entry(archive_path, current_version, archive_sha256, backend)
+                archive_entries.append(entries[name])
+                yield os.path.join(archive_path, name), data
+        except Exception as exc:  # zipfile/tarfile/mailbox raise their own error types
+            print(f"Failed to read {archive_path}: {type(exc).__name__}: {exc}")
+            continue
+        for entry in archive_entries:
+            entry["members"] = len(archive_entries)
+
+
+def parse_mail_receipts(input_folder: str, entries: dict, errors: list, current_version: str, workers: int = 1,
+                        text_cache_dir: str = None, backend: str = DEFAULT_BACKEND):
+    """
+    Downloads new receipt mails in a background thread and returns the generator
+    of parse results for their PDFs. Every new PDF is saved to input_folder and
+    handed to the parser in memory through a bounded queue, so it is never read
+    back from disk. Adds their manifest entries (hashed in memory) to entries
+    and collects a failed download in errors.
+    """
+    os.makedirs(input_folder, exist_ok=True)
+    pdfs = queue.Queue(maxsize=MAIL_QUEUE_SIZE)
+
+    def handle_attachment(filename, data):
+        # PDFs already in the folder are parsed (or skipped as unchanged) like any other PDF
+        pdf_path = os.path.join(input_folder, filename)
+        if save_pdf(filename, data, input_folder):
+            entries[filename] = make_entry(pdf_path, current_version, hashlib.sha256(data).hexdigest(), backend)
+            pdfs.put((pdf_path, data))
+
+    def download():
+        try:
+            download_attachments(gmail_connection(*gmail_credentials()), handle_attachment,
+                                 state_file=MAIL_STATE_FILE)
+        except Exception as exc:  # reported at the end, the receipts downloaded so far are kept
+            errors.append(exc)
+        finally:
+            pdfs.put(None)
+
+    threading.Thread(target=download, daemon=True).start()
+    return parse_receipt_queue(pdfs, workers=workers, text_cache_dir=text_cache_dir, backend=backend)
+
+
+def collect_json_output(parsed_results, previous: dict, manifest: dict, current_version: str,
+                        entries: dict = None, backend: str = DEFAULT_BACKEND):
+    """
+    Combines the freshly parsed receipts with the unchanged ones from the previous
+    run into one list (in filename order). Updates the manifest in place.
+    entries holds the manifest entries of receipts not parsed from a PDF file of their own.
+    """
+    results = {name: previous[name] for name in manifest}
+    parsed = failed = 0
+    for pdf_path, receipt, error in parsed_results:
+        if error:
+            print(f"Failed to parse {pdf_path}: {error}")
+            failed += 1
+            continue
+        name = os.path.basename(pdf_path)
+        results[name] = receipt.to_dict()
+        manifest[name] = (entries or {}).get(name) or make_entry(pdf_path, current_version, backend=backend)
+        parsed += 1
+
+    # Keep the output in filename order, PDFs removed from the folder drop out
+    all_data = [results[name] for name in sorted(results)]
+    return all_data, parsed, failed
+
+
+def write_jsonl_output(parsed_results, output_path: str, manifest: dict, manifest_path: str,
+                       current_version: str, entries: dict = None, backend: str = DEFAULT_BACKEND):
+    """
+    Appends every receipt to the JSON Lines file as soon as it is parsed.
+    Records of changed or removed PDFs are dropped first (streaming rewrite),
+    so the file holds exactly one record per PDF in the manifest.
+    Unchanged receipts keep their position; new ones are appended at the end.
+    entries holds the manifest entries of receipts not parsed from a PDF file of their own.
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if os.path.isfile(output_path):
+        kept_names = set()
+
+        def keep(bon):
+            if bon["file"] in manifest and bon["file"] not in kept_names:
+                kept_names.add(bon["file"])
+                return True
+            return False
+
+        rewrite_jsonl(output_path, keep)
+
+    # The manifest must never list a receipt that is not in the file
+    save_manifest(manifest, manifest_path)
 
-    for filename in os.listdir(input_folder):
-        if filename.lower().endswith(".pdf"):
-            pdf_path = os.path.join(input_folder, filename)
-            parsed = parse_receipt(pdf_path)
-            all_data.append(parsed)
+    parsed = failed = 0
+    with open(output_path, "a", encoding="utf-8") as f:
+        try:
+            for pdf_path, receipt, error in parsed_results:
+                if error:
+                    print(f"Failed to parse {pdf_path}: {error}")
+                    failed += 1
+                    continue
+                append_jsonl(f, receipt.to_dict())
+                name = os.path.basename(pdf_path)
+                manifest[name] = (entries or {}).get(name) or make_entry(pdf_path, current_version, backend=backend)
+                parsed += 1
+                if parsed % MANIFEST_SAVE_INTERVAL == 0:
+                    save_manifest(manifest, manifest_path)
+        finally:
+            save_manifest(manifest, manifest_path)
 
-    save_json(all_data, output_file)
-    print(f"Parsing complete. {len(all_data)} PDFs processed.")
+    print(f"Results appended to: {output_path}")
+    return parsed, failed
 
 
 if __name__ == "__main__":
@@ -12,3 +12,67 @@ def save_json(data, filename: str):
         json.dump(data, f, indent=2, ensure_ascii=False)
 
     print(f"Results saved to: {file_path}")
+
+
+def load_json(filename: str):
+    """ Loads previously saved receipt data, or None if the file does not exist """
+    file_path = os.path.join("output", "autogenerated", filename)
+    if not os.path.isfile(file_path):
+        return None
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_receipts(file_path: str):
+    """
+    Yields the receipts of a parsed output file one by one.
+    JSON Lines files (.jsonl) are streamed line by line, so memory stays flat;
+    a .json array has to be loaded completely.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        if not file_path.endswith(".jsonl"):
+            yield from json.load(f)
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a half-written last line behind
+                print(f"Skipping broken line in {file_path}")
+
+
+def append_jsonl(f, record):
+    """ Appends one record to an open JSON Lines file and flushes it to disk right away """
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+
+
+def rewrite_jsonl(file_path: str, keep) -> int:
+    """
+    Streams a JSON Lines file through a temporary file, keeping only the
+    records for which keep(record) is true. Returns the number of kept records.
+    """
+    kept = 0
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for record in iter_receipts(file_path):
+            if keep(record):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                kept += 1
+    os.replace(tmp_path, file_path)
+    return kept
+
+
+def find_parsed_receipts() -> str:
+    """ Returns the most recently written parsed output (.jsonl or .json) in output/autogenerated """
+    output_folder = os.path.join("output", "autogenerated")
+    candidates = [os.path.join(output_folder, name) for name in ("parsed_receipts.jsonl", "parsed_receipts.json")]
+    existing = [path for path in candidates if os.path.isfile(path)]
+    if not existing:
+        return candidates[-1]
+    return max(existing, key=os.path.getmtime)
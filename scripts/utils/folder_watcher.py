@@ -0,0 +1,154 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify(7) event flags: a file was created, written and closed, or moved into the folder
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event: wd, mask, cookie, len, followed by len bytes of name
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """ Reports changed files of a folder through Linux inotify, without polling the folder """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {folder}")
+
+    def changes(self, timeout: float) -> set:
+        """ Waits up to timeout seconds and returns the names of the files changed since the last call """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        names = set()
+        while ready:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # the kernel dropped events: treat every file as changed
+                    names.update(os.listdir(self.folder))
+                elif name:
+                    names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """ Fallback for systems without inotify: compares the size and mtime of the files every call """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        with os.scandir(self.folder) as entries:
+            return {entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in entries if entry.is_file()}
+
+    def changes(self, timeout: float) -> set:
+        time.sleep(timeout)
+        snapshot = self._scan()
+        names = {name for name, signature in snapshot.items() if self.snapshot.get(name) != signature}
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+
+def open_watcher(folder: str, use_inotify: bool = True):
+    """ An InotifyWatcher for folder, or a PollingWatcher where inotify is not available (or not wanted) """
+    if use_inotify:
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(folder)
+
+
+class Debouncer:
+    """
+    Holds back changed files until their size and mtime stayed the same for
+    quiet_period seconds, so a file that is still being written (copied,
+    downloaded, synced) is not picked up halfway.
+    """
+
+    def __init__(self, folder: str, quiet_period: float, clock=time.monotonic):
+        self.folder = folder
+        self.quiet_period = quiet_period
+        self.clock = clock
+        self.pending = {}  # name -> (size, mtime_ns, unchanged since)
+
+    def touch(self, names):
+        """ Marks files as changed; their quiet period starts again """
+        now = self.clock()
+        for name in names:
+            self.pending[name] = (None, None, now)
+
+    def ready(self) -> list:
+        """ Returns (and forgets) the names of the files that were left alone for the quiet period """
+        now = self.clock()
+        ready = []
+        for name, (size, mtime, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                del self.pending[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self.pending[name] = (stat.st_size, stat.st_mtime_ns, since if size is None else now)
+            elif now - since >= self.quiet_period:
+                ready.append(name)
+                del self.pending[name]
+        return sorted(ready)
+
+
+def watch_folder(folder: str, quiet_period: float = 2.0, poll_interval: float = 1.0, use_inotify: bool = True,
+                 stop=None):
+    """
+    Yields lists of names of files in folder that were created or changed and
+    then left alone for quiet_period seconds. The files already in the folder
+    are reported first. Runs until stop (a threading.Event) is set.
+    """
+    watcher = open_watcher(folder, use_inotify)
+    debouncer = Debouncer(folder, quiet_period)
+    debouncer.touch(os.listdir(folder))
+    try:
+        while stop is None or not stop.is_set():
+            # check pending files often enough to report them right after their quiet period
+            timeout = min(poll_interval, quiet_period / 2) if debouncer.pending else poll_interval
+            debouncer.touch(watcher.changes(timeout))
+            ready = debouncer.ready()
+            if ready:
+                yield ready
+    finally:
+        watcher.close()
@@ -1,70 +1,322 @@
 import imaplib
-import email
+import email.header
 import os
-from config import GMAIL_USER, APP_PASS
+import re
+import json
+import base64
+import quopri
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
-# Adjust these:
-GMAIL_USER = GMAIL_USER
-APP_PASS = APP_PASS  # or your normal password if 2FA is off
+IMAP_HOST = "imap.gmail.com"
+IMAP_PORT = 993
+MAILBOX = "INBOX"
 OUTPUT_DIR = "../../receipts/pdfs"  # Folder where we save PDFs
+# Mailbox, UIDVALIDITY and the highest processed UID of the last run
+STATE_FILE = "../../output/autogenerated/mail_state.json"
 
+# Messages from "noreply@app.edeka.de" with subject "EDEKA - Vielen Dank für Ihren Einkauf"
+SEARCH_CRITERIA = ["FROM", '"noreply@app.edeka.de"', "SUBJECT", '"EDEKA - Vielen Dank"']
+# UIDs per FETCH command, and IMAP connections fetching batches in parallel
+BATCH_SIZE = 50
+CONNECTIONS = 3
 
-def download_pdfs_from_gmail():
-    # Ensure the output folder exists
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    # 1) Connect to Gmail IMAP (on port 993 with SSL)
-    mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
-    mail.login(GMAIL_USER, APP_PASS)
-
-    # 2) Select the mailbox. For Gmail, normally "INBOX" works,
-    #    but if your interface is German and "Posteingang" is recognized, try that:
-    mail.select("INBOX")  # or "INBOX" if needed
-
-    # 3) Search for messages from "noreply@app.edeka.de"
-    #    with subject "EDEKA - Vielen Dank für Ihren Einkauf".
-    #    We combine them in a single search command using IMAP syntax:
-    #    (FROM "..." SUBJECT "...")
-    #    Make sure to put them in parentheses.
-    status, msg_ids = mail.search(None, '(FROM "noreply@app.edeka.de" SUBJECT "EDEKA - Vielen Dank")')
-    if status != "OK":
-        print("No matching emails found or an error occurred.")
-        return
-
-    # msg_ids is a space-separated string of email IDs
-    id_list = msg_ids[0].split()
-    print(f"Found {len(id_list)} matching emails in the mailbox.")
-
-    for email_id in id_list:
-        # 4) Fetch the entire email
-        typ, msg_data = mail.fetch(email_id, "(RFC822)")
-        if typ != "OK":
-            print(f"Failed to fetch email ID {email_id}")
+# Tokens of an IMAP response: parentheses, quoted strings and atoms (NIL, numbers, BODY[2], ...)
+TOKEN_PATTERN = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+OPEN, CLOSE = object(), object()
+
+
+def gmail_credentials() -> tuple:
+    """ GMAIL_USER and APP_PASS from config.py (next to this script, or in utils/ when run from scripts/) """
+    try:
+        from config import GMAIL_USER, APP_PASS
+    except ImportError:
+        from utils.config import GMAIL_USER, APP_PASS
+    return GMAIL_USER, APP_PASS  # or your normal password if 2FA is off
+
+
+def gmail_connection(user: str, password: str):
+    """ Returns a factory opening logged in IMAP connections to Gmail (port 993 with SSL) """
+    def connect():
+        mail = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
+        mail.login(user, password)
+        return mail
+    return connect
+
+
+def load_state(state_file: str) -> dict:
+    if os.path.isfile(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state: dict, state_file: str):
+    """ Writes the state atomically so an interrupted run can't corrupt it """
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    tmp_path = state_file + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_file)
+
+
+def _tokens(data):
+    """ Tokens of the response data imaplib returns; literals ({n} + bytes) come as (header, bytes) tuples """
+    for element in data:
+        if isinstance(element, tuple):
+            header, literal = element
+            yield from _tokens([header[:header.rindex(b"{")]])
+            yield literal
             continue
+        for match in TOKEN_PATTERN.finditer(element):
+            opening, closing, quoted, atom = match.groups()
+            if opening:
+                yield OPEN
+            elif closing:
+                yield CLOSE
+            elif quoted is not None:
+                yield re.sub(rb"\\(.)", rb"\1", quoted)
+            elif atom.upper() == b"NIL":
+                yield None
+            else:
+                yield atom.decode("ascii", "replace")
+
+
+def parse_response(data) -> list:
+    """
+    Parses IMAP response data into nested lists. Atoms become str,
+    quoted strings and literals bytes, NIL None.
+    """
+    stack = [[]]
+    for token in _tokens(data):
+        if token is OPEN:
+            stack.append([])
+        elif token is CLOSE and len(stack) > 1:
+            values = stack.pop()
+            stack[-1].append(values)
+        elif token is not CLOSE:
+            stack[-1].append(token)
+    return stack[0]
+
+
+def parse_fetch(data) -> dict:
+    """ Parses the response of a UID FETCH into {uid: {item name: value}} """
+    values = parse_response(data)
+    messages = {}
+    # '<sequence number> (UID 5 BODYSTRUCTURE (...) ...)' per message
+    for items in (value for value in values if isinstance(value, list)):
+        fields = {str(items[i]).upper(): items[i + 1] for i in range(0, len(items) - 1, 2)}
+        if "UID" in fields:
+            messages[int(fields["UID"])] = fields
+    return messages
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    return value
+
+
+def _params(values) -> dict:
+    """ ("name" "a.pdf" "charset" "x") -> {"name": "a.pdf", "charset": "x"} """
+    if not isinstance(values, list):
+        return {}
+    return {_text(values[i]).lower(): _text(values[i + 1]) for i in range(0, len(values) - 1, 2)}
+
+
+def _decode_filename(filename: str) -> str:
+    """ Decodes RFC 2047 encoded words ("=?UTF-8?Q?...?=") in a filename """
+    return str(email.header.make_header(email.header.decode_header(filename)))
+
+
+def pdf_parts(structure, section: str = "") -> list:
+    """
+    Returns (section, filename, encoding) of every PDF attachment in a parsed
+    BODYSTRUCTURE, e.g. [("2", "receipt.pdf", "BASE64")].
+    """
+    if structure and isinstance(structure[0], list):
+        # multipart: the child parts, then the subtype and extension data
+        parts = []
+        number = 1
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            parts += pdf_parts(child, f"{section}.{number}" if section else str(number))
+            number += 1
+        return parts
+
+    # single part: type, subtype, parameters, id, description, encoding, size, ...
+    if len(structure) < 7:
+        return []
+    main_type = _text(structure[0]).lower()
+    # text parts have an extra line count, message/rfc822 an envelope, body and line count
+    extension = {"text": 8, "message": 10}.get(main_type, 7)
+    # extension data: md5, then the disposition ("attachment" ("filename" "a.pdf"))
+    disposition = structure[extension + 1] if len(structure) > extension + 1 else None
+    filename = ""
+    if isinstance(disposition, list) and disposition:
+        if _text(disposition[0]).lower() != "attachment":
+            return []
+        filename = _params(disposition[1] if len(disposition) > 1 else None).get("filename", "")
+    filename = filename or _params(structure[2]).get("name", "")
+    filename = _decode_filename(filename) if filename else ""
+    if not filename.lower().endswith(".pdf"):
+        return []
+    return [(section or "1", os.path.basename(filename), _text(structure[5]).upper())]
+
+
+def decode_part(data: bytes, encoding: str) -> bytes:
+    """ Decodes a body part by its Content-Transfer-Encoding """
+    if encoding == "BASE64":
+        return base64.b64decode(data)
+    if encoding == "QUOTED-PRINTABLE":
+        return quopri.decodestring(data)
+    return data
+
+
+def save_pdf(filename: str, data: bytes, output_dir: str = OUTPUT_DIR) -> bool:
+    """ Saves a downloaded PDF unless a file with that name already exists; returns whether it was saved """
+    file_path = os.path.join(output_dir, filename)
+    try:
+        # 'x' fails if the file exists, also when two connections race for the same name
+        with open(file_path, "xb") as f:
+            f.write(data)
+    except FileExistsError:
+        print(f"File already exists, skipped: {file_path}")
+        return False
+    print(f"Downloaded: {file_path}")
+    return True
+
+
+def search_new_uids(mail, last_uid: int) -> list:
+    """ UIDs of the matching messages above last_uid, ascending """
+    status, data = mail.uid("SEARCH", "UID", f"{last_uid + 1}:*", *SEARCH_CRITERIA)
+    if status != "OK":
+        raise imaplib.IMAP4.error(f"UID SEARCH failed: {data}")
+    # 'n:*' always includes the highest UID in the mailbox, even when it is below n
+    return sorted(uid for uid in map(int, b" ".join(data).split()) if uid > last_uid)
+
+
+def fetch_batch(mail, uids: list, handle_attachment) -> int:
+    """
+    Fetches the PDF attachments of one batch of messages: first the BODYSTRUCTUREs,
+    then only the attachment body parts (BODY.PEEK, so nothing is marked as read).
+    Returns the number of attachments passed to handle_attachment(filename, data).
+    Raises imaplib.IMAP4.error when the server leaves out an attachment.
+    """
+    uid_set = ",".join(map(str, uids))
+    status, data = mail.uid("FETCH", uid_set, "(BODYSTRUCTURE)")
+    if status != "OK":
+        raise imaplib.IMAP4.error(f"UID FETCH failed: {data}")
+    parts = {uid: pdf_parts(fields["BODYSTRUCTURE"]) for uid, fields in parse_fetch(data).items()}
+
+    # one FETCH per part layout; receipts mails all look alike, so usually just one
+    layouts = {}
+    for uid in uids:
+        if parts.get(uid):
+            layouts.setdefault(tuple(section for section, _, _ in parts[uid]), []).append(uid)
+
+    count = 0
+    for sections, layout_uids in layouts.items():
+        items = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+        status, data = mail.uid("FETCH", ",".join(map(str, layout_uids)), f"({items})")
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"UID FETCH failed: {data}")
+        bodies = parse_fetch(data)
+        for uid in layout_uids:
+            for section, filename, encoding in parts[uid]:
+                body = bodies.get(uid, {}).get(f"BODY[{section}]")
+                if body is None:
+                    # the batch must not count as done, or this receipt would never be fetched again
+                    raise imaplib.IMAP4.error(f"Failed to fetch part {section} of email UID {uid}")
+                if isinstance(body, str):
+                    body = body.encode("ascii")
+                handle_attachment(filename, decode_part(body, encoding))
+                count += 1
+    return count
+
+
+def download_attachments(connect, handle_attachment, state_file: str = STATE_FILE, mailbox: str = MAILBOX,
+                         batch_size: int = BATCH_SIZE, connections: int = CONNECTIONS) -> int:
+    """
+    Passes the PDF attachments of all receipt mails not seen by an earlier run to
+    handle_attachment(filename, data) and returns their number.
+
+    connect() must return a logged in imaplib connection. The highest processed UID
+    is kept in state_file together with the mailbox's UIDVALIDITY; when the server
+    changes UIDVALIDITY, the UIDs are meaningless and all mails are fetched again.
+    Batches of batch_size UIDs are fetched over up to `connections` connections.
+    """
+    # 1) Find the new messages
+    mail = connect()
+    pool = queue.Queue()
+    try:
+        mail.select(mailbox, readonly=True)
+        uidvalidity = mail.response("UIDVALIDITY")[1][0]
+        uidvalidity = int(uidvalidity) if uidvalidity else None
+        state = load_state(state_file)
+        if state.get("mailbox") != mailbox or state.get("uidvalidity") != uidvalidity:
+            state = {"mailbox": mailbox, "uidvalidity": uidvalidity, "last_uid": 0}
+        uids = search_new_uids(mail, state["last_uid"])
+        print(f"Found {len(uids)} new matching emails in the mailbox.")
+        pool.put(mail)
+
+        # 2) Fetch the batches over a small pool of connections
+        batches = [uids[start:start + batch_size] for start in range(0, len(uids), batch_size)]
+        opened = [mail]
+
+        def run(batch):
+            try:
+                connection = pool.get_nowait()
+            except queue.Empty:
+                connection = connect()
+                opened.append(connection)
+                connection.select(mailbox, readonly=True)
+            try:
+                return fetch_batch(connection, batch, handle_attachment)
+            finally:
+                pool.put(connection)
+
+        count = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(connections, len(batches)))) as executor:
+                futures = [executor.submit(run, batch) for batch in batches]
+                # 3) Advance the state in UID order, so an interrupted run resumes
+                #    after the last batch that completed together with all before it
+                for batch, future in zip(batches, futures):
+                    count += future.result()
+                    state["last_uid"] = batch[-1]
+                    save_state(state, state_file)
+        finally:
+            for connection in opened[1:]:
+                _logout(connection)
+    finally:
+        _logout(mail)
+    save_state(state, state_file)
+    return count
+
+
+def _logout(mail):
+    try:
+        if mail.state == "SELECTED":
+            mail.close()
+        mail.logout()
+    except (imaplib.IMAP4.error, OSError):
+        pass
+
+
+def download_pdfs_from_gmail(output_dir: str = OUTPUT_DIR, state_file: str = STATE_FILE):
+    # Ensure the output folder exists
+    os.makedirs(output_dir, exist_ok=True)
 
-        # 5) Parse the email content
-        raw_email = msg_data[0][1]
-        msg = email.message_from_bytes(raw_email)
-
-        # 6) Check each part of the email to find PDF attachments
-        for part in msg.walk():
-            # Check for attachment via content disposition
-            content_disposition = str(part.get("Content-Disposition") or "")
-            if "attachment" in content_disposition:
-                filename = part.get_filename()
-                if filename and filename.lower().endswith(".pdf"):
-                    # 7) Save the PDF
-                    file_path = os.path.join(OUTPUT_DIR, filename)
-                    if not os.path.isfile(file_path):
-                        with open(file_path, "wb") as f:
-                            f.write(part.get_payload(decode=True))
-                        print(f"Downloaded: {file_path}")
-                    else:
-                        print(f"File already exists, skipped: {file_path}")
-
-    # 8) Logout
-    mail.close()
-    mail.logout()
+    # For Gmail, normally "INBOX" works, but if your interface is German
+    # and "Posteingang" is recognized, try that as mailbox
+    count = download_attachments(gmail_connection(*gmail_credentials()),
+                                 lambda filename, data: save_pdf(filename, data, output_dir),
+                                 state_file=state_file)
+    print(f"Processed {count} PDF attachments.")
 
 
 if __name__ == "__main__":
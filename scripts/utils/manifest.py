@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+
+
+def file_sha256(path: str) -> str:
+    """ Returns the SHA-256 hex digest of a file's content """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_entry(path: str, parser_version: str, sha256: str = None, backend: str = None) -> dict:
+    """
+    Creates the manifest entry describing a freshly parsed PDF.
+    Pass the content hash when it is known, e.g. for a PDF parsed from memory,
+    to not read the file again. backend is the text extraction engine used.
+    """
+    stat = os.stat(path)
+    return {
+        "path": path,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256 or file_sha256(path),
+        "parser_version": parser_version,
+        "backend": backend
+    }
+
+
+def is_entry_current(entry, path: str, parser_version: str, backend: str = None) -> bool:
+    """
+    Checks whether a manifest entry still describes the PDF at 'path'
+    and was produced by the current parser version and extraction backend
+    (entries written before the backend was recorded are not current).
+    Size and mtime are compared first; the content hash is only computed
+    when the mtime changed (e.g. the file was copied or touched).
+    """
+    if not entry or entry.get("parser_version") != parser_version or entry.get("backend") != backend:
+        return False
+
+    stat = os.stat(path)
+    if stat.st_size != entry.get("size"):
+        return False
+    if stat.st_mtime == entry.get("mtime"):
+        return True
+
+    if file_sha256(path) != entry.get("sha256"):
+        return False
+
+    # Same content, only the timestamp moved: remember the new mtime
+    entry["mtime"] = stat.st_mtime
+    entry["path"] = path
+    return True
+
+
+def load_manifest(manifest_path: str) -> dict:
+    """ Loads the manifest (file name -> entry), or an empty one if there is none yet """
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, manifest_path: str):
+    """ Writes the manifest atomically so an interrupted run can't corrupt it """
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
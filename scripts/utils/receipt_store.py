@@ -0,0 +1,97 @@
+import os
+import sqlite3
+from datetime import datetime
+
+STORE_FILE = os.path.join("output", "autogenerated", "parsed_receipts.sqlite")
+
+# One row per receipt and one per item. 'day' is the receipt date as ISO "yyyy-mm-dd"
+# (the "dd.mm.yy" date does not sort), so date ranges are index range scans.
+# The primary key of items starts with file, so it is the index on file as well;
+# item names are indexed case-insensitively (NOCASE folds A-Z only).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    file TEXT PRIMARY KEY,
+    date TEXT,
+    time TEXT,
+    day TEXT,
+    sum REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    file TEXT NOT NULL REFERENCES receipts (file) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    quantity REAL,
+    unit_price REAL,
+    total_price REAL,
+    PRIMARY KEY (file, position)
+);
+CREATE INDEX IF NOT EXISTS receipts_day ON receipts (day);
+CREATE INDEX IF NOT EXISTS items_name ON items (name COLLATE NOCASE);
+"""
+
+
+def open_store(db_file: str = STORE_FILE) -> sqlite3.Connection:
+    """ Opens (and creates) the SQLite receipt store """
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def iso_day(date: str):
+    """ "10.02.24" -> "2024-02-10", None for a missing or unparseable date """
+    try:
+        return datetime.strptime(date, "%d.%m.%y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def upsert_receipts(conn: sqlite3.Connection, receipts) -> int:
+    """
+    Inserts receipt dicts (Receipt.to_dict()) or replaces the stored receipt with
+    the same file, items included. Commit with 'with conn:'. Returns the number of receipts.
+    """
+    count = 0
+    for bon in receipts:
+        file = bon.get("file", "")
+        conn.execute("INSERT INTO receipts (file, date, time, day, sum) VALUES (?, ?, ?, ?, ?) "
+                     "ON CONFLICT (file) DO UPDATE SET date = excluded.date, time = excluded.time, "
+                     "day = excluded.day, sum = excluded.sum",
+                     (file, bon.get("date"), bon.get("time"), iso_day(bon.get("date")), bon.get("sum", 0.0)))
+        conn.execute("DELETE FROM items WHERE file = ?", (file,))
+        conn.executemany("INSERT INTO items (file, position, name, quantity, unit_price, total_price) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         [(file, position, item.get("name", ""), item.get("quantity", 1),
+                           item.get("unit_price", 0.0), item.get("total_price", 0.0))
+                          for position, item in enumerate(bon.get("items", []))])
+        count += 1
+    return count
+
+
+def delete_receipts(conn: sqlite3.Connection, files):
+    """ Removes receipts (and their items) by file """
+    conn.executemany("DELETE FROM receipts WHERE file = ?", [(file,) for file in files])
+
+
+def stored_files(conn: sqlite3.Connection) -> set:
+    return {file for file, in conn.execute("SELECT file FROM receipts")}
+
+
+def sync_store(conn: sqlite3.Connection, files, receipts) -> tuple:
+    """
+    Makes the store hold exactly the receipts of files: others are deleted,
+    missing ones (e.g. the store is new) are taken from receipts, the parsed
+    output (e.g. a streamed file), which is only read when something is missing.
+    Returns the number of added and removed receipts.
+    """
+    files = set(files)
+    stored = stored_files(conn)
+    removed = stored - files
+    missing = files - stored
+    with conn:
+        delete_receipts(conn, removed)
+        added = 0
+        if missing:
+            added = upsert_receipts(conn, (bon for bon in receipts if bon.get("file") in missing))
+    return added, len(removed)
@@ -0,0 +1,97 @@
+import csv
+from itertools import islice
+
+import pandas as pd
+
+# One row per item, in the column order of parsed_receipts.csv
+COLUMNS = [
+    "file",
+    "date",
+    "time",
+    "item_name",
+    "quantity",
+    "unit_price",
+    "total_price",
+    "bon_sum"
+]
+
+
+def flatten_receipts(receipts) -> dict:
+    """
+    Flattens receipts (any iterable, e.g. a streamed JSON Lines file)
+    into one list per column in a single pass.
+    """
+    columns = {name: [] for name in COLUMNS}
+    file_col, date_col, time_col, bon_sum_col = columns["file"], columns["date"], columns["time"], columns["bon_sum"]
+    name_col, quantity_col = columns["item_name"], columns["quantity"]
+    unit_price_col, total_price_col = columns["unit_price"], columns["total_price"]
+
+    for bon in receipts:
+        items = bon.get("items", [])
+        count = len(items)
+        file_col.extend([bon.get("file", "")] * count)
+        date_col.extend([bon.get("date", "")] * count)
+        time_col.extend([bon.get("time", "")] * count)
+        bon_sum_col.extend([bon.get("sum", 0.0)] * count)
+
+        for item in items:
+            name_col.append(item.get("name", ""))
+            quantity_col.append(item.get("quantity", 1))
+            unit_price_col.append(item.get("unit_price", 0.0))
+            total_price_col.append(item.get("total_price", 0.0))
+
+    return columns
+
+
+def iter_column_chunks(receipts, chunk_size: int = 1000):
+    """
+    Flattens receipts chunk by chunk (chunk_size receipts at a time),
+    so a streamed input never has to be held in memory completely.
+    """
+    receipts = iter(receipts)
+    while chunk := list(islice(receipts, chunk_size)):
+        yield flatten_receipts(chunk)
+
+
+def write_items_csv(receipts, csv_file: str, chunk_size: int = 1000) -> int:
+    """
+    Writes one CSV row per item (columns COLUMNS) and returns the number of rows.
+    Each chunk of receipts is flattened into columns and written in one
+    writerows call instead of building and writing a dict per item.
+    """
+    rows = 0
+    with open(csv_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for columns in iter_column_chunks(receipts, chunk_size):
+            writer.writerows(zip(*columns.values()))
+            rows += len(columns["file"])
+    return rows
+
+
+def receipts_to_frame(receipts) -> pd.DataFrame:
+    """
+    Builds the typed item table: float quantities and prices, categorical
+    item names and a 'timestamp' column combining date and time.
+    date and time stay "dd.mm.yy" / "hh:mm" strings like in the CSV.
+    """
+    columns = flatten_receipts(receipts)
+    df = pd.DataFrame({
+        "file": pd.Series(columns["file"], dtype="string"),
+        "date": pd.Series(columns["date"], dtype="string"),
+        "time": pd.Series(columns["time"], dtype="string"),
+        "item_name": pd.Series(columns["item_name"], dtype="category"),
+        "quantity": pd.Series(columns["quantity"], dtype="float64"),
+        "unit_price": pd.Series(columns["unit_price"], dtype="float64"),
+        "total_price": pd.Series(columns["total_price"], dtype="float64"),
+        "bon_sum": pd.Series(columns["bon_sum"], dtype="float64"),
+    })
+    # same parsing as analysis/load_data.add_timestamp
+    df["timestamp"] = pd.to_datetime(df["date"] + " " + df["time"].fillna("00:00"), format="%d.%m.%y %H:%M",
+                                     errors="coerce")
+    return df
+
+
+def save_parquet(df: pd.DataFrame, parquet_file: str):
+    """ Writes the item table as compressed Parquet (needs pyarrow) """
+    df.to_parquet(parquet_file, index=False, compression="zstd")
@@ -0,0 +1,190 @@
+import os
+import sys
+import queue
+import hashlib
+import argparse
+import threading
+
+from parsers.batch_parser import parse_receipt_queue
+from parsers.receipt_parser import parser_version, DEFAULT_BACKEND, EXTRACTION_BACKENDS
+from utils.file_handler import iter_receipts, append_jsonl, rewrite_jsonl
+from utils.folder_watcher import watch_folder
+from utils.manifest import load_manifest, save_manifest, make_entry, is_entry_current
+from utils.receipt_table import receipts_to_frame
+from utils.receipt_store import open_store, upsert_receipts
+from read_receipt import OUTPUT_FILES, MANIFEST_FILES
+
+# the aggregate cache (aggregate_cache.py) lives with the analysis scripts, which import each other by module name
+ANALYSIS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analysis")
+
+# Receipts parsed before the manifest, the records of changed PDFs and the aggregate
+# tables are written, when more PDFs are waiting (otherwise they are written right away)
+BATCH_SIZE = 50
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Watch the receipts folder and parse new PDFs as they arrive. The receipts are appended "
+                    "to parsed_receipts.jsonl and the SQLite store and added to the analysis aggregates. "
+                    "Don't run read_receipt.py --format jsonl at the same time. Stop with Ctrl+C.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="number of parallel parser processes (0 = one per CPU core)")
+    arg_parser.add_argument("--backlog", type=int, default=100,
+                            help="PDFs read and waiting for a parser at most; the watcher pauses while it is full "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--quiet-period", type=float, default=2.0,
+                            help="seconds a file must stay unchanged before it is parsed, so partially written "
+                                 "files are skipped (default: %(default)s)")
+    arg_parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="seconds between folder scans without inotify (default: %(default)s)")
+    arg_parser.add_argument("--polling", action="store_true",
+                            help="scan the folder instead of using inotify (e.g. for network drives)")
+    arg_parser.add_argument("--backend", choices=sorted(EXTRACTION_BACKENDS), default=DEFAULT_BACKEND,
+                            help="PDF text extraction engine (default: %(default)s)")
+    args = arg_parser.parse_args(argv)
+
+    if ANALYSIS_FOLDER not in sys.path:
+        sys.path.append(ANALYSIS_FOLDER)
+
+    input_folder = "receipts/pdfs/"
+    output_path = os.path.join("output", "autogenerated", OUTPUT_FILES["jsonl"])
+    manifest_path = os.path.join("output", "autogenerated", MANIFEST_FILES["jsonl"])
+    text_cache_dir = os.path.join("output", "autogenerated", "text_cache")
+    os.makedirs(input_folder, exist_ok=True)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    # Same bookkeeping as read_receipt.py --format jsonl, so either can continue where the other stopped.
+    # The files are not locked: don't run both at the same time.
+    manifest = load_manifest(manifest_path)
+    written = set()
+    if os.path.isfile(output_path):
+        written = {bon["file"] for bon in iter_receipts(output_path)}
+    current_version = parser_version()
+
+    pdfs = queue.Queue(maxsize=max(1, args.backlog))
+    entries = {}
+    stop = threading.Event()
+    watcher = threading.Thread(target=queue_new_pdfs, daemon=True,
+                               args=(input_folder, pdfs, manifest, written, entries, current_version, stop),
+                               kwargs={"backend": args.backend, "quiet_period": args.quiet_period,
+                                       "poll_interval": args.poll_interval, "use_inotify": not args.polling})
+    watcher.start()
+    print(f"Watching {input_folder} for new receipts, stop with Ctrl+C.")
+
+    results = parse_receipt_queue(pdfs, workers=args.workers, text_cache_dir=text_cache_dir,
+                                  backend=args.backend)
+    store = open_store()
+    try:
+        ingest(results, pdfs, output_path, manifest, manifest_path, written, entries, current_version, store,
+               backend=args.backend)
+    except KeyboardInterrupt:
+        print("Stopping.")
+    finally:
+        stop.set()
+        save_manifest(manifest, manifest_path)
+        store.close()
+
+
+def queue_new_pdfs(input_folder: str, pdfs: queue.Queue, manifest: dict, written: set, entries: dict,
+                   current_version: str, stop: threading.Event, backend: str = DEFAULT_BACKEND, **watch_options):
+    """
+    Puts (pdf_path, data) of every new or changed PDF onto pdfs once it was left alone
+    for the quiet period; unchanged receipts (current manifest entry) are skipped.
+    Waits while pdfs is full. Puts None when stop is set.
+    """
+    try:
+        for names in watch_folder(input_folder, stop=stop, **watch_options):
+            for name in names:
+                pdf_path = os.path.join(input_folder, name)
+                if not name.lower().endswith(".pdf"):
+                    continue
+                try:
+                    if name in written and is_entry_current(manifest.get(name), pdf_path, current_version, backend):
+                        continue
+                    with open(pdf_path, "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+                entries[name] = make_entry(pdf_path, current_version, hashlib.sha256(data).hexdigest(), backend)
+                while not stop.is_set():
+                    try:
+                        pdfs.put((pdf_path, data), timeout=1.0)
+                        break
+                    except queue.Full:
+                        pass
+    finally:
+        try:
+            pdfs.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+def ingest(results, pdfs: queue.Queue, output_path: str, manifest: dict, manifest_path: str, written: set,
+           entries: dict, current_version: str, store=None, cache_folder: str = None,
+           backend: str = DEFAULT_BACKEND) -> tuple:
+    """
+    Appends every new receipt to the JSON Lines file and upserts it into the SQLite store right away.
+    A re-parsed receipt replaces its old record. The records of changed PDFs, the manifest and
+    the aggregate tables are written once no more PDFs are waiting, or every BATCH_SIZE receipts,
+    so a burst of PDFs does not rewrite the whole history per receipt.
+    Returns the number of parsed and failed receipts.
+    """
+    parsed = failed = 0
+    batch = []
+    replaced = {}
+    try:
+        for pdf_path, receipt, error in results:
+            name = os.path.basename(pdf_path)
+            if error:
+                print(f"Failed to parse {pdf_path}: {error}")
+                failed += 1
+                continue
+
+            bon = receipt.to_dict()
+            entry = entries.pop(name, None) or make_entry(pdf_path, current_version, backend=backend)
+            if name in written:
+                # changed PDF: the file holds one record per receipt, the old ones are dropped batch-wise
+                replaced[name] = (bon, entry)
+            else:
+                with open(output_path, "a", encoding="utf-8") as f:
+                    append_jsonl(f, bon)
+                written.add(name)
+                manifest[name] = entry
+            if store is not None:
+                with store:
+                    upsert_receipts(store, [bon])
+            parsed += 1
+            print(f"Parsed {name}")
+
+            batch.append(bon)
+            if pdfs.empty() or len(batch) >= BATCH_SIZE:
+                write_batch(batch, replaced, output_path, manifest, manifest_path, cache_folder)
+                batch, replaced = [], {}
+    finally:
+        if batch:
+            write_batch(batch, replaced, output_path, manifest, manifest_path, cache_folder)
+    return parsed, failed
+
+
+def write_batch(batch: list, replaced: dict, output_path: str, manifest: dict, manifest_path: str,
+                cache_folder: str = None):
+    """
+    Replaces the records of the changed PDFs (name -> (record, manifest entry)) with one
+    rewrite of the JSON Lines file, saves the manifest and adds the receipts of the batch
+    to the aggregate tables (in cache_folder, default: the one of the analysis scripts).
+    The analysis folder has to be on sys.path, main() puts it there.
+    """
+    from aggregate_cache import add_to_aggregates, CACHE_FOLDER
+
+    if replaced:
+        rewrite_jsonl(output_path, lambda bon: bon["file"] not in replaced)
+        with open(output_path, "a", encoding="utf-8") as f:
+            for name, (bon, entry) in replaced.items():
+                append_jsonl(f, bon)
+                manifest[name] = entry
+    save_manifest(manifest, manifest_path)
+    add_to_aggregates(receipts_to_frame(batch), cache_folder or CACHE_FOLDER)
+
+
+if __name__ == "__main__":
+    main()
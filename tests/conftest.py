@@ -0,0 +1,14 @@
+import pytest
+
+# The synthetic receipt PDFs are shared with the benchmarks
+from benchmarks.fixtures import make_receipt_pdf, SAMPLE_RECEIPT_LINES
+
+
+@pytest.fixture
+def receipt_pdf_factory(tmp_path):
+    """ Returns a function writing a receipt PDF with the given lines into tmp_path """
+    def factory(filename, lines=SAMPLE_RECEIPT_LINES):
+        pdf_path = tmp_path / filename
+        pdf_path.write_bytes(make_receipt_pdf(lines))
+        return str(pdf_path)
+    return factory
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The analysis scripts are run from scripts/analysis and import their siblings
+# by module name (from load_data import ...), so make them importable the same way.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "analysis"))
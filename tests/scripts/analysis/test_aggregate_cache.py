@@ -0,0 +1,120 @@
+import os
+import pandas as pd
+import pytest
+from scripts.analysis.aggregate_cache import update_aggregates, add_to_aggregates
+from scripts.analysis.analysis_engine import receipt_tables, item_tables
+from scripts.analysis.overall_analysis import analyze_overall_purchases
+from scripts.analysis.receipt_analysis import spending_per_receipt, calculate_daily_spending, calculate_daily_items
+
+
+def item_rows(file, date, time, items):
+    bon_sum = round(sum(total for _, _, total in items), 2)
+    return [{"file": file, "date": date, "time": time, "item_name": name, "quantity": quantity,
+             "unit_price": round(total / quantity, 2), "total_price": total, "bon_sum": bon_sum}
+            for name, quantity, total in items]
+
+
+RECEIPT_A = item_rows("a.pdf", "10.02.24", "14:35", [("Banana", 2, 3.98), ("Tomaten", 0.48, 1.44)])
+RECEIPT_B = item_rows("b.pdf", "10.02.24", "18:00", [("Banana", 1, 1.99), ("Pizza", 2, 2.38)])
+RECEIPT_C = item_rows("c.pdf", "11.02.24", "09:05", [("Gurken", 4, 1.96), ("Pizza", 1, 1.19)])
+
+
+def frame(*receipts):
+    return pd.DataFrame([row for receipt in receipts for row in receipt])
+
+
+def assert_matches_groupby(aggregates, df):
+    daily_spend, daily_items, spend_per_bon = receipt_tables(aggregates)
+    pd.testing.assert_frame_equal(daily_spend, calculate_daily_spending(df))
+    pd.testing.assert_frame_equal(daily_items, calculate_daily_items(df), check_dtype=False)
+    pd.testing.assert_frame_equal(spend_per_bon, spending_per_receipt(df))
+
+    item_stats, most_bought, highest_spend = item_tables(aggregates)
+    expected_stats, expected_bought, expected_spend = analyze_overall_purchases(df)
+    pd.testing.assert_frame_equal(item_stats, expected_stats, check_dtype=False)
+    assert most_bought["item_name"].tolist()[:2] == expected_bought["item_name"].tolist()[:2]
+    assert highest_spend["item_name"].tolist() == expected_spend["item_name"].tolist()
+
+
+@pytest.fixture
+def cache_folder(tmp_path):
+    return str(tmp_path / "aggregates")
+
+
+def test_first_run_matches_groupby(cache_folder):
+    df = frame(RECEIPT_A, RECEIPT_B)
+
+    assert_matches_groupby(update_aggregates(df, cache_folder), df)
+
+
+def test_appended_receipts(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    df = frame(RECEIPT_A, RECEIPT_B, RECEIPT_C)
+
+    assert_matches_groupby(update_aggregates(df, cache_folder), df)
+
+
+def test_only_new_receipts_are_grouped(cache_folder, monkeypatch):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    grouped = []
+
+    import scripts.analysis.aggregate_cache as aggregate_cache
+    compute = aggregate_cache.aggregate
+    monkeypatch.setattr(aggregate_cache, "aggregate",
+                        lambda rows, **kwargs: grouped.append(sorted(set(rows["file"]))) or compute(rows, **kwargs))
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B, RECEIPT_C), cache_folder)
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B, RECEIPT_C), cache_folder)
+
+    assert grouped == [["c.pdf"]]
+
+
+def test_changed_and_removed_receipts(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B, RECEIPT_C), cache_folder)
+    reparsed_b = item_rows("b.pdf", "10.02.24", "18:00", [("Banana", 3, 5.97)])
+    df = frame(RECEIPT_A, reparsed_b)
+
+    aggregates = update_aggregates(df, cache_folder)
+
+    assert_matches_groupby(aggregates, df)
+    assert "Gurken" not in set(aggregates["items"]["item_name"])
+
+
+def test_reparsed_receipt_with_the_same_sum(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    renamed_b = item_rows("b.pdf", "10.02.24", "18:00", [("Banane", 1, 1.99), ("Pizza", 2, 2.38)])
+    df = frame(RECEIPT_A, renamed_b)
+
+    aggregates = update_aggregates(df, cache_folder)
+
+    assert_matches_groupby(aggregates, df)
+    assert "Banane" in set(aggregates["items"]["item_name"])
+
+
+def test_moved_receipt_with_the_same_sum(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    moved_b = item_rows("b.pdf", "11.02.24", "18:00", [("Banana", 1, 1.99), ("Pizza", 2, 2.38)])
+    df = frame(RECEIPT_A, moved_b)
+
+    assert_matches_groupby(update_aggregates(df, cache_folder), df)
+
+
+def test_cache_without_fingerprints_is_rebuilt(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    receipts_csv = os.path.join(cache_folder, "receipts.csv")
+    pd.read_csv(receipts_csv).drop(columns="fingerprint").to_csv(receipts_csv, index=False)
+    df = frame(RECEIPT_A, RECEIPT_B, RECEIPT_C)
+
+    assert_matches_groupby(update_aggregates(df, cache_folder), df)
+    assert pd.read_csv(receipts_csv)["fingerprint"].notna().all()
+
+
+def test_add_to_aggregates(cache_folder):
+    update_aggregates(frame(RECEIPT_A, RECEIPT_B), cache_folder)
+    reparsed_b = item_rows("b.pdf", "10.02.24", "18:00", [("Banana", 3, 5.97)])
+
+    add_to_aggregates(frame(RECEIPT_C), cache_folder)
+    aggregates = add_to_aggregates(frame(reparsed_b), cache_folder)
+
+    assert_matches_groupby(aggregates, frame(RECEIPT_A, reparsed_b, RECEIPT_C))
+    assert update_aggregates(frame(RECEIPT_A, reparsed_b, RECEIPT_C), cache_folder)["receipts"].equals(
+        aggregates["receipts"])
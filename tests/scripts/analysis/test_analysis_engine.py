@@ -0,0 +1,115 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.analysis.analysis_engine import aggregate, receipt_tables, item_tables
+from scripts.analysis.overall_analysis import analyze_overall_purchases
+from scripts.analysis.receipt_analysis import spending_per_receipt, calculate_daily_spending, calculate_daily_items
+
+NAMES = ["Banana", "Tomaten", "Pizza", "Gurken", "Zucchini", "Oatly Hafer Aufst.", "Milch"]
+
+
+def random_frame(seed, receipts=40):
+    rng = random.Random(seed)
+    rows = []
+    for n in range(receipts):
+        date = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.24"
+        time = f"{rng.randint(8, 20):02d}:{rng.randint(0, 59):02d}"
+        items = []
+        for _ in range(rng.randint(1, 6)):
+            quantity = rng.choice([1, 2, 3, round(rng.uniform(0.1, 2), 3)])
+            unit_price = round(rng.uniform(0.19, 9.99), 2)
+            items.append((rng.choice(NAMES), quantity, unit_price, round(quantity * unit_price, 2)))
+        bon_sum = round(sum(item[3] for item in items), 2)
+        rows += [{"file": f"{n:03d}.pdf", "date": date, "time": time, "item_name": name, "quantity": quantity,
+                  "unit_price": unit_price, "total_price": total, "bon_sum": bon_sum}
+                 for name, quantity, unit_price, total in items]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_groupby(seed):
+    df = random_frame(seed)
+    daily_spend, daily_items, spend_per_bon = receipt_tables(aggregate(df))
+    pd.testing.assert_frame_equal(daily_spend, calculate_daily_spending(df))
+    pd.testing.assert_frame_equal(daily_items, calculate_daily_items(df))
+    pd.testing.assert_frame_equal(spend_per_bon, spending_per_receipt(df))
+
+    item_stats, most_bought, highest_spend = item_tables(aggregate(df))
+    expected_stats, expected_bought, expected_spend = analyze_overall_purchases(df)
+    pd.testing.assert_frame_equal(item_stats, expected_stats, check_dtype=False)
+    pd.testing.assert_frame_equal(most_bought.reset_index(drop=True),
+                                  expected_bought.reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(highest_spend.reset_index(drop=True),
+                                  expected_spend.reset_index(drop=True), check_dtype=False)
+
+
+def test_categorical_item_names():
+    df = random_frame(1)
+    expected = aggregate(df)["items"]
+
+    df["item_name"] = df["item_name"].astype("category")
+
+    pd.testing.assert_frame_equal(aggregate(df)["items"], expected)
+
+
+def test_receipt_rows():
+    df = random_frame(2, receipts=3)
+
+    receipts = aggregate(df)["receipts"]
+
+    assert receipts["file"].tolist() == ["000.pdf", "001.pdf", "002.pdf"]
+    for receipt in receipts.itertuples():
+        rows = df[df["file"] == receipt.file]
+        assert (receipt.date, receipt.time, receipt.bon_sum) == tuple(rows.iloc[0][["date", "time", "bon_sum"]])
+        assert receipt.spend_cents == round(rows["total_price"].sum() * 100)
+
+
+def test_receipt_items():
+    df = random_frame(3)
+
+    receipt_items = aggregate(df, with_receipt_items=True)["receipt_items"]
+
+    expected = df.groupby(["file", "item_name"])["total_price"].sum().mul(100).round().astype("int64")
+    actual = receipt_items.set_index(["file", "item_name"])["spend_cents"].sort_index()
+    assert actual.tolist() == expected.tolist()
+    assert actual.index.tolist() == expected.index.tolist()
+
+
+def test_receipts_without_date_are_skipped():
+    df = random_frame(4, receipts=5)
+    df.loc[df["file"] == "001.pdf", ["date", "time"]] = np.nan
+
+    daily_spend, _, spend_per_bon = receipt_tables(aggregate(df))
+
+    assert "001.pdf" not in set(spend_per_bon["file"])
+    pd.testing.assert_frame_equal(daily_spend, calculate_daily_spending(df))
+
+
+def test_receipts_without_time_count_per_day():
+    df = random_frame(4, receipts=5)
+    df.loc[df["file"] == "001.pdf", "time"] = np.nan
+
+    daily_spend, _, spend_per_bon = receipt_tables(aggregate(df))
+
+    assert "001.pdf" not in set(spend_per_bon["file"])
+    pd.testing.assert_frame_equal(daily_spend, calculate_daily_spending(df))
+
+
+def test_rows_without_item_name():
+    df = random_frame(6, receipts=5)
+    df.loc[0, "item_name"] = np.nan
+
+    aggregates = aggregate(df, with_receipt_items=True)
+
+    item_stats, _, _ = item_tables(aggregates)
+    pd.testing.assert_frame_equal(item_stats, analyze_overall_purchases(df)[0], check_dtype=False)
+    assert aggregates["receipts"]["spend_cents"].sum() == round(df["total_price"].sum() * 100)
+
+
+def test_empty_frame():
+    df = random_frame(5).iloc[:0]
+
+    aggregates = aggregate(df, with_receipt_items=True)
+
+    assert all(table.empty for table in aggregates.values())
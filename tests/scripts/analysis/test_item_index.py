@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.analysis.item_index import ItemIndex, item_rows
+from scripts.analysis.item_analysis import single_item_over_time
+
+NAMES = ["Gurken", "gurken", "GURKEN", "Banana", "Pizza", "Oatly Hafer Aufst."]
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(1)
+    names = rng.choice(NAMES, 500).astype(object)
+    names[::37] = np.nan
+    return pd.DataFrame({"item_name": names, "unit_price": rng.integers(19, 999, 500) / 100},
+                        index=rng.permutation(1000)[:500])
+
+
+@pytest.mark.parametrize("name", NAMES + ["Zucchini"])
+def test_rows_match_boolean_mask(df, name):
+    index = ItemIndex(df)
+
+    pd.testing.assert_frame_equal(index.rows(name), df[df["item_name"] == name])
+    pd.testing.assert_frame_equal(index.rows(name, ignore_case=True),
+                                  df[df["item_name"].str.lower() == name.lower()])
+
+
+def test_categorical_column(df):
+    index = ItemIndex(df.assign(item_name=df["item_name"].astype("category")))
+
+    assert index.positions("gurken", ignore_case=True).tolist() == \
+        np.flatnonzero(df["item_name"].str.lower() == "gurken").tolist()
+
+
+def test_counts_match_value_counts(df):
+    counts = ItemIndex(df).counts()
+
+    assert counts.to_dict() == df["item_name"].value_counts().to_dict()
+    assert counts.is_monotonic_decreasing
+
+
+def test_single_item_over_time(df):
+    index = ItemIndex(df)
+
+    pd.testing.assert_frame_equal(single_item_over_time(df, "Pizza", index), df[df["item_name"] == "Pizza"])
+    pd.testing.assert_frame_equal(single_item_over_time(df, "Pizza"), df[df["item_name"] == "Pizza"])
+
+
+@pytest.mark.parametrize("ignore_case", [False, True])
+def test_item_rows_without_index_scans(df, monkeypatch, ignore_case):
+    expected = item_rows(df, "gurken", ignore_case, index=ItemIndex(df))
+    monkeypatch.setattr(ItemIndex, "__init__", lambda self, df: pytest.fail("built an index for one lookup"))
+
+    pd.testing.assert_frame_equal(item_rows(df, "gurken", ignore_case), expected)
+
+
+def test_empty_frame():
+    index = ItemIndex(pd.DataFrame({"item_name": pd.Series([], dtype=object)}))
+
+    assert index.rows("Gurken").empty
+    assert index.counts().empty
@@ -0,0 +1,89 @@
+import os
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.analysis.item_index import ItemIndex
+from scripts.analysis.item_visualization import (_price_series, plot_items_price_over_time, plot_item_price_over_time,
+                                                  plot_multi_items_price_over_time)
+from scripts.analysis.load_data import add_timestamp
+from scripts.analysis.rollups import compute_rollups
+
+
+@pytest.fixture
+def df():
+    return add_timestamp(pd.DataFrame({
+        "date": ["12.03.24", "10.02.24", "bad", "11.02.24", "10.02.24", "01.01.24"],
+        "time": ["10:00", "18:30", "10:00", "09:15", None, "12:00"],
+        "item_name": ["Gurken", "Gurken", "Gurken", "GURKEN", "Pizza", "Banana"],
+        "unit_price": [0.49, 0.59, 0.69, 0.79, 1.19, 1.99],
+    })).assign(file="a.pdf", quantity=1.0, total_price=lambda df: df["unit_price"])
+
+
+def test_price_series_sorted_by_date(df):
+    [(name, dates, prices, monthly)] = _price_series(df, ["gurken"], ItemIndex(df))
+
+    assert name == "gurken"
+    assert prices.tolist() == [0.59, 0.79, 0.49, 0.69]
+    assert mdates.num2date(dates[0]).strftime("%d.%m.%y %H:%M") == "10.02.24 18:30"
+    assert np.isnan(dates[-1])
+    assert monthly is None
+
+
+def test_price_series_monthly_average(df):
+    [(_, _, _, (months, averages))] = _price_series(df, ["Gurken"], ItemIndex(df), compute_rollups(df))
+
+    assert [mdates.num2date(month).strftime("%m.%y") for month in months] == ["02.24", "03.24"]
+    assert averages.tolist() == pytest.approx([0.69, 0.49])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_renders_items_with_min_count(df, tmp_path, workers):
+    paths = plot_items_price_over_time(df, min_count=2, workers=workers, output_folder=str(tmp_path))
+
+    # 'Gurken' and 'GURKEN' are one case-insensitive chart
+    assert [os.path.basename(path) for path in paths] == ["Gurken_price_over_time.png"]
+    assert os.path.getsize(paths[0]) > 0
+
+
+def test_renders_selected_items(df, tmp_path):
+    paths = plot_items_price_over_time(df, ["Pizza", "Banana", "pizza"], workers=2, rollups=compute_rollups(df),
+                                       output_folder=str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ["Banana_price_over_time.png", "Pizza_price_over_time.png"]
+    assert len(paths) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_item_names_become_safe_file_names(df, tmp_path, workers):
+    df = df.assign(item_name=df["item_name"].replace({"Pizza": "Pizza 1/2", "Banana": 'Bio: "Banane"'}))
+
+    paths = plot_items_price_over_time(df, ["Pizza 1/2", 'Bio: "Banane"'], workers=workers,
+                                       output_folder=str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ["Bio_ _Banane__price_over_time.png", "Pizza 1_2_price_over_time.png"]
+    assert len(paths) == 2
+
+
+def test_price_series_of_a_frame_without_timestamp(df):
+    plain = df.drop(columns="timestamp")
+
+    [(_, dates, prices, _)] = _price_series(plain, ["gurken"], ItemIndex(plain))
+    [(_, expected_dates, expected_prices, _)] = _price_series(df, ["gurken"], ItemIndex(df))
+
+    np.testing.assert_array_equal(dates, expected_dates)
+    assert prices.tolist() == expected_prices.tolist()
+    assert "timestamp" not in plain
+
+
+def test_plots_of_a_frame_without_timestamp(df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    plain = df.drop(columns="timestamp")
+
+    plot_item_price_over_time(plain, "Gurken")
+    plot_item_price_over_time(plain.replace({"item_name": {"Pizza": "Pizza 1/2"}}), "Pizza 1/2")
+    plot_multi_items_price_over_time(plain, ["Gurken", "Pizza"])
+
+    assert sorted(os.listdir(tmp_path / "output" / "autogenerated" / "visualizations")) == [
+        "Gurken_price_over_time.png", "Pizza 1_2_price_over_time.png", "combined_plot.png"]
@@ -0,0 +1,184 @@
+import os
+
+import pandas as pd
+import pytest
+import scripts.analysis.load_data as load_data
+from scripts.analysis.load_data import load_receipts_data, add_timestamp
+from scripts.utils.receipt_store import open_store, upsert_receipts
+from scripts.utils.receipt_table import receipts_to_frame, save_parquet
+from tests.scripts.utils.test_receipt_table import RECEIPTS
+
+
+@pytest.fixture
+def output_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "output" / "autogenerated"
+    folder.mkdir(parents=True)
+    return folder
+
+
+def write_csv(folder, receipts=RECEIPTS):
+    df = receipts_to_frame(receipts).drop(columns=["timestamp"])
+    df.to_csv(folder / "parsed_receipts.csv", index=False)
+
+
+def test_load_csv(output_folder):
+    write_csv(output_folder)
+
+    df = load_receipts_data()
+
+    assert df["date"].tolist() == ["10.02.24", "10.02.24", "11.02.24"]
+    assert df["timestamp"].tolist() == [pd.Timestamp("2024-02-10 14:35"), pd.Timestamp("2024-02-10 14:35"),
+                                        pd.Timestamp("2024-02-11 09:05")]
+
+
+def test_load_csv_caches_parquet(output_folder):
+    pytest.importorskip("pyarrow")
+    write_csv(output_folder)
+    first = load_receipts_data(cache_parquet=True)
+    os.remove(output_folder / "parsed_receipts.csv")
+
+    df = load_receipts_data()
+
+    pd.testing.assert_frame_equal(df, first)
+    assert df["timestamp"].dtype.kind == "M"
+
+
+def test_load_csv_writes_no_parquet_by_default(output_folder):
+    write_csv(output_folder)
+
+    load_receipts_data()
+
+    assert not os.path.exists(output_folder / "parsed_receipts.parquet")
+
+
+def test_load_prefers_parquet(output_folder):
+    pytest.importorskip("pyarrow")
+    write_csv(output_folder)
+    save_parquet(receipts_to_frame(RECEIPTS), str(output_folder / "parsed_receipts.parquet"))
+
+    df = load_receipts_data()
+
+    assert "timestamp" in df
+    assert df["item_name"].tolist() == ["Banana", "Moehren", "Tomaten"]
+
+
+def test_load_ignores_outdated_parquet(output_folder):
+    pytest.importorskip("pyarrow")
+    parquet_file = output_folder / "parsed_receipts.parquet"
+    save_parquet(receipts_to_frame(RECEIPTS), str(parquet_file))
+    write_csv(output_folder, RECEIPTS[:1])
+    os.utime(parquet_file, (0, 0))
+
+    df = load_receipts_data(cache_parquet=True)
+
+    assert df["file"].nunique() == 1
+    # the outdated Parquet file is replaced by the typed table of the CSV
+    assert pd.read_parquet(parquet_file)["file"].nunique() == 1
+
+
+def test_add_timestamp():
+    df = add_timestamp(pd.DataFrame({"date": ["10.02.24", "10.02.24", "bad", None],
+                                     "time": ["14:35", None, "14:35", "14:35"]}))
+
+    assert df["timestamp"].tolist()[:2] == [pd.Timestamp("2024-02-10 14:35"), pd.Timestamp("2024-02-10")]
+    assert df["timestamp"].isna().tolist() == [False, False, True, True]
+
+
+def write_store(folder, receipts=RECEIPTS):
+    store = open_store(str(folder / "parsed_receipts.sqlite"))
+    with store:
+        upsert_receipts(store, receipts)
+    store.close()
+
+
+FILTERS = [
+    {"start": "2024-02-11"},
+    {"end": "2024-02-10"},
+    {"start": "2024-02-10", "end": "2024-02-10", "item_name": "Moehren"},
+    {"item_name": "banana"},
+    {"item_name": "banana", "ignore_case": True},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filters_pushed_down_to_store(output_folder, filters):
+    write_csv(output_folder)
+    expected = load_receipts_data(**filters)
+    write_store(output_folder)
+    os.remove(output_folder / "parsed_receipts.csv")
+
+    df = load_receipts_data(**filters)
+
+    # pandas picks the datetime unit of an empty column on its own
+    pd.testing.assert_frame_equal(df, expected, check_dtype=not expected.empty)
+
+
+def test_filters(output_folder):
+    write_csv(output_folder)
+
+    assert load_receipts_data(start="2024-02-11")["item_name"].tolist() == ["Tomaten"]
+    assert load_receipts_data(end=pd.Timestamp("2024-02-10 23:00"))["item_name"].tolist() == ["Banana", "Moehren"]
+    assert load_receipts_data(item_name="banana").empty
+    assert load_receipts_data(item_name="banana", ignore_case=True)["file"].tolist() == ["a.pdf"]
+
+
+def test_outdated_table_loads_from_store(output_folder):
+    write_csv(output_folder, RECEIPTS[:1])
+    os.utime(output_folder / "parsed_receipts.csv", (0, 0))
+    write_store(output_folder)
+
+    # read_receipt updated the store after the last convert_receipt run
+    assert load_receipts_data()["file"].nunique() == 2
+    assert load_receipts_data(start="2024-02-11")["file"].tolist() == ["b.pdf"]
+
+
+def test_unfiltered_load_from_store(output_folder):
+    write_csv(output_folder)
+    expected = load_receipts_data()
+    write_store(output_folder)
+    os.remove(output_folder / "parsed_receipts.csv")
+
+    pd.testing.assert_frame_equal(load_receipts_data(), expected)
+
+
+def test_unfiltered_load_prefers_current_table(output_folder, monkeypatch):
+    write_store(output_folder)
+    write_csv(output_folder)
+    os.utime(output_folder / "parsed_receipts.sqlite", (0, 0))
+    monkeypatch.setattr(load_data, "query_receipts_data", lambda *args: pytest.fail("queried the store"))
+
+    assert load_receipts_data()["file"].nunique() == 2
+
+
+def test_filtered_load_queries_store(output_folder):
+    write_store(output_folder)
+    write_csv(output_folder, RECEIPTS[:1])
+    os.utime(output_folder / "parsed_receipts.sqlite", (0, 0))
+
+    # the store has the indexes for the filters, even when the table is current
+    assert load_receipts_data(start="2024-02-11")["file"].tolist() == ["b.pdf"]
+
+
+ACCENTED = [{"file": "c.pdf", "date": "12.02.24", "time": "10:00", "sum": 2.5,
+             "items": [{"name": "Éclair", "quantity": 1, "unit_price": 2.5, "total_price": 2.5}]}]
+
+
+@pytest.mark.parametrize("item_name, expected", [("ÉCLAIR", ["c.pdf"]), ("éclair", [])])
+def test_ignore_case_folds_ascii_only(output_folder, item_name, expected):
+    write_csv(output_folder, ACCENTED)
+    from_table = load_receipts_data(item_name=item_name, ignore_case=True)
+    write_store(output_folder, ACCENTED)
+
+    assert from_table["file"].tolist() == expected
+    assert load_receipts_data(item_name=item_name, ignore_case=True)["file"].tolist() == expected
+
+
+def test_data_mtime(output_folder):
+    assert load_data.data_mtime() == 0
+    write_csv(output_folder)
+    os.utime(output_folder / "parsed_receipts.csv", (0, 100))
+    write_store(output_folder)
+    os.utime(output_folder / "parsed_receipts.sqlite", (0, 200))
+
+    assert load_data.data_mtime() == 200
@@ -0,0 +1,99 @@
+import os
+
+import pandas as pd
+import pytest
+import scripts.analysis.rollups as rollup_module
+from scripts.analysis.load_data import add_timestamp
+from scripts.analysis.rollups import (spend_rollup, item_rollup, compute_rollups, item_prices, save_rollups,
+                                      load_rollups, cached_rollups)
+
+
+@pytest.fixture
+def df():
+    return add_timestamp(pd.DataFrame({
+        "file": ["a.pdf", "a.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf"],
+        "date": ["05.02.24", "05.02.24", "11.02.24", "12.02.24", "01.03.24", "bad"],
+        "time": ["10:00", "10:00", "23:59", "00:01", "12:00", "12:00"],
+        "item_name": ["Gurken", "Pizza", "Gurken", "gurken", "Gurken", "Gurken"],
+        "quantity": [2.0, 1.0, 1.0, 0.5, 1.0, 1.0],
+        "unit_price": [0.5, 1.19, 0.7, 0.9, 0.6, 9.99],
+        "total_price": [1.0, 1.19, 0.7, 0.45, 0.6, 9.99],
+    }))
+
+
+def test_daily_includes_days_without_purchases(df):
+    daily = spend_rollup(df, "daily")
+
+    assert daily["period_start"].iloc[0] == pd.Timestamp("2024-02-05")
+    assert daily["period_start"].iloc[-1] == pd.Timestamp("2024-03-01")
+    assert len(daily) == 26
+    assert daily.set_index("period_start").loc["2024-02-06", "spend"] == 0
+    # the row without a parseable date is left out
+    assert daily["spend"].sum() == pytest.approx(3.94)
+
+
+def test_weeks_start_on_monday(df):
+    weekly = spend_rollup(df, "weekly")
+
+    assert weekly["period_start"].dt.day_name().unique().tolist() == ["Monday"]
+    assert weekly.iloc[0][["spend", "quantity", "receipts"]].tolist() == [2.89, 4.0, 2]
+    assert weekly.iloc[1][["spend", "quantity", "receipts"]].tolist() == [0.45, 0.5, 1]
+
+
+def test_monthly_items(df):
+    monthly = item_rollup(df, "monthly")
+
+    february = monthly[monthly["period_start"] == pd.Timestamp("2024-02-01")].set_index("item_name")
+    assert february.loc["Gurken", "purchases"] == 2
+    assert february.loc["Gurken", "avg_unit_price"] == pytest.approx(0.6)
+    assert february.loc["Gurken", "spend"] == pytest.approx(1.7)
+    assert monthly["purchases"].sum() == 5
+
+
+def test_item_prices_merge_case_variants(df):
+    prices = item_prices(compute_rollups(df, ["monthly"]), "GURKEN")
+
+    assert prices["period_start"].tolist() == [pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-01")]
+    assert prices["avg_unit_price"].tolist() == pytest.approx([0.7, 0.6])
+    assert prices["purchases"].tolist() == [3, 1]
+
+
+def test_save_and_load(df, tmp_path):
+    rollups = compute_rollups(df)
+    save_rollups(rollups, str(tmp_path))
+
+    loaded = load_rollups(str(tmp_path))
+
+    assert sorted(loaded) == sorted(rollups)
+    pd.testing.assert_frame_equal(loaded["spend_weekly"], rollups["spend_weekly"], check_dtype=False)
+    assert item_prices(loaded, "gurken")["purchases"].tolist() == [3, 1]
+
+
+def test_cached_rollups_are_read_back(df, tmp_path, monkeypatch):
+    folder = str(tmp_path / "rollups")
+    computed = cached_rollups(df, data_mtime=0, folder=folder)
+    monkeypatch.setattr(rollup_module, "compute_rollups", lambda *args: pytest.fail("computed again"))
+
+    loaded = cached_rollups(df, data_mtime=0, folder=folder)
+
+    assert sorted(loaded) == sorted(computed)
+    assert item_prices(loaded, "gurken")["purchases"].tolist() == [3, 1]
+
+
+def test_cached_rollups_are_recomputed_for_newer_data(df, tmp_path):
+    folder = str(tmp_path / "rollups")
+    cached_rollups(df.iloc[:1], data_mtime=0, folder=folder)
+    saved = os.path.getmtime(os.path.join(folder, "items_monthly.csv"))
+
+    recomputed = cached_rollups(df, data_mtime=saved + 1, folder=folder)
+
+    assert recomputed["items_monthly"]["purchases"].sum() == 5
+    assert load_rollups(folder)["items_monthly"]["purchases"].sum() == 5
+
+
+def test_cached_rollups_are_recomputed_when_a_table_is_missing(df, tmp_path):
+    folder = str(tmp_path / "rollups")
+    cached_rollups(df.iloc[:1], data_mtime=0, folder=folder)
+    os.remove(os.path.join(folder, "spend_daily.csv"))
+
+    assert cached_rollups(df, data_mtime=0, folder=folder)["items_monthly"]["purchases"].sum() == 5
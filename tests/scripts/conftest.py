@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The top-level scripts (read_receipt.py, watch_receipts.py) are run from the repository root
+# with scripts/ on the path and import their packages by name (from parsers... import ...).
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+# watch_receipts.main() adds the analysis scripts for their aggregate cache
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "analysis"))
@@ -0,0 +1,36 @@
+import pytest
+from scripts.parsers.amounts import parse_cents, parse_grams, divide_half_up
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,95", 195),
+    ("0,05", 5),
+    ("1,9", 190),
+    ("2", 200),
+    ("19,90", 1990),
+    (",50", 50),
+    ("1,235", 124),  # extra decimals are rounded half up
+])
+def test_parse_cents(text, expected):
+    assert parse_cents(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0,480", 480),
+    ("1,2", 1200),
+    ("2", 2000),
+])
+def test_parse_grams(text, expected):
+    assert parse_grams(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", ",", "1,2,3"])
+def test_parse_cents_invalid(text):
+    with pytest.raises(ValueError):
+        parse_cents(text)
+
+
+def test_divide_half_up():
+    assert divide_half_up(101, 2) == 51
+    assert divide_half_up(100, 3) == 33
+    assert divide_half_up(7275, 1000) == 7
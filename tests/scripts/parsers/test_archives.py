@@ -0,0 +1,73 @@
+import io
+import mailbox
+import tarfile
+import zipfile
+from email.message import EmailMessage
+
+import pytest
+from scripts.parsers.archives import iter_archive_pdfs, list_receipt_archives, is_receipt_archive
+
+
+def make_mail(attachments):
+    msg = EmailMessage()
+    msg["From"] = "noreply@app.edeka.de"
+    msg["Subject"] = "EDEKA - Vielen Dank für Ihren Einkauf"
+    msg.set_content("Ihr Kassenbon")
+    for filename, data in attachments:
+        maintype, subtype = ("application", "pdf") if filename.endswith(".pdf") else ("image", "png")
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=filename)
+    return msg
+
+
+def test_list_receipt_archives(tmp_path):
+    for name in ["b.zip", "a.tar.gz", "receipt.pdf", "mail.eml", "Takeout.mbox", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+
+    result = list_receipt_archives(str(tmp_path))
+
+    assert [path.rsplit("/", 1)[-1] for path in result] == ["Takeout.mbox", "a.tar.gz", "b.zip", "mail.eml"]
+    assert not is_receipt_archive("receipt.pdf")
+
+
+def test_zip(tmp_path):
+    path = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("2024-02/a.pdf", b"%PDF a")
+        archive.writestr("2024-02/notes.txt", b"text")
+        archive.writestr("B.PDF", b"%PDF b")
+
+    assert list(iter_archive_pdfs(str(path))) == [("a.pdf", b"%PDF a"), ("B.PDF", b"%PDF b")]
+
+
+@pytest.mark.parametrize("suffix, mode", [(".tar", "w"), (".tar.gz", "w:gz"), (".tar.xz", "w:xz")])
+def test_tar(tmp_path, suffix, mode):
+    path = tmp_path / f"bundle{suffix}"
+    with tarfile.open(path, mode) as archive:
+        for name, data in [("2024-02/a.pdf", b"%PDF a"), ("2024-02/notes.txt", b"text")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    assert list(iter_archive_pdfs(str(path))) == [("a.pdf", b"%PDF a")]
+
+
+def test_eml(tmp_path):
+    path = tmp_path / "receipt.eml"
+    path.write_bytes(make_mail([("a.pdf", b"%PDF a"), ("logo.png", b"png")]).as_bytes())
+
+    assert list(iter_archive_pdfs(str(path))) == [("a.pdf", b"%PDF a")]
+
+
+def test_mbox(tmp_path):
+    path = str(tmp_path / "export.mbox")
+    mbox = mailbox.mbox(path)
+    mbox.add(make_mail([("a.pdf", b"%PDF a")]))
+    mbox.add(make_mail([("b.pdf", b"%PDF b"), ("c.pdf", b"%PDF c")]))
+    mbox.close()
+
+    assert list(iter_archive_pdfs(path)) == [("a.pdf", b"%PDF a"), ("b.pdf", b"%PDF b"), ("c.pdf", b"%PDF c")]
+
+
+def test_unknown_archive_type():
+    with pytest.raises(ValueError):
+        list(iter_archive_pdfs("receipts.rar"))
@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+
+import pytest
+import scripts.parsers.batch_parser as batch_parser
+from scripts.parsers.batch_parser import (list_receipt_pdfs, parse_receipts, parse_receipts_data, parse_receipt_data,
+                                         parse_receipt_queue)
+from tests.conftest import make_receipt_pdf, SAMPLE_RECEIPT_LINES
+
+
+def test_list_receipt_pdfs_sorted(tmp_path):
+    for name in ["b.pdf", "a.PDF", "notes.txt", "c.pdf"]:
+        (tmp_path / name).write_bytes(b"")
+
+    result = list_receipt_pdfs(str(tmp_path))
+
+    assert [os.path.basename(path) for path in result] == ["a.PDF", "b.pdf", "c.pdf"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_receipts_keeps_order(receipt_pdf_factory, workers):
+    pdf_paths = [receipt_pdf_factory(f"receipt_{i}.pdf") for i in range(4)]
+
+    results = list(parse_receipts(pdf_paths, workers=workers))
+
+    assert [path for path, _, _ in results] == pdf_paths
+    assert [parsed.file for _, parsed, _ in results] == [os.path.basename(p) for p in pdf_paths]
+    assert all(error is None for _, _, error in results)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_receipts_isolates_failures(receipt_pdf_factory, tmp_path, workers):
+    good = receipt_pdf_factory("good.pdf")
+    corrupt = tmp_path / "corrupt.pdf"
+    corrupt.write_bytes(b"this is not a pdf")
+
+    results = list(parse_receipts([str(corrupt), good], workers=workers))
+
+    assert results[0][1] is None
+    assert results[0][2]
+    assert results[1][1].sum_cents == 879
+    assert results[1][2] is None
+
+
+def test_parse_receipts_uses_text_cache(receipt_pdf_factory, tmp_path, monkeypatch):
+    pdf_path = receipt_pdf_factory("receipt.pdf")
+    cache_dir = str(tmp_path / "text_cache")
+    first = list(parse_receipts([pdf_path], text_cache_dir=cache_dir))
+
+    def fail_extraction(pdf_file, backend):
+        raise AssertionError("PDF text was extracted despite a cache hit")
+
+    monkeypatch.setattr("scripts.parsers.batch_parser.extract_lines", fail_extraction)
+    second = list(parse_receipts([pdf_path], text_cache_dir=cache_dir))
+
+    assert second == first
+    assert second[0][1].sum_cents == 879
+
+
+def test_parse_receipt_data_from_memory(tmp_path):
+    cache_dir = str(tmp_path / "text_cache")
+
+    receipt = parse_receipt_data(make_receipt_pdf(SAMPLE_RECEIPT_LINES), "mail/receipt.pdf", cache_dir)
+
+    assert receipt.file == "receipt.pdf"
+    assert receipt.sum_cents == 879
+    assert os.listdir(cache_dir)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_receipts_data_keeps_order(workers):
+    data = make_receipt_pdf(SAMPLE_RECEIPT_LINES)
+    pdfs = ((f"bundle.zip/receipt_{i}.pdf", data if i != 1 else b"not a pdf") for i in range(6))
+
+    results = list(parse_receipts_data(pdfs, workers=workers))
+
+    assert [path for path, _, _ in results] == [f"bundle.zip/receipt_{i}.pdf" for i in range(6)]
+    assert [parsed.file for _, parsed, _ in results if parsed] == [f"receipt_{i}.pdf" for i in (0, 2, 3, 4, 5)]
+    assert results[1][2]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_receipt_queue(workers):
+    pdfs = queue.Queue(maxsize=2)
+    data = make_receipt_pdf(SAMPLE_RECEIPT_LINES)
+
+    def produce():
+        for i in range(5):
+            pdfs.put((f"receipt_{i}.pdf", data if i != 2 else b"not a pdf"))
+        pdfs.put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+    results = list(parse_receipt_queue(pdfs, workers=workers))
+
+    assert [path for path, _, _ in results] == [f"receipt_{i}.pdf" for i in range(5)]
+    assert [parsed.sum_cents for _, parsed, _ in results if parsed] == [879] * 4
+    assert results[2][1] is None
+    assert results[2][2]
+
+
+def test_parse_receipt_queue_yields_before_the_queue_ends():
+    pdfs = queue.Queue()
+    pdfs.put(("receipt.pdf", make_receipt_pdf(SAMPLE_RECEIPT_LINES)))
+    results = parse_receipt_queue(pdfs, workers=2)
+
+    # the producer is still running (no None yet), the first receipt is yielded anyway
+    assert next(results)[1].sum_cents == 879
+    pdfs.put(None)
+    assert list(results) == []
+
+
+def parse_or_die(pdf_path, data=None, **kwargs):
+    """ Stands in for parse_receipt_safe; kills its worker process on 'crash' PDFs like a segfault in PDFium """
+    if "crash" in pdf_path:
+        os._exit(1)
+    return pdf_path, os.path.basename(pdf_path), None
+
+
+@pytest.fixture
+def crashing_parser(monkeypatch):
+    monkeypatch.setattr(batch_parser, "parse_receipt_safe", parse_or_die)
+
+
+def assert_only_crash_failed(results, pdf_paths):
+    assert [path for path, _, _ in results] == pdf_paths
+    for pdf_path, parsed, error in results:
+        if "crash" in pdf_path:
+            assert (parsed, error) == (None, "BrokenProcessPool: the parser process died")
+        else:
+            assert (parsed, error) == (os.path.basename(pdf_path), None)
+
+
+def test_parse_receipts_survives_a_dying_worker(crashing_parser):
+    pdf_paths = [f"receipt_{i}.pdf" for i in range(6)] + ["crash.pdf"] + [f"receipt_{i}.pdf" for i in range(6, 12)]
+
+    assert_only_crash_failed(list(parse_receipts(pdf_paths, workers=2)), pdf_paths)
+
+
+def test_parse_receipts_data_survives_a_dying_worker(crashing_parser):
+    pdf_paths = ["a.pdf", "crash.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf", "f.pdf"]
+
+    results = list(parse_receipts_data(((path, b"") for path in pdf_paths), workers=2))
+
+    assert_only_crash_failed(results, pdf_paths)
+
+
+def test_parse_receipt_queue_survives_a_dying_worker(crashing_parser):
+    pdf_paths = ["a.pdf", "crash.pdf", "b.pdf", "c.pdf", "d.pdf", "e.pdf", "f.pdf"]
+    pdfs = queue.Queue()
+    for pdf_path in pdf_paths:
+        pdfs.put((pdf_path, b""))
+    pdfs.put(None)
+
+    assert_only_crash_failed(list(parse_receipt_queue(pdfs, workers=2)), pdf_paths)
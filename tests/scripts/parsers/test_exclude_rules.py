@@ -0,0 +1,50 @@
+import pytest
+from scripts.parsers.exclude_rules import ExcludeRules, load_exclude_rules
+from scripts.parsers.models import Item
+from scripts.parsers.receipt_parser import remove_unwanted_items
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Coupon 10%", "coupon"),
+    ("Leergut Mehrweg", "leergut"),
+    ("Leergut Entl.Allg. -", "leergut entl.allg. -"),
+    ("Banana", None),
+])
+def test_match(name, expected):
+    rules = ExcludeRules(["Coupon", "Leergut", "leergut entl.allg. -"])
+
+    assert rules.match(name) == expected
+
+
+def test_hit_counters():
+    rules = ExcludeRules(["pfand", "coupon", "summe"])
+    for name in ["Pfand 0,25", "Pfand 0,15", "Coupon", "Banana"]:
+        rules.match(name)
+
+    assert rules.report() == [("pfand", 2), ("coupon", 1), ("summe", 0)]
+
+
+def test_load_exclude_rules(tmp_path):
+    rules_file = tmp_path / "rules.txt"
+    rules_file.write_text("# comment\nPfand\n\n  coupon \npfand\n", encoding="utf-8")
+
+    rules = load_exclude_rules(str(rules_file))
+
+    assert rules.rules == ["pfand", "coupon"]
+
+
+def test_fingerprint_changes_with_rules():
+    assert ExcludeRules(["pfand"]).fingerprint != ExcludeRules(["pfand", "coupon"]).fingerprint
+    assert ExcludeRules(["Pfand"]).fingerprint == ExcludeRules(["pfand"]).fingerprint
+
+
+def test_remove_unwanted_items_default_rules():
+    items = [Item(name) for name in ["Banana", "Leergut Einweg", "Summe", "Coupon 10%", "Pizza"]]
+
+    assert remove_unwanted_items(items) == [Item("Banana"), Item("Pizza")]
+
+
+def test_remove_unwanted_items_custom_rules():
+    items = [Item("Banana"), Item("Pizza")]
+
+    assert remove_unwanted_items(items, ExcludeRules(["pizza"])) == [Item("Banana")]
@@ -0,0 +1,75 @@
+import copy
+import random
+
+import pytest
+from benchmarks.legacy import fix_dicts, legacy_fix_dicts
+from scripts.parsers.fix_quantity_lines import fix_quantity_lines
+from scripts.parsers.models import Item
+
+
+def random_items(rng: random.Random, length: int) -> list:
+    """ Item sequences with many quantity lines, matching and non-matching totals """
+    names = ["2 x", "3 X", "10 x", "0 x", "x", "Pizza", "Banana", "2 x Gurken"]
+    prices = [0.0, 0.59, 1.18, 1.19, 1.77, 2.38, 5.9, 11.8]
+    items = []
+    for _ in range(length):
+        price = rng.choice(prices)
+        items.append({"name": rng.choice(names), "quantity": 1, "unit_price": price,
+                      "total_price": rng.choice([price, price * 2, price * 3, rng.choice(prices)])})
+    return items
+
+
+def test_merge_counts_a_weighed_item():
+    items = [
+        Item("2 x", quantity=1, unit_price_cents=59, total_price_cents=59),
+        Item("Tomaten", quantity=1, unit_price_cents=299, total_price_cents=118, weight_grams=395),
+    ]
+
+    merged = fix_quantity_lines(items)
+
+    assert merged == [Item("Tomaten", quantity=2, unit_price_cents=59, total_price_cents=118)]
+    assert merged[0].to_dict()["quantity"] == 2
+
+
+def test_fix_quantity_lines_merges():
+    items = [
+        Item("2 X", quantity=1, unit_price_cents=59, total_price_cents=59),
+        Item("Pizza", quantity=1, unit_price_cents=118, total_price_cents=118),
+    ]
+
+    assert fix_quantity_lines(items) == [Item("Pizza", quantity=2, unit_price_cents=59, total_price_cents=118)]
+
+
+def test_fix_quantity_lines_no_match_keeps_line():
+    items = [
+        Item("2 x", quantity=1, unit_price_cents=59, total_price_cents=59),
+        Item("Pizza", quantity=1, unit_price_cents=200, total_price_cents=200),
+    ]
+
+    assert fix_quantity_lines(items) == items
+
+
+def test_fix_quantity_lines_last_line():
+    items = [Item("2 x", quantity=1, unit_price_cents=59, total_price_cents=59)]
+
+    assert fix_quantity_lines(items) == items
+
+
+def test_fix_quantity_lines_leaves_input_untouched():
+    items = [
+        Item("2 x", quantity=1, unit_price_cents=59, total_price_cents=59),
+        Item("Pizza", quantity=1, unit_price_cents=118, total_price_cents=118),
+    ]
+    original = copy.deepcopy(items)
+
+    fix_quantity_lines(items)
+
+    assert items == original
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_fix_quantity_lines_matches_legacy(seed):
+    rng = random.Random(seed)
+    items = random_items(rng, rng.randint(0, 40))
+
+    assert fix_dicts(items) == legacy_fix_dicts(items)
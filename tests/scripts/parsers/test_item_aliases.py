@@ -0,0 +1,117 @@
+import random
+
+import pytest
+import scripts.parsers.item_aliases as item_aliases
+import scripts.parsers.receipt_parser as receipt_parser
+from scripts.parsers.item_aliases import (ItemAliases, build_aliases, candidate_pairs, is_same_item,
+                                          load_item_aliases, save_item_aliases, _match_key)
+from scripts.parsers.models import Item
+from scripts.parsers.receipt_parser import apply_item_aliases, parse_lines
+from tests.conftest import SAMPLE_RECEIPT_LINES
+
+
+@pytest.mark.parametrize("name_a, name_b, expected", [
+    # truncated by a narrower receipt layout
+    ("Oatly Hafer Aufst.", "Oatly Hafer Aufstrich", True),
+    # punctuation / spacing
+    ("Ruegen.Mueh.Mett", "Ruegen Mueh Mett", True),
+    # small typo
+    ("G&G Halbf.Margari.", "G&G Halbf.Margarin.", True),
+    # different sizes are different products
+    ("Bio Milch 1,5%", "Bio Milch 3,8%", False),
+    # short prefixes are other products
+    ("Milch", "Milchschokolade", False),
+    ("Gurken", "Zucchini", False),
+])
+def test_is_same_item(name_a, name_b, expected):
+    assert is_same_item(_match_key(name_a), _match_key(name_b)) == expected
+
+
+def test_build_aliases_maps_to_most_bought_name():
+    aliases = build_aliases({"Oatly Hafer Aufst.": 12, "Oatly Hafer Aufstrich": 3, "Oatly Haferaufst.": 1,
+                             "Gurken": 40, "Bio Milch 1,5%": 5, "Bio Milch 3,8%": 7})
+
+    assert aliases.aliases == {"Oatly Hafer Aufstrich": "Oatly Hafer Aufst.",
+                               "Oatly Haferaufst.": "Oatly Hafer Aufst."}
+    assert aliases.canonical("Oatly Hafer Aufstrich") == "Oatly Hafer Aufst."
+    assert aliases.canonical("Gurken") == "Gurken"
+
+
+def test_blocking_skips_most_pairs():
+    rng = random.Random(1)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+             for _ in range(300)]
+    keys = sorted({_match_key(f"{rng.choice(words)} {rng.choice(words)}") for _ in range(3000)})
+    # a truncated variant of every tenth name
+    truncated = {key[:-2] for key in keys[::10] if len(key) >= 12} - set(keys)
+    keys += sorted(truncated)
+
+    pairs = {tuple(sorted((keys[i], keys[j]))) for i, j in candidate_pairs(keys)}
+
+    assert len(pairs) < len(keys) * (len(keys) - 1) / 2 / 50
+    # near duplicates are never lost to the blocking
+    for short in truncated:
+        assert any(short in pair and min(pair, key=len) == short and max(pair, key=len).startswith(short)
+                   for pair in pairs)
+
+
+def test_cluster_members_must_match_the_canonical_name(monkeypatch):
+    # a ~ b and b ~ c chain a and c into one cluster, but a and c do not match
+    matches = {frozenset(("a", "b")), frozenset(("b", "c"))}
+    monkeypatch.setattr(item_aliases, "is_same_item", lambda key_a, key_b: frozenset((key_a, key_b)) in matches)
+    monkeypatch.setattr(item_aliases, "candidate_pairs", lambda keys: [(0, 1), (1, 2), (0, 2)])
+
+    aliases = build_aliases({"a": 1, "b": 5, "c": 9})
+
+    assert aliases.aliases == {"b": "c"}
+
+
+def test_chains_are_resolved():
+    aliases = ItemAliases({"a": "b", "b": "c", "x": "x"})
+
+    assert aliases.aliases == {"a": "c", "b": "c"}
+
+
+def test_save_and_load(tmp_path):
+    aliases_file = str(tmp_path / "aliases.txt")
+    aliases = ItemAliases({"Oatly Hafer Aufstrich": "Oatly Hafer Aufst.", "Gurke": "Gurken"})
+
+    save_item_aliases(aliases, aliases_file)
+    loaded = load_item_aliases(aliases_file)
+
+    assert loaded.aliases == aliases.aliases
+    assert loaded.fingerprint == aliases.fingerprint
+    assert load_item_aliases(str(tmp_path / "missing.txt")).aliases == {}
+
+
+def test_malformed_line_names_file_and_line(tmp_path):
+    aliases_file = tmp_path / "aliases.txt"
+    aliases_file.write_text("# alias<TAB>canonical\nGurke\tGurken\nOatly Hafer Aufstrich  Oatly Hafer Aufst.\n",
+                            encoding="utf-8")
+
+    with pytest.raises(ValueError, match=r"aliases\.txt, line 3: expected 'alias<TAB>canonical'"):
+        load_item_aliases(str(aliases_file))
+
+
+def test_apply_item_aliases():
+    items = [Item("Gurke", 1, 49, 49), Item("Banana", 1, 199, 199)]
+
+    apply_item_aliases(items, ItemAliases({"Gurke": "Gurken"}))
+
+    assert [item.name for item in items] == ["Gurken", "Banana"]
+
+
+def test_parse_lines_applies_aliases(monkeypatch):
+    names = [item.name for item in parse_lines(SAMPLE_RECEIPT_LINES, "a.pdf").items]
+    monkeypatch.setattr(receipt_parser, "default_item_aliases", lambda: ItemAliases({names[0]: "Canonical"}))
+
+    receipt = parse_lines(SAMPLE_RECEIPT_LINES, "a.pdf")
+
+    assert [item.name for item in receipt.items] == ["Canonical"] + names[1:]
+    assert receipt_parser.parser_version().count("-") == 2
+
+
+def test_parser_version_unchanged_without_aliases(monkeypatch):
+    monkeypatch.setattr(receipt_parser, "default_item_aliases", lambda: ItemAliases({}))
+
+    assert receipt_parser.parser_version().count("-") == 1
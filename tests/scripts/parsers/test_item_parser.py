@@ -1,5 +1,6 @@
 import pytest
 from scripts.parsers.item_parser import parse_item_line
+from scripts.parsers.models import Item
 
 
 @pytest.mark.parametrize("sample_line, expected", [
@@ -30,4 +31,19 @@ from scripts.parsers.item_parser import parse_item_line
 ])
 def test_parse_item_line(sample_line, expected):
     result = parse_item_line(sample_line)
-    assert result == expected, f"Failed on input: {sample_line}"
+    assert result.to_dict() == expected, f"Failed on input: {sample_line}"
+
+
+def test_parse_item_line_cents():
+    assert parse_item_line("Banana 1,99 € x 2 3,98 B") == Item("Banana", quantity=2, unit_price_cents=199,
+                                                                total_price_cents=398)
+
+
+def test_parse_item_line_recalculates_unit_price():
+    # 3 x 0,33 = 0,99 != 1,00 => unit price from the total, rounded half up
+    assert parse_item_line("Broetchen 0,33 x 3 1,00 B").unit_price_cents == 33
+    assert parse_item_line("Broetchen 0,40 x 2 1,01 B").unit_price_cents == 51
+
+
+def test_parse_item_line_without_price():
+    assert parse_item_line("Vielen Dank fuer Ihren Einkauf") is None
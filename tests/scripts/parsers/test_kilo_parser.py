@@ -1,5 +1,6 @@
 import pytest
 from scripts.parsers.kilo_parser import is_kilo_line, parse_kilo_line
+from scripts.parsers.models import Item
 
 
 @pytest.mark.parametrize("line, expected", [
@@ -14,11 +15,20 @@ def test_is_kilo_line(line, expected):
 
 
 def test_parse_kilo_line():
-    items = [{"name": "Tomato", "quantity": 1, "unit_price": 0, "total_price": 0}]
+    items = [Item("Tomato", quantity=1, unit_price_cents=0, total_price_cents=0)]
 
     # Simulating a weighted item
     parse_kilo_line("0,480 kg x 2,99 /kg", items)
 
-    assert items[-1]["quantity"] == 0.48
-    assert items[-1]["unit_price"] == 2.99
-    assert items[-1]["total_price"] == pytest.approx(1.43, rel=1e-2)  # 0.48 * 2.99
+    assert items[-1].weight_grams == 480
+    assert items[-1].unit_price_cents == 299
+    assert items[-1].total_price_cents == 144  # 0.48 * 2.99 = 1.4352
+    assert items[-1].to_dict() == {"name": "Tomato", "quantity": 0.48, "unit_price": 2.99, "total_price": 1.44}
+
+
+def test_parse_kilo_line_without_previous_item():
+    items = []
+
+    parse_kilo_line("0,480 kg x 2,99 /kg", items)
+
+    assert items == []
@@ -0,0 +1,26 @@
+from scripts.parsers.models import Item, Receipt
+
+RECEIPT_DICT = {
+    "date": "10.02.24",
+    "time": "14:35",
+    "items": [
+        {"name": "Banana", "quantity": 2, "unit_price": 1.99, "total_price": 3.98},
+        {"name": "Tomaten", "quantity": 0.48, "unit_price": 2.99, "total_price": 1.44},
+    ],
+    "sum": 5.42,
+    "file": "receipt.pdf"
+}
+
+
+def test_receipt_roundtrip():
+    receipt = Receipt.from_dict(RECEIPT_DICT)
+
+    assert receipt.to_dict() == RECEIPT_DICT
+
+
+def test_from_dict_uses_cents_and_grams():
+    receipt = Receipt.from_dict(RECEIPT_DICT)
+
+    assert receipt.sum_cents == 542
+    assert receipt.items[0] == Item("Banana", quantity=2, unit_price_cents=199, total_price_cents=398)
+    assert receipt.items[1].weight_grams == 480
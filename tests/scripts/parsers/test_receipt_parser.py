@@ -1,4 +1,9 @@
-from scripts.parsers.receipt_parser import parse_lines
+import io
+
+import pytest
+from scripts.parsers.receipt_parser import parse_lines, extract_lines, parse_receipt, EXTRACTION_BACKENDS
+from scripts.parsers.models import Item
+from tests.conftest import SAMPLE_RECEIPT_LINES
 
 sample_lines = [
     "10.02.24 14:35",
@@ -12,65 +17,123 @@ sample_lines = [
 def test_parse_lines_date():
     result = parse_lines(sample_lines, "sample.pdf")
 
-    assert result["date"] == "10.02.24"
+    assert result.date == "10.02.24"
 
 
 def test_parse_lines_time():
     result = parse_lines(sample_lines, "sample.pdf")
 
-    assert result["time"] == "14:35"
+    assert result.time == "14:35"
 
 
 def test_parse_lines_items():
     result = parse_lines(sample_lines, "sample.pdf")
 
-    assert result["items"] == [
-        {
-            "name": "Banana",
-            "quantity": 2,
-            "unit_price": 1.99,
-            "total_price": 3.98
-        }
-    ]
+    assert result.items == [Item("Banana", quantity=2, unit_price_cents=199, total_price_cents=398)]
 
 
 def test_parse_lines_sum():
     result = parse_lines(sample_lines, "sample.pdf")
 
-    assert result["sum"] == 3.98
+    assert result.sum_cents == 398
 
 
 def test_parse_lines_file():
     result = parse_lines(sample_lines, "sample.pdf")
 
-    assert result["file"] == "sample.pdf"
+    assert result.file == "sample.pdf"
 
 
 def test_parse_lines_no_date():
     result = parse_lines(["EUR"], "sample.pdf")
 
-    assert result["date"] is None
+    assert result.date is None
 
 
 def test_parse_lines_no_time():
     result = parse_lines(["EUR"], "sample.pdf")
 
-    assert result["time"] is None
+    assert result.time is None
 
 
 def test_parse_lines_no_items():
     result = parse_lines(["EUR"], "sample.pdf")
 
-    assert result["items"] == []
+    assert result.items == []
 
 
 def test_parse_lines_no_sum():
     result = parse_lines(["EUR"], "sample.pdf")
 
-    assert result["sum"] == 0
+    assert result.sum_cents == 0
 
 
 def test_parse_lines_no_file():
     result = parse_lines(["EUR"], "sample.pdf")
 
-    assert result["file"] == "sample.pdf"
+    assert result.file == "sample.pdf"
+
+
+FIXTURE_RECEIPTS = [
+    SAMPLE_RECEIPT_LINES,
+    [
+        "Datum 03.01.23 09:12 Uhr",
+        "EUR",
+        "GURKEN 0,49 € x 4 1,96 A",
+        "ÄPFEL (LOSE) 2,49 A",
+        "Leergut Einweg allg. - 0,25 A",
+        "Coupon 10% -0,30 A",
+        "Posten: 3",
+    ],
+]
+
+
+@pytest.mark.parametrize("lines", FIXTURE_RECEIPTS)
+@pytest.mark.parametrize("backend", sorted(EXTRACTION_BACKENDS))
+def test_extraction_backends_agree(receipt_pdf_factory, lines, backend):
+    pdf_path = receipt_pdf_factory("receipt.pdf", lines)
+
+    reference = parse_lines(extract_lines(pdf_path, "pdfplumber"), pdf_path)
+
+    assert parse_lines(extract_lines(pdf_path, backend), pdf_path) == reference
+    assert extract_lines(pdf_path, backend) == lines
+
+
+@pytest.mark.parametrize("backend", sorted(EXTRACTION_BACKENDS))
+def test_parse_receipt_from_bytes_and_file_objects(receipt_pdf_factory, backend):
+    pdf_path = receipt_pdf_factory("receipt.pdf")
+    reference = parse_receipt(pdf_path, backend)
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+
+    assert parse_receipt(data, backend, name="receipt.pdf") == reference
+    assert parse_receipt(io.BytesIO(data), backend, name="receipt.pdf") == reference
+    with open(pdf_path, "rb") as f:
+        assert parse_receipt(f, backend) == reference
+    assert parse_receipt(data, backend).file == ""
+
+
+def test_parse_receipt_unknown_backend(receipt_pdf_factory):
+    pdf_path = receipt_pdf_factory("receipt.pdf")
+
+    with pytest.raises(ValueError):
+        parse_receipt(pdf_path, backend="ocr")
+
+
+def test_parse_lines_to_dict():
+    result = parse_lines(sample_lines, "sample.pdf")
+
+    assert result.to_dict() == {
+        "date": "10.02.24",
+        "time": "14:35",
+        "items": [
+            {
+                "name": "Banana",
+                "quantity": 2,
+                "unit_price": 1.99,
+                "total_price": 3.98
+            }
+        ],
+        "sum": 3.98,
+        "file": "sample.pdf"
+    }
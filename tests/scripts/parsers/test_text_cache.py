@@ -0,0 +1,24 @@
+import gzip
+
+from scripts.parsers.text_cache import pdf_digest, load_lines, store_lines, cache_file
+
+
+def test_store_and_load_lines(tmp_path):
+    lines = ["10.02.24 14:35", "EUR", "MÖHREN 0,99 B"]
+    digest = pdf_digest(b"%PDF-1.4 receipt")
+
+    store_lines(str(tmp_path), digest, lines)
+
+    assert load_lines(str(tmp_path), digest) == lines
+
+
+def test_load_lines_miss(tmp_path):
+    assert load_lines(str(tmp_path), pdf_digest(b"unknown")) is None
+
+
+def test_load_lines_broken_entry(tmp_path):
+    digest = pdf_digest(b"%PDF-1.4 receipt")
+    with gzip.open(cache_file(str(tmp_path), digest), "wt") as f:
+        f.write('["EUR", "Ban')
+
+    assert load_lines(str(tmp_path), digest) is None
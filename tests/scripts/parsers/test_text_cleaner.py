@@ -1,5 +1,5 @@
 import pytest
-from scripts.parsers.text_cleaner import cleanup_name
+from scripts.parsers.text_cleaner import cleanup_name, name_cache_stats, NAME_CACHE_SIZE
 
 
 @pytest.mark.parametrize("raw_name, expected", [
@@ -26,3 +26,17 @@ from scripts.parsers.text_cleaner import cleanup_name
 def test_cleanup_name(raw_name, expected):
     result = cleanup_name(raw_name)
     assert result == expected, f"Failed on input: {raw_name}"
+
+
+def test_cleanup_name_is_memoized():
+    cleanup_name.cache_clear()
+
+    for _ in range(3):
+        assert cleanup_name("  GURKEN  ") == "Gurken"
+    assert cleanup_name("Möhre") == "Moehre"
+
+    assert name_cache_stats() == {"hits": 2, "misses": 2, "size": 2, "max_size": NAME_CACHE_SIZE}
+
+
+def test_umlauts_of_uppercase_names():
+    assert cleanup_name("ÖL ÄPFEL GRÜN STRAßE") == "Oel Aepfel Gruen Strasse"
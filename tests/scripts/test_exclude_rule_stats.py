@@ -0,0 +1,25 @@
+import os
+
+import exclude_rule_stats
+from parsers.text_cache import store_lines
+from tests.conftest import SAMPLE_RECEIPT_LINES
+
+
+def test_counts_the_receipts_of_the_chosen_backend(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    text_cache_dir = os.path.join("output", "autogenerated", "text_cache")
+    store_lines(text_cache_dir, "a-pdfplumber", SAMPLE_RECEIPT_LINES)
+    store_lines(text_cache_dir, "a-pypdfium2", SAMPLE_RECEIPT_LINES)
+    store_lines(text_cache_dir, "b-pypdfium2", SAMPLE_RECEIPT_LINES)
+
+    exclude_rule_stats.main(["--backend", "pypdfium2"])
+
+    assert "=== Unwanted item rules over 2 receipts ===" in capsys.readouterr().out
+
+
+def test_missing_text_cache(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+
+    exclude_rule_stats.main([])
+
+    assert "run read_receipt.py first" in capsys.readouterr().out
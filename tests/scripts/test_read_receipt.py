@@ -0,0 +1,228 @@
+import os
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+import read_receipt
+from utils.file_handler import iter_receipts
+from tests.conftest import make_receipt_pdf, SAMPLE_RECEIPT_LINES
+
+OTHER_RECEIPT_LINES = [
+    "EDEKA Markt",
+    "11.02.24 09:05",
+    "EUR",
+    "Gurken 1,96 B",
+    "Posten: 1",
+    "SUMME € 1,96",
+]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """ Runs read_receipt in an empty tree: receipts/pdfs/ and output/autogenerated/ below tmp_path """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("receipts", "pdfs"))
+    return tmp_path
+
+
+def write_pdf(name, lines=SAMPLE_RECEIPT_LINES):
+    pdf_path = os.path.join("receipts", "pdfs", name)
+    with open(pdf_path, "wb") as f:
+        f.write(make_receipt_pdf(lines))
+    return pdf_path
+
+
+def run(output_format, *args):
+    read_receipt.main(["--format", output_format, *args])
+
+
+def output_receipts(output_format) -> list:
+    output_path = os.path.join("output", "autogenerated", read_receipt.OUTPUT_FILES[output_format])
+    return list(iter_receipts(output_path))
+
+
+def manifest(output_format) -> dict:
+    with open(os.path.join("output", "autogenerated", read_receipt.MANIFEST_FILES[output_format])) as f:
+        return json.load(f)
+
+
+def stored_files() -> list:
+    conn = sqlite3.connect(os.path.join("output", "autogenerated", "parsed_receipts.sqlite"))
+    try:
+        return [file for file, in conn.execute("SELECT file FROM receipts ORDER BY file")]
+    finally:
+        conn.close()
+
+
+def summary(capsys) -> str:
+    return capsys.readouterr().out.strip().splitlines()[-1]
+
+
+@pytest.fixture(params=["json", "jsonl"])
+def output_format(request):
+    return request.param
+
+
+def test_new_pdfs(workdir, output_format, capsys):
+    write_pdf("a.pdf")
+    write_pdf("b.pdf", OTHER_RECEIPT_LINES)
+
+    run(output_format)
+
+    receipts = {bon["file"]: bon for bon in output_receipts(output_format)}
+    assert sorted(receipts) == ["a.pdf", "b.pdf"]
+    assert receipts["b.pdf"]["sum"] == 1.96
+    assert sorted(manifest(output_format)) == ["a.pdf", "b.pdf"]
+    assert stored_files() == ["a.pdf", "b.pdf"]
+    assert summary(capsys) == "Parsing complete. 2 PDFs in output, 2 parsed, 0 failed."
+
+
+def test_unchanged_pdfs_are_reused(workdir, output_format, capsys, monkeypatch):
+    write_pdf("a.pdf")
+    write_pdf("b.pdf")
+    run(output_format)
+    before = output_receipts(output_format)
+    monkeypatch.setattr(read_receipt, "parse_receipts",
+                        lambda pdf_paths, **kwargs: pytest.fail(f"parsed {pdf_paths}") if pdf_paths else iter(()))
+
+    run(output_format)
+
+    assert output_receipts(output_format) == before
+    assert summary(capsys) == "Parsing complete. 2 PDFs in output, 0 parsed, 0 failed."
+
+
+def test_changed_pdf_replaces_its_receipt(workdir, output_format, capsys):
+    write_pdf("a.pdf")
+    write_pdf("b.pdf")
+    run(output_format)
+
+    write_pdf("b.pdf", OTHER_RECEIPT_LINES)
+    run(output_format)
+
+    receipts = output_receipts(output_format)
+    assert sorted(bon["file"] for bon in receipts) == ["a.pdf", "b.pdf"]
+    assert {bon["file"]: bon["sum"] for bon in receipts}["b.pdf"] == 1.96
+    assert summary(capsys) == "Parsing complete. 2 PDFs in output, 1 parsed, 0 failed."
+
+
+def test_removed_pdf_drops_out(workdir, output_format):
+    write_pdf("a.pdf")
+    write_pdf("b.pdf")
+    run(output_format)
+
+    os.remove(os.path.join("receipts", "pdfs", "a.pdf"))
+    run(output_format)
+
+    assert [bon["file"] for bon in output_receipts(output_format)] == ["b.pdf"]
+    assert list(manifest(output_format)) == ["b.pdf"]
+    assert stored_files() == ["b.pdf"]
+
+
+def test_full_reparses_everything(workdir, output_format, capsys):
+    write_pdf("a.pdf")
+    run(output_format)
+
+    run(output_format, "--full")
+
+    assert len(output_receipts(output_format)) == 1
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 1 parsed, 0 failed."
+
+
+def test_other_backend_reparses(workdir, capsys):
+    write_pdf("a.pdf")
+    run("jsonl")
+
+    run("jsonl", "--backend", "pypdfium2")
+
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 1 parsed, 0 failed."
+    assert manifest("jsonl")["a.pdf"]["backend"] == "pypdfium2"
+
+
+def test_broken_pdf_is_retried(workdir, output_format, capsys):
+    write_pdf("a.pdf")
+    with open(os.path.join("receipts", "pdfs", "broken.pdf"), "wb") as f:
+        f.write(b"not a pdf")
+    run(output_format)
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 1 parsed, 1 failed."
+
+    run(output_format)
+
+    assert [bon["file"] for bon in output_receipts(output_format)] == ["a.pdf"]
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 0 parsed, 1 failed."
+
+
+def write_archive(members: dict):
+    archive_path = os.path.join("receipts", "pdfs", "2024-02.zip")
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(f"february/{name}", data)
+    return archive_path
+
+
+def test_archive_receipts(workdir, output_format, capsys):
+    write_pdf("a.pdf")
+    archive_path = write_archive({"b.pdf": make_receipt_pdf(OTHER_RECEIPT_LINES),
+                                  "c.pdf": make_receipt_pdf(SAMPLE_RECEIPT_LINES)})
+    run(output_format)
+
+    assert sorted(bon["file"] for bon in output_receipts(output_format)) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert manifest(output_format)["b.pdf"]["path"] == archive_path
+
+    run(output_format)
+    assert summary(capsys) == "Parsing complete. 3 PDFs in output, 0 parsed, 0 failed."
+
+    os.remove(archive_path)
+    run(output_format)
+    assert [bon["file"] for bon in output_receipts(output_format)] == ["a.pdf"]
+    assert stored_files() == ["a.pdf"]
+
+
+def test_folder_pdf_takes_over_a_name_from_an_archive(workdir, output_format, capsys):
+    write_archive({"b.pdf": make_receipt_pdf(SAMPLE_RECEIPT_LINES), "c.pdf": make_receipt_pdf(SAMPLE_RECEIPT_LINES)})
+    run(output_format)
+
+    write_pdf("b.pdf", OTHER_RECEIPT_LINES)
+    run(output_format)
+
+    receipts = output_receipts(output_format)
+    assert sorted(bon["file"] for bon in receipts) == ["b.pdf", "c.pdf"]
+    assert {bon["file"]: bon["sum"] for bon in receipts}["b.pdf"] == 1.96
+    assert manifest(output_format)["b.pdf"]["path"] == os.path.join("receipts", "pdfs", "b.pdf")
+
+    # settled: the archive no longer supplies b.pdf
+    run(output_format)
+    assert summary(capsys) == "Parsing complete. 2 PDFs in output, 0 parsed, 0 failed."
+    assert len(output_receipts(output_format)) == 2
+
+
+def test_failed_archive_receipt_is_retried(workdir, output_format, capsys):
+    write_archive({"b.pdf": make_receipt_pdf(SAMPLE_RECEIPT_LINES), "broken.pdf": b"not a pdf"})
+    run(output_format)
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 1 parsed, 1 failed."
+
+    run(output_format)
+
+    assert [bon["file"] for bon in output_receipts(output_format)] == ["b.pdf"]
+    assert summary(capsys) == "Parsing complete. 1 PDFs in output, 1 parsed, 1 failed."
+
+
+def test_from_mail(workdir, capsys, monkeypatch):
+    def download_attachments(connect, handle_attachment, **kwargs):
+        handle_attachment("mail.pdf", make_receipt_pdf(OTHER_RECEIPT_LINES))
+
+    monkeypatch.setattr(read_receipt, "gmail_credentials", lambda: ("user", "password"))
+    monkeypatch.setattr(read_receipt, "gmail_connection", lambda user, password: None)
+    monkeypatch.setattr(read_receipt, "download_attachments", download_attachments)
+    write_pdf("a.pdf")
+
+    run("json", "--from-mail")
+
+    assert sorted(bon["file"] for bon in output_receipts("jsonl")) == ["a.pdf", "mail.pdf"]
+    assert os.path.isfile(os.path.join("receipts", "pdfs", "mail.pdf"))
+    assert manifest("jsonl")["mail.pdf"]["path"] == os.path.join("receipts", "pdfs", "mail.pdf")
+
+    # the saved PDF is unchanged on the next run
+    run("jsonl")
+    assert summary(capsys) == "Parsing complete. 2 PDFs in output, 0 parsed, 0 failed."
@@ -0,0 +1,154 @@
+import os
+import json
+import queue
+import threading
+
+import pandas as pd
+import pytest
+
+import watch_receipts
+from parsers.models import Receipt
+from utils.file_handler import iter_receipts
+from utils.manifest import make_entry
+from utils.receipt_store import open_store
+
+
+def receipt(file, items, date="10.02.24"):
+    return Receipt.from_dict({"file": file, "date": date, "time": "14:35",
+                              "items": [{"name": name, "quantity": 1, "unit_price": price, "total_price": price}
+                                        for name, price in items],
+                              "sum": round(sum(price for _, price in items), 2)})
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """ An empty receipts folder and the paths ingest writes to, below tmp_path """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("receipts", "pdfs"))
+    store = open_store(str(tmp_path / "receipts.sqlite"))
+    yield {
+        "output_path": str(tmp_path / "parsed_receipts.jsonl"),
+        "manifest_path": str(tmp_path / "parsed_receipts.jsonl.manifest.json"),
+        "cache_folder": str(tmp_path / "aggregates"),
+        "store": store,
+        "manifest": {},
+        "written": set(),
+    }
+    store.close()
+
+
+def write_pdf(name, content=b"%PDF-1.4 receipt"):
+    pdf_path = os.path.join("receipts", "pdfs", name)
+    with open(pdf_path, "wb") as f:
+        f.write(content)
+    return pdf_path
+
+
+def run_ingest(tree, results, pdfs=None):
+    return watch_receipts.ingest(iter(results), pdfs or queue.Queue(), tree["output_path"], tree["manifest"],
+                                 tree["manifest_path"], tree["written"], {}, "1", tree["store"],
+                                 cache_folder=tree["cache_folder"], backend="pdfplumber")
+
+
+def records(tree) -> dict:
+    return {bon["file"]: [item["name"] for item in bon["items"]] for bon in iter_receipts(tree["output_path"])}
+
+
+def saved_manifest(tree) -> dict:
+    with open(tree["manifest_path"]) as f:
+        return json.load(f)
+
+
+def stored_items(tree) -> list:
+    return tree["store"].execute("SELECT file, name FROM items ORDER BY file, position").fetchall()
+
+
+def aggregated_items(tree) -> list:
+    return pd.read_csv(os.path.join(tree["cache_folder"], "items.csv"))["item_name"].tolist()
+
+
+def test_new_receipt(tree):
+    pdf_path = write_pdf("a.pdf")
+
+    assert run_ingest(tree, [(pdf_path, receipt("a.pdf", [("Banana", 1.99)]), None)]) == (1, 0)
+
+    assert records(tree) == {"a.pdf": ["Banana"]}
+    assert saved_manifest(tree)["a.pdf"] == make_entry(pdf_path, "1", backend="pdfplumber")
+    assert stored_items(tree) == [("a.pdf", "Banana")]
+    assert aggregated_items(tree) == ["Banana"]
+    assert tree["written"] == {"a.pdf"}
+
+
+def test_changed_receipt(tree):
+    pdf_path = write_pdf("a.pdf")
+    b_path = write_pdf("b.pdf")
+    run_ingest(tree, [(pdf_path, receipt("a.pdf", [("Banana", 1.99)]), None),
+                      (b_path, receipt("b.pdf", [("Pizza", 2.38)]), None)])
+
+    write_pdf("a.pdf", b"%PDF-1.4 re-scanned receipt")
+    run_ingest(tree, [(pdf_path, receipt("a.pdf", [("Banane", 1.99)]), None)])
+
+    assert records(tree) == {"b.pdf": ["Pizza"], "a.pdf": ["Banane"]}
+    assert saved_manifest(tree)["a.pdf"] == make_entry(pdf_path, "1", backend="pdfplumber")
+    assert stored_items(tree) == [("a.pdf", "Banane"), ("b.pdf", "Pizza")]
+    assert aggregated_items(tree) == ["Banane", "Pizza"]
+
+
+def test_failed_receipt_is_skipped(tree):
+    assert run_ingest(tree, [("receipts/pdfs/broken.pdf", None, "not a PDF")]) == (0, 1)
+
+    assert not os.path.exists(tree["output_path"])
+
+
+def test_batches_while_pdfs_are_waiting(tree, monkeypatch):
+    saves = []
+    save_manifest = watch_receipts.save_manifest
+    monkeypatch.setattr(watch_receipts, "save_manifest",
+                        lambda manifest, path: saves.append(sorted(manifest)) or save_manifest(manifest, path))
+    monkeypatch.setattr(watch_receipts, "BATCH_SIZE", 2)
+    pdfs = queue.Queue()
+    pdfs.put(("waiting.pdf", b""))
+    results = [(write_pdf(name), receipt(name, [("Banana", 1.99)]), None) for name in ("a.pdf", "b.pdf", "c.pdf")]
+
+    run_ingest(tree, results, pdfs)
+
+    assert saves == [["a.pdf", "b.pdf"], ["a.pdf", "b.pdf", "c.pdf"]]
+    assert sorted(records(tree)) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_changed_receipts_are_rewritten_once_per_batch(tree, monkeypatch):
+    paths = [write_pdf(name) for name in ("a.pdf", "b.pdf")]
+    run_ingest(tree, [(path, receipt(os.path.basename(path), [("Banana", 1.99)]), None) for path in paths])
+    rewrites = []
+    rewrite_jsonl = watch_receipts.rewrite_jsonl
+    monkeypatch.setattr(watch_receipts, "rewrite_jsonl",
+                        lambda path, keep: rewrites.append(path) or rewrite_jsonl(path, keep))
+    pdfs = queue.Queue()
+    pdfs.put(("waiting.pdf", b""))
+
+    run_ingest(tree, [(path, receipt(os.path.basename(path), [("Pizza", 2.38)]), None) for path in paths], pdfs)
+
+    assert len(rewrites) == 1
+    assert records(tree) == {"a.pdf": ["Pizza"], "b.pdf": ["Pizza"]}
+
+
+def test_queue_new_pdfs(tree):
+    current_path = write_pdf("current.pdf")
+    write_pdf("new.pdf", b"%PDF-1.4 new receipt")
+    write_pdf("notes.txt")
+    manifest = {"current.pdf": make_entry(current_path, "1", backend="pdfplumber")}
+    pdfs, entries, stop = queue.Queue(), {}, threading.Event()
+    watcher = threading.Thread(target=watch_receipts.queue_new_pdfs,
+                               args=("receipts/pdfs", pdfs, manifest, {"current.pdf"}, entries, "1", stop),
+                               kwargs={"backend": "pdfplumber", "quiet_period": 0, "poll_interval": 0.05,
+                                       "use_inotify": False})
+    watcher.start()
+    try:
+        pdf_path, data = pdfs.get(timeout=5)
+    finally:
+        stop.set()
+        watcher.join(timeout=5)
+
+    assert (os.path.basename(pdf_path), data) == ("new.pdf", b"%PDF-1.4 new receipt")
+    assert entries["new.pdf"] == make_entry(pdf_path, "1", backend="pdfplumber")
+    assert pdfs.get(timeout=1) is None
@@ -1,7 +1,7 @@
 import os
 import json
 import pytest
-from scripts.utils.file_handler import save_json
+from scripts.utils.file_handler import save_json, iter_receipts, append_jsonl, rewrite_jsonl
 
 
 @pytest.fixture
@@ -43,3 +43,46 @@ def test_save_json_empty(temp_output_folder):
         loaded_data = json.load(f)
 
     assert loaded_data == [], "Empty JSON file did not contain an empty list."
+
+
+def test_append_and_iter_jsonl(temp_output_folder):
+    """ Test appending receipts to a JSON Lines file and streaming them back. """
+    file_path = os.path.join(temp_output_folder, "receipts.jsonl")
+    receipts = [{"file": "a.pdf", "items": []}, {"file": "b.pdf", "items": [{"name": "Möhren"}]}]
+
+    with open(file_path, "a", encoding="utf-8") as f:
+        for receipt in receipts:
+            append_jsonl(f, receipt)
+
+    assert list(iter_receipts(file_path)) == receipts
+
+
+def test_iter_jsonl_skips_truncated_line(temp_output_folder):
+    """ Test that a half-written last line (crash mid-run) does not lose the other receipts. """
+    file_path = os.path.join(temp_output_folder, "receipts.jsonl")
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write('{"file": "a.pdf"}\n{"file": "b.pd')
+
+    assert list(iter_receipts(file_path)) == [{"file": "a.pdf"}]
+
+
+def test_iter_json_array(temp_output_folder):
+    """ Test that plain JSON arrays are still readable. """
+    file_path = os.path.join(temp_output_folder, "receipts.json")
+    data = [{"file": "a.pdf"}, {"file": "b.pdf"}]
+    save_json(data, file_path)
+
+    assert list(iter_receipts(file_path)) == data
+
+
+def test_rewrite_jsonl(temp_output_folder):
+    """ Test dropping records from a JSON Lines file. """
+    file_path = os.path.join(temp_output_folder, "receipts.jsonl")
+    with open(file_path, "a", encoding="utf-8") as f:
+        for name in ["a.pdf", "b.pdf", "c.pdf"]:
+            append_jsonl(f, {"file": name})
+
+    kept = rewrite_jsonl(file_path, lambda receipt: receipt["file"] != "b.pdf")
+
+    assert kept == 2
+    assert list(iter_receipts(file_path)) == [{"file": "a.pdf"}, {"file": "c.pdf"}]
@@ -0,0 +1,97 @@
+import os
+import threading
+
+import pytest
+from scripts.utils.folder_watcher import Debouncer, PollingWatcher, InotifyWatcher, open_watcher, watch_folder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def inotify_or_skip(folder):
+    try:
+        return InotifyWatcher(folder)
+    except OSError:
+        pytest.skip("inotify is not available")
+
+
+def test_debouncer_waits_for_quiet_period(tmp_path):
+    clock = FakeClock()
+    debouncer = Debouncer(str(tmp_path), quiet_period=2.0, clock=clock)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF")
+    debouncer.touch(["a.pdf"])
+
+    assert debouncer.ready() == []
+    clock.now = 2.0
+    assert debouncer.ready() == ["a.pdf"]
+    assert debouncer.ready() == []
+
+
+def test_debouncer_restarts_while_file_grows(tmp_path):
+    clock = FakeClock()
+    debouncer = Debouncer(str(tmp_path), quiet_period=2.0, clock=clock)
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF")
+    debouncer.touch(["a.pdf"])
+    debouncer.ready()
+
+    clock.now = 1.5
+    path.write_bytes(b"%PDF more content")
+    assert debouncer.ready() == []
+    clock.now = 3.0
+    assert debouncer.ready() == []
+    clock.now = 3.5
+    assert debouncer.ready() == ["a.pdf"]
+
+
+def test_debouncer_drops_deleted_files(tmp_path):
+    debouncer = Debouncer(str(tmp_path), quiet_period=0.0)
+    debouncer.touch(["gone.pdf"])
+
+    assert debouncer.ready() == []
+    assert debouncer.pending == {}
+
+
+def test_polling_watcher(tmp_path):
+    (tmp_path / "old.pdf").write_bytes(b"old")
+    watcher = PollingWatcher(str(tmp_path))
+
+    (tmp_path / "new.pdf").write_bytes(b"new")
+    (tmp_path / "old.pdf").write_bytes(b"changed")
+    assert watcher.changes(0) == {"new.pdf", "old.pdf"}
+    assert watcher.changes(0) == set()
+
+
+def test_inotify_watcher(tmp_path):
+    watcher = inotify_or_skip(str(tmp_path))
+    try:
+        assert watcher.changes(0) == set()
+        (tmp_path / "new.pdf").write_bytes(b"new")
+        (tmp_path / "part.tmp").write_bytes(b"x")
+        os.replace(tmp_path / "part.tmp", tmp_path / "moved.pdf")
+
+        assert watcher.changes(1.0) == {"new.pdf", "part.tmp", "moved.pdf"}
+    finally:
+        watcher.close()
+
+
+def test_open_watcher_falls_back_to_polling(tmp_path):
+    assert isinstance(open_watcher(str(tmp_path), use_inotify=False), PollingWatcher)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watch_folder(tmp_path, use_inotify):
+    (tmp_path / "existing.pdf").write_bytes(b"%PDF")
+    stop = threading.Event()
+    batches = watch_folder(str(tmp_path), quiet_period=0.1, poll_interval=0.05, use_inotify=use_inotify, stop=stop)
+
+    assert next(batches) == ["existing.pdf"]
+    (tmp_path / "new.pdf").write_bytes(b"%PDF")
+    assert next(batches) == ["new.pdf"]
+    stop.set()
+    assert list(batches) == []
@@ -0,0 +1,293 @@
+import base64
+import imaplib
+import json
+import shlex
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+from scripts.utils import mail_loader
+from scripts.utils.mail_loader import download_attachments, parse_fetch, pdf_parts, decode_part, save_pdf
+
+SENDER = "noreply@app.edeka.de"
+SUBJECT = "EDEKA - Vielen Dank für Ihren Einkauf"
+
+
+def make_mail(filename, data=b"%PDF-1.4 receipt", sender=SENDER, subject=SUBJECT):
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["Subject"] = subject
+    msg.set_content("Ihr Kassenbon")
+    msg.add_attachment(data, maintype="application", subtype="pdf", filename=filename)
+    return msg
+
+
+def _quote(value):
+    return "NIL" if value is None else '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _parts(msg, section=""):
+    """ (section, part) of every leaf part, numbered like IMAP body sections """
+    if not msg.is_multipart():
+        return [(section or "1", msg)]
+    parts = []
+    for number, child in enumerate(msg.iter_parts(), start=1):
+        parts += _parts(child, f"{section}.{number}" if section else str(number))
+    return parts
+
+
+def bodystructure(msg):
+    if msg.is_multipart():
+        return "(" + "".join(bodystructure(child) for child in msg.iter_parts()) + \
+            f" {_quote(msg.get_content_subtype().upper())})"
+    body = msg.get_payload()
+    params = [f"{_quote(key.upper())} {_quote(value)}" for key, value in msg.get_params()[1:]]
+    fields = [_quote(msg.get_content_maintype().upper()), _quote(msg.get_content_subtype().upper()),
+              f"({' '.join(params)})" if params else "NIL", "NIL", "NIL",
+              _quote(msg.get("Content-Transfer-Encoding", "7BIT").upper()), str(len(body))]
+    if msg.get_content_maintype() == "text":
+        fields.append(str(body.count("\n")))
+    disposition = "NIL"
+    if msg.get_content_disposition():
+        disposition = f"({_quote(msg.get_content_disposition().upper())} " \
+                      f"(\"FILENAME\" {_quote(msg.get_filename())}))"
+    fields += ["NIL", disposition, "NIL", "NIL"]
+    return "(" + " ".join(fields) + ")"
+
+
+class ImapServer(socketserver.ThreadingTCPServer):
+    """ A local stand-in for an IMAP server: one read-only mailbox, LOGIN, EXAMINE, UID SEARCH and UID FETCH """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ImapHandler)
+        self.messages = {}  # uid -> EmailMessage
+        self.uidvalidity = 1
+        self.next_uid = 1
+        self.commands = []
+        self.logins = 0
+        self.missing_parts = set()  # uids whose body parts are left out of FETCH responses
+        self.lock = threading.Lock()
+
+    def add(self, msg):
+        self.messages[self.next_uid] = msg
+        self.next_uid += 1
+
+    def connect(self):
+        mail = imaplib.IMAP4("127.0.0.1", self.server_address[1])
+        mail.login("user", "password")
+        return mail
+
+
+class ImapHandler(socketserver.StreamRequestHandler):
+
+    def send(self, line):
+        self.wfile.write((line + "\r\n").encode("utf-8") if isinstance(line, str) else line)
+
+    def handle(self):
+        server = self.server
+        self.send("* OK stand-in IMAP4rev1 ready")
+        for line in self.rfile:
+            tag, command = line.decode("utf-8").rstrip("\r\n").split(" ", 1)
+            with server.lock:
+                server.commands.append(command)
+            name, _, args = command.partition(" ")
+            name = name.upper()
+            if name == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1")
+            elif name == "LOGIN":
+                with server.lock:
+                    server.logins += 1
+            elif name == "EXAMINE":
+                self.send(f"* {len(server.messages)} EXISTS")
+                self.send(f"* OK [UIDVALIDITY {server.uidvalidity}] UIDs valid")
+            elif name == "UID":
+                self.uid_command(*shlex.split(args))
+            elif name == "LOGOUT":
+                self.send("* BYE logging out")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            elif name != "CLOSE":
+                self.send(f"{tag} BAD unknown command")
+                continue
+            self.send(f"{tag} OK {name} completed")
+
+    def uid_command(self, name, *args):
+        messages = self.server.messages
+        sequence = {uid: number for number, uid in enumerate(sorted(messages), start=1)}
+        if name.upper() == "SEARCH":
+            criteria = dict(zip(args[2::2], args[3::2]))
+            start = int(args[1].split(":")[0])
+            # like real servers, 'n:*' includes the highest UID even when it is below n
+            uids = [uid for uid in messages if uid >= start or uid == max(messages)]
+            uids = [uid for uid in uids if criteria["FROM"] in messages[uid]["From"]
+                    and criteria["SUBJECT"] in messages[uid]["Subject"]]
+            self.send("* SEARCH " + " ".join(map(str, sorted(uids))))
+            return
+        uids = [int(uid) for uid in args[0].split(",")]
+        items = args[1].strip("()").split()
+        for uid in uids:
+            msg = messages[uid]
+            if items == ["BODYSTRUCTURE"]:
+                self.send(f"* {sequence[uid]} FETCH (UID {uid} BODYSTRUCTURE {bodystructure(msg)})")
+                continue
+            parts = dict(_parts(msg))
+            response = f"* {sequence[uid]} FETCH (UID {uid}".encode()
+            for item in items if uid not in self.server.missing_parts else []:
+                section = item[len("BODY.PEEK["):-1]
+                body = parts[section].get_payload().encode("ascii")
+                response += f" BODY[{section}] {{{len(body)}}}\r\n".encode() + body
+            self.send(response + b")\r\n")
+
+
+@pytest.fixture
+def server():
+    server = ImapServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / "mail_state.json")
+
+
+def download(server, state_file, **kwargs):
+    received = []
+    download_attachments(server.connect, lambda filename, data: received.append((filename, data)),
+                         state_file=state_file, **kwargs)
+    return received
+
+
+def fetched(server):
+    return [command for command in server.commands if command.upper().startswith("UID FETCH")]
+
+
+def test_downloads_only_pdf_body_parts(server, state_file):
+    server.add(make_mail("a.pdf", b"%PDF a"))
+    server.add(make_mail("b.pdf", b"%PDF b"))
+
+    received = download(server, state_file)
+
+    assert received == [("a.pdf", b"%PDF a"), ("b.pdf", b"%PDF b")]
+    assert fetched(server) == ["UID FETCH 1,2 (BODYSTRUCTURE)", "UID FETCH 1,2 (BODY.PEEK[2])"]
+    with open(state_file) as f:
+        assert json.load(f) == {"mailbox": "INBOX", "uidvalidity": 1, "last_uid": 2}
+
+
+def test_skips_other_mails(server, state_file):
+    server.add(make_mail("spam.pdf", sender="someone@example.com"))
+    server.add(make_mail("receipt.pdf"))
+
+    assert [filename for filename, _ in download(server, state_file)] == ["receipt.pdf"]
+
+
+def test_rerun_fetches_only_new_mails(server, state_file):
+    server.add(make_mail("a.pdf"))
+    download(server, state_file)
+    server.commands.clear()
+
+    assert download(server, state_file) == []
+    assert fetched(server) == []
+
+    server.add(make_mail("b.pdf"))
+    assert [filename for filename, _ in download(server, state_file)] == ["b.pdf"]
+    assert fetched(server)[0] == "UID FETCH 2 (BODYSTRUCTURE)"
+
+
+def test_uidvalidity_change_fetches_all_again(server, state_file):
+    server.add(make_mail("a.pdf"))
+    download(server, state_file)
+
+    server.uidvalidity = 2
+    assert [filename for filename, _ in download(server, state_file)] == ["a.pdf"]
+
+
+def test_batches_over_several_connections(server, state_file):
+    for number in range(7):
+        server.add(make_mail(f"{number}.pdf", f"%PDF {number}".encode()))
+
+    received = download(server, state_file, batch_size=2, connections=3)
+
+    assert sorted(received) == [(f"{number}.pdf", f"%PDF {number}".encode()) for number in range(7)]
+    assert len([command for command in fetched(server) if "BODYSTRUCTURE" in command]) == 4
+    assert 1 < server.logins <= 3
+
+
+def test_interrupted_run_resumes_after_last_complete_batch(server, state_file):
+    for number in range(3):
+        server.add(make_mail(f"{number}.pdf"))
+
+    def fail_on_second(filename, data):
+        if filename == "1.pdf":
+            raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        download_attachments(server.connect, fail_on_second, state_file=state_file, batch_size=1, connections=1)
+    with open(state_file) as f:
+        assert json.load(f)["last_uid"] == 1
+
+    assert [filename for filename, _ in download(server, state_file)] == ["1.pdf", "2.pdf"]
+
+
+def test_missing_part_stops_the_state_before_its_mail(server, state_file):
+    for number in range(3):
+        server.add(make_mail(f"{number}.pdf"))
+    server.missing_parts.add(2)
+
+    with pytest.raises(imaplib.IMAP4.error, match="UID 2"):
+        download(server, state_file, batch_size=1, connections=1)
+    with open(state_file) as f:
+        assert json.load(f)["last_uid"] == 1
+
+    server.missing_parts.clear()
+    assert [filename for filename, _ in download(server, state_file)] == ["1.pdf", "2.pdf"]
+
+
+def test_parse_fetch_with_literals():
+    data = [(b'1 (UID 5 BODY[2] {4}', b'ab)c'), (b' BODY[3] {2}', b'de'), b' FLAGS (\\Seen))',
+            b'2 (UID 6 BODYSTRUCTURE ("TEXT" "PLAIN" NIL NIL NIL "7BIT" 3 1))']
+
+    messages = parse_fetch(data)
+
+    assert messages[5]["BODY[2]"] == b"ab)c"
+    assert messages[5]["BODY[3]"] == b"de"
+    assert messages[5]["FLAGS"] == ["\\Seen"]
+    assert messages[6]["BODYSTRUCTURE"][:2] == [b"TEXT", b"PLAIN"]
+
+
+def test_pdf_parts_of_nested_multipart():
+    structure = mail_loader.parse_response([
+        b'((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 10 1 NIL NIL NIL NIL)'
+        b'("TEXT" "HTML" NIL NIL NIL "7BIT" 10 1 NIL NIL NIL NIL) "ALTERNATIVE")'
+        b'("APPLICATION" "PDF" ("NAME" "=?utf-8?q?K=C3=A4se.pdf?=") NIL NIL "BASE64" 100 NIL'
+        b' ("ATTACHMENT" ("FILENAME" "=?utf-8?q?K=C3=A4se.pdf?=")) NIL NIL)'
+        b'("APPLICATION" "PDF" ("NAME" "inline.pdf") NIL NIL "BASE64" 100 NIL ("INLINE" NIL) NIL NIL)'
+        b'("IMAGE" "PNG" ("NAME" "logo.png") NIL NIL "BASE64" 100 NIL ("ATTACHMENT" NIL) NIL NIL) "MIXED")'
+    ])[0]
+
+    assert pdf_parts(structure) == [("2", "Käse.pdf", "BASE64")]
+
+
+def test_pdf_parts_of_single_part_message():
+    structure = mail_loader.parse_response([b'("APPLICATION" "PDF" ("NAME" "a.pdf") NIL NIL "BASE64" 100)'])[0]
+
+    assert pdf_parts(structure) == [("1", "a.pdf", "BASE64")]
+
+
+def test_decode_part():
+    assert decode_part(base64.b64encode(b"%PDF"), "BASE64") == b"%PDF"
+    assert decode_part(b"a=3Db", "QUOTED-PRINTABLE") == b"a=b"
+    assert decode_part(b"raw", "8BIT") == b"raw"
+
+
+def test_save_pdf_keeps_existing_files(tmp_path):
+    assert save_pdf("a.pdf", b"first", str(tmp_path))
+    assert not save_pdf("a.pdf", b"second", str(tmp_path))
+
+    assert (tmp_path / "a.pdf").read_bytes() == b"first"
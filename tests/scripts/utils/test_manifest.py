@@ -0,0 +1,78 @@
+import os
+
+from scripts.utils.manifest import make_entry, is_entry_current, load_manifest, save_manifest
+
+
+def write_pdf(tmp_path, content=b"%PDF-1.4 receipt"):
+    pdf_path = tmp_path / "receipt.pdf"
+    pdf_path.write_bytes(content)
+    return str(pdf_path)
+
+
+def test_entry_current_for_unchanged_file(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1")
+
+    assert is_entry_current(entry, pdf_path, "1")
+
+
+def test_entry_with_known_hash(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+
+    assert make_entry(pdf_path, "1", make_entry(pdf_path, "1")["sha256"]) == make_entry(pdf_path, "1")
+
+
+def test_entry_stale_after_parser_version_bump(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1")
+
+    assert not is_entry_current(entry, pdf_path, "2")
+
+
+def test_entry_stale_for_other_backend(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1", backend="pdfplumber")
+
+    assert is_entry_current(entry, pdf_path, "1", backend="pdfplumber")
+    assert not is_entry_current(entry, pdf_path, "1", backend="pypdfium2")
+
+
+def test_entry_without_backend_is_stale(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1")
+    del entry["backend"]
+
+    assert not is_entry_current(entry, pdf_path, "1", backend="pdfplumber")
+
+
+def test_entry_stale_after_content_change(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1")
+
+    write_pdf(tmp_path, b"%PDF-1.4 other receipt")
+
+    assert not is_entry_current(entry, pdf_path, "1")
+
+
+def test_entry_current_after_touch(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    entry = make_entry(pdf_path, "1")
+    os.utime(pdf_path, (entry["mtime"] + 100, entry["mtime"] + 100))
+
+    assert is_entry_current(entry, pdf_path, "1")
+    assert entry["mtime"] == os.stat(pdf_path).st_mtime
+
+
+def test_entry_missing():
+    assert not is_entry_current(None, "receipt.pdf", "1")
+
+
+def test_manifest_roundtrip(tmp_path):
+    pdf_path = write_pdf(tmp_path)
+    manifest_path = str(tmp_path / "out" / "manifest.json")
+    manifest = {"receipt.pdf": make_entry(pdf_path, "1")}
+
+    save_manifest(manifest, manifest_path)
+
+    assert load_manifest(manifest_path) == manifest
+    assert load_manifest(str(tmp_path / "missing.json")) == {}
@@ -0,0 +1,89 @@
+import pytest
+from scripts.utils.receipt_store import open_store, upsert_receipts, delete_receipts, stored_files, sync_store, iso_day
+from tests.scripts.utils.test_receipt_table import RECEIPTS
+
+
+@pytest.fixture
+def store(tmp_path):
+    conn = open_store(str(tmp_path / "parsed_receipts.sqlite"))
+    yield conn
+    conn.close()
+
+
+def items(store):
+    return store.execute("SELECT file, position, name, quantity FROM items ORDER BY file, position").fetchall()
+
+
+def test_upsert_receipts(store):
+    with store:
+        assert upsert_receipts(store, RECEIPTS) == 3
+
+    assert store.execute("SELECT file, date, day, sum FROM receipts ORDER BY file").fetchall() == [
+        ("a.pdf", "10.02.24", "2024-02-10", 4.97), ("b.pdf", "11.02.24", "2024-02-11", 1.44),
+        ("empty.pdf", None, None, 0)]
+    assert items(store) == [("a.pdf", 0, "Banana", 2), ("a.pdf", 1, "Moehren", 1), ("b.pdf", 0, "Tomaten", 0.48)]
+
+
+def test_upsert_replaces_reparsed_receipt(store):
+    with store:
+        upsert_receipts(store, RECEIPTS)
+        upsert_receipts(store, [{"file": "a.pdf", "date": "12.02.24", "time": "10:00", "sum": 1.99,
+                                 "items": [{"name": "Banana", "quantity": 1, "unit_price": 1.99,
+                                            "total_price": 1.99}]}])
+
+    assert store.execute("SELECT day, sum FROM receipts WHERE file = 'a.pdf'").fetchall() == [("2024-02-12", 1.99)]
+    assert items(store) == [("a.pdf", 0, "Banana", 1), ("b.pdf", 0, "Tomaten", 0.48)]
+
+
+def test_delete_receipts_removes_items(store):
+    with store:
+        upsert_receipts(store, RECEIPTS)
+        delete_receipts(store, ["a.pdf"])
+
+    assert stored_files(store) == {"b.pdf", "empty.pdf"}
+    assert items(store) == [("b.pdf", 0, "Tomaten", 0.48)]
+
+
+def test_sync_store(store):
+    with store:
+        upsert_receipts(store, RECEIPTS[:1])
+
+    def output():
+        yield from RECEIPTS
+
+    assert sync_store(store, ["b.pdf", "empty.pdf"], output()) == (2, 1)
+    assert stored_files(store) == {"b.pdf", "empty.pdf"}
+
+
+def test_sync_store_reads_output_only_when_needed(store):
+    with store:
+        upsert_receipts(store, RECEIPTS)
+
+    def output():
+        raise AssertionError("the output was read although nothing is missing")
+        yield
+
+    assert sync_store(store, ["a.pdf", "b.pdf", "empty.pdf"], output()) == (0, 0)
+
+
+@pytest.mark.parametrize("condition, index", [
+    ("name = 'banana' COLLATE NOCASE", "items_name"),
+    ("file = 'a.pdf'", "sqlite_autoindex_items_1"),
+])
+def test_item_lookups_use_indexes(store, condition, index):
+    plan = " ".join(row[-1] for row in store.execute(f"EXPLAIN QUERY PLAN SELECT * FROM items WHERE {condition}"))
+
+    assert index in plan
+
+
+def test_date_range_uses_index(store):
+    plan = " ".join(row[-1] for row in store.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM receipts WHERE day BETWEEN '2024-02-01' AND '2024-02-29'"))
+
+    assert "receipts_day" in plan
+
+
+def test_iso_day():
+    assert iso_day("10.02.24") == "2024-02-10"
+    assert iso_day("bad") is None
+    assert iso_day(None) is None
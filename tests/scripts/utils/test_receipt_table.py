@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from benchmarks.legacy import legacy_write_csv
+from scripts.utils.receipt_table import flatten_receipts, receipts_to_frame, write_items_csv, COLUMNS
+
+RECEIPTS = [
+    {"file": "a.pdf", "date": "10.02.24", "time": "14:35", "sum": 4.97, "items": [
+        {"name": "Banana", "quantity": 2, "unit_price": 1.99, "total_price": 3.98},
+        {"name": "Moehren", "quantity": 1, "unit_price": 0.99, "total_price": 0.99},
+    ]},
+    {"file": "b.pdf", "date": "11.02.24", "time": "09:05", "sum": 1.44, "items": [
+        {"name": "Tomaten", "quantity": 0.48, "unit_price": 2.99, "total_price": 1.44},
+    ]},
+    {"file": "empty.pdf", "date": None, "time": None, "sum": 0, "items": []},
+]
+
+
+def test_flatten_receipts():
+    columns = flatten_receipts(iter(RECEIPTS))
+
+    assert list(columns) == COLUMNS
+    assert columns["file"] == ["a.pdf", "a.pdf", "b.pdf"]
+    assert columns["item_name"] == ["Banana", "Moehren", "Tomaten"]
+    assert columns["bon_sum"] == [4.97, 4.97, 1.44]
+    assert columns["quantity"] == [2, 1, 0.48]
+
+
+def test_receipts_to_frame_types():
+    df = receipts_to_frame(RECEIPTS)
+
+    assert isinstance(df["item_name"].dtype, pd.CategoricalDtype)
+    assert df["quantity"].dtype == "float64"
+    assert df["total_price"].dtype == "float64"
+    assert df["timestamp"].tolist() == [pd.Timestamp("2024-02-10 14:35")] * 2 + [pd.Timestamp("2024-02-11 09:05")]
+    assert df["date"].tolist() == ["10.02.24", "10.02.24", "11.02.24"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 10000])
+def test_write_items_csv_matches_legacy(tmp_path, chunk_size):
+    csv_file = tmp_path / "items.csv"
+    legacy_file = tmp_path / "legacy.csv"
+
+    rows = write_items_csv(iter(RECEIPTS), str(csv_file), chunk_size=chunk_size)
+    legacy_write_csv(RECEIPTS, str(legacy_file))
+
+    assert rows == 3
+    assert csv_file.read_text(encoding="utf-8") == legacy_file.read_text(encoding="utf-8")